@@ -14,7 +14,13 @@ csrf = CSRFProtect()
 mail = Mail()
 talisman = Talisman()
 
-def create_app(config_name=None):
+def create_app(config_name=None, start_background=True):
+    """Uygulamayı oluştur.
+    
+    start_background=False ise arka plan iş parçacıkları başlatılmaz; gunicorn
+    bunları fork sonrasında tek bir worker'da start_background_services ile
+    başlatır (gunicorn.conf.py).
+    """
     app = Flask(__name__)
     
     # Configuration
@@ -86,6 +92,11 @@ def create_app(config_name=None):
     from app.auth import auth as auth_bp
     app.register_blueprint(auth_bp, url_prefix='/auth')
     
+    # JSON API'si form kullanmaz; CSRF token'ı olmayan istemcilere açık
+    from app.api import bp as api_bp
+    csrf.exempt(api_bp)
+    app.register_blueprint(api_bp, url_prefix='/api')
+    
     # Global error handlers
     register_error_handlers(app)
     
@@ -97,10 +108,20 @@ def create_app(config_name=None):
         except Exception as e:
             app.logger.error(f"❌ Database tablo oluşturma hatası: {e}")
     
+    # Arka plan iş parçacıkları (debug reloader'ın izleyici sürecinde başlatılmaz)
+    if start_background and (not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        start_background_services(app)
+    
     app.logger.info("🚀 Flask uygulaması başarıyla başlatıldı")
     
     return app
 
+def start_background_services(app):
+    """Süreç başına bir kez çalışması gereken arka plan iş parçacıklarını başlat."""
+    if app.config.get('MARKET_SENTIMENT_REFRESH_ENABLED', False):
+        from app.services.news_service import start_market_sentiment_refresher
+        start_market_sentiment_refresher(app)
+
 def configure_logging(app):
     """Logging yapılandırması."""
     log_level = getattr(app.config, 'LOG_LEVEL', 'INFO')
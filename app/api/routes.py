@@ -1,6 +1,6 @@
 from flask import jsonify, request, current_app
 from app.api import bp
-from app.services import stock_service, news_service, prediction_service
+from app.services import stock_service, news_service, prediction_service, backtest_service, tuning_service, forecast_service
 from app.models import Stock, Analysis
 from app import db
 import pandas as pd
@@ -161,7 +161,9 @@ def get_stock_news(ticker):
                 'sentiment': {
                     'average': news_analysis['average_sentiment'],
                     'distribution': news_analysis['sentiment_distribution'],
-                    'total_count': news_analysis['total_count']
+                    'total_count': news_analysis['total_count'],
+                    'decayed': news_analysis.get('decayed_sentiment'),
+                    'daily': news_analysis.get('daily_sentiment', [])
                 }
             },
             'ticker': ticker.upper(),
@@ -191,18 +193,9 @@ def get_price_prediction(ticker):
                 'error': 'Veri bulunamadı'
             }), 404
         
-        # Close serisini al
-        close_col = 'Close'
-        if isinstance(stock_data.columns, pd.MultiIndex):
-            close_cols = [col for col in stock_data.columns if col[0] == 'Close']
-            if close_cols:
-                close_col = close_cols[0]
-        
-        close_series = pd.to_numeric(stock_data[close_col], errors='coerce').dropna()
-        
-        # Tahmin yap
-        prediction_result = prediction_service.get_price_prediction(
-            ticker.upper(), close_series, period, future_periods=future_days
+        # Tahmin yap (aynı veri sürümü için kayıtlı tahmin varsa o kullanılır)
+        prediction_result = prediction_service.predict_stock_price(
+            ticker.upper(), stock_data, prediction_days=future_days
         )
         
         if prediction_result is None:
@@ -215,13 +208,17 @@ def get_price_prediction(ticker):
         predictions = prediction_result['predictions']
         result_data = {
             'predictions': {
-                'dates': predictions.index.strftime('%Y-%m-%d').tolist(),
+                'dates': pd.DatetimeIndex(predictions['date']).strftime('%Y-%m-%d').tolist(),
                 'prices': predictions['predicted_price'].tolist()
             },
+            'model_name': prediction_result['model_name'],
             'confidence': prediction_result['confidence'],
-            'model_count': prediction_result['model_count'],
+            'model_count': prediction_result.get('model_count', 1),
+            'weights': prediction_result.get('weights'),
+            'model_predictions': prediction_result.get('model_predictions'),
             'last_actual_price': prediction_result['last_actual_price'],
-            'horizon_days': prediction_result['prediction_horizon_days']
+            'horizon_days': prediction_result['prediction_horizon_days'],
+            'from_store': prediction_result.get('from_store', False)
         }
         
         return jsonify({
@@ -238,11 +235,153 @@ def get_price_prediction(ticker):
             'error': 'Tahmin yapılamadı'
         }), 500
 
+@bp.route('/stocks/<ticker>/forecasts', methods=['GET'])
+def get_forecast_history(ticker):
+    """Kayıtlı tahminleri gerçekleşen fiyatlarla karşılaştır."""
+    try:
+        period = request.args.get('period', '6mo')
+        limit = int(request.args.get('limit', current_app.config.get('FORECAST_HISTORY_LIMIT', 30)))
+        limit = min(max(limit, 1), 100)  # 1-100 arası sınırla
+        
+        forecasts = forecast_service.get_forecast_history(ticker.upper(), limit)
+        
+        evaluations = []
+        if forecasts:
+            stock_data = stock_service.get_stock_data(ticker.upper(), period)
+            evaluations = forecast_service.evaluate_forecasts(ticker.upper(), stock_data, limit)
+        
+        return jsonify({
+            'success': True,
+            'data': [forecast.to_dict() for forecast in forecasts],
+            'evaluations': evaluations,
+            'ticker': ticker.upper()
+        })
+        
+    except Exception as e:
+        logger.error(f"Tahmin geçmişi API hatası ({ticker}): {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Tahmin geçmişi alınamadı'
+        }), 500
+
+@bp.route('/stocks/<ticker>/backtest', methods=['GET'])
+def get_backtest(ticker):
+    """Walk-forward backtest sonuçlarını al.
+    
+    Sonuç yoksa backtest arka planda başlatılır ve 202 döner; istemci aynı
+    adresi yeniden yoklar.
+    """
+    try:
+        ticker = ticker.upper()
+        period = request.args.get('period', '2y')
+        horizon = int(request.args.get('horizon', 7))
+        horizon = min(max(horizon, 1), 30)  # 1-30 arası sınırla
+        
+        result = backtest_service.get_backtest_result(ticker, horizon)
+        if result is None:
+            if not backtest_service.is_backtest_running(ticker, horizon):
+                stock_data = stock_service.get_stock_data(ticker, period)
+                if stock_data is None or stock_data.empty:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Veri bulunamadı'
+                    }), 404
+                
+                if not backtest_service.has_enough_data(stock_data, horizon):
+                    return jsonify({
+                        'success': False,
+                        'error': 'Backtest için yeterli veri yok'
+                    }), 422
+                
+                if not backtest_service.schedule_backtest(ticker, stock_data, horizon=horizon):
+                    return jsonify({
+                        'success': False,
+                        'error': 'Backtest kuyruğu dolu, lütfen daha sonra tekrar deneyin'
+                    }), 503
+            
+            return jsonify({
+                'success': True,
+                'status': 'running',
+                'ticker': ticker,
+                'horizon': horizon
+            }), 202
+        
+        return jsonify({
+            'success': True,
+            'status': 'done',
+            'data': result,
+            'weights': backtest_service.get_ensemble_weights(ticker, horizon),
+            'ticker': ticker
+        })
+        
+    except Exception as e:
+        logger.error(f"Backtest API hatası ({ticker}): {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Backtest yapılamadı'
+        }), 500
+
+@bp.route('/stocks/<ticker>/tune', methods=['GET', 'POST'])
+def tune_hyperparameters(ticker):
+    """Hisse ya da piyasası için hiperparametre araması.
+    
+    POST aramayı arka planda başlatır ve 202 döner; GET kayıtlı sonucu ve
+    aramanın sürüp sürmediğini verir.
+    """
+    try:
+        ticker = ticker.upper()
+        period = request.args.get('period', '2y')
+        scope = request.args.get('scope', 'ticker')
+        
+        if scope == 'market':
+            market = stock_service.get_market_from_ticker(ticker)
+            scope_key = tuning_service.market_scope_key(market)
+        else:
+            scope_key = ticker
+        
+        if request.method == 'GET':
+            result = tuning_service.get_tuning_result(scope_key)
+            if tuning_service.is_tuning_running(scope_key):
+                status = 'running'
+            else:
+                status = 'done' if result else 'not_started'
+            return jsonify({
+                'success': True,
+                'status': status,
+                'data': result,
+                'scope': scope_key
+            })
+        
+        if scope == 'market':
+            limit = current_app.config.get('TUNING_MARKET_MAX_TICKERS', 10)
+            tickers = [s.ticker for s in Stock.query.filter_by(market=market).limit(limit).all()] or [ticker]
+        else:
+            tickers = [ticker]
+        
+        if not tuning_service.schedule_tuning(scope_key, tickers, period):
+            return jsonify({
+                'success': False,
+                'error': 'Hiperparametre arama kuyruğu dolu, lütfen daha sonra tekrar deneyin'
+            }), 503
+        
+        return jsonify({
+            'success': True,
+            'status': 'running',
+            'scope': scope_key
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Hiperparametre arama API hatası ({ticker}): {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Hiperparametre araması yapılamadı'
+        }), 500
+
 @bp.route('/market/sentiment', methods=['GET'])
 def get_market_sentiment():
     """Genel piyasa duyarlılığını al."""
     try:
-        market_sentiment = news_service.get_market_sentiment()
+        market_sentiment = news_service.get_market_sentiment_snapshot()
         
         return jsonify({
             'success': True,
@@ -300,7 +439,9 @@ def health_check():
     return jsonify({
         'success': True,
         'message': 'API çalışıyor',
-        'version': '2.0'
+        'version': '2.0',
+        'finbert_ready': news_service.is_finbert_ready(),
+        'finbert_backend': news_service.finbert_backend if news_service.is_finbert_ready() else None
     })
 
 @bp.errorhandler(404)
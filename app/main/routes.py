@@ -1,9 +1,9 @@
 from flask import render_template, request, flash, current_app, jsonify, redirect, url_for
 from app.main import bp
-from app.services import stock_service, news_service, prediction_service, chart_service
+from app.services import stock_service, news_service, prediction_service, chart_service, chart_stream, comparison_service, analysis_jobs, analysis_cache
+from app.services.analysis_pipeline import Stage, AnalysisStageError, run_stages
+from app.services.analysis_jobs import AnalysisJobError
 from app.utils.formatters import *
-from datetime import datetime
-import pandas as pd
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,8 +50,8 @@ def index():
         if not stock_list:
             stock_list = DEFAULT_STOCKS
             
-        # Genel piyasa duyarlılığını al
-        market_sentiment = news_service.get_market_sentiment()
+        # Genel piyasa duyarlılığı (arka planda güncellenen anlık görüntü)
+        market_sentiment = news_service.get_market_sentiment_snapshot()
         
         return render_template('index.html', 
                              stock_list=stock_list,
@@ -84,32 +84,120 @@ def analyze():
             flash(f'{ticker} için hisse senedi bilgileri alınamadı.', 'error')
             return render_template('index.html', stock_list=DEFAULT_STOCKS)
         
-        # Hisse senedi verilerini çek
-        stock_data = stock_service.get_stock_data(ticker, period)
-        if stock_data is None or stock_data.empty:
-            flash(f'{ticker} için yeterli veri bulunamadı.', 'error')
+        # Aynı girdiler ve bağımlılık sürümleri için hazır analiz: aşamalar ve kayıt atlanır
+        cached_context = analysis_cache.get_cached_analysis(
+            ticker, period, chart_type,
+            analysis_cache.get_dependency_versions(ticker, period, stock.name, ANALYSIS_PREDICTION_DAYS)
+        )
+        if cached_context is not None:
+            return _render_analysis(ticker, stock, period, chart_type, cached_context)
+        
+        # İş modu: analiz arka planda çalışır, sayfa bölümleri tamamlandıkça alır
+        if current_app.config.get('ANALYSIS_JOBS_ENABLED', False):
+            job_id = analysis_jobs.submit_job(_run_analysis_job, ticker, period, chart_type)
+            if job_id is not None:
+                if request.accept_mimetypes.best == 'application/json':
+                    return jsonify({
+                        'job_id': job_id,
+                        'status_url': url_for('main.analysis_job_status', job_id=job_id),
+                        'page_url': url_for('main.analysis_job_page', job_id=job_id)
+                    }), 202
+                return redirect(url_for('main.analysis_job_page', job_id=job_id))
+        
+        # Veri, bilgi, haber, tahmin ve grafik aşamaları bağımlılık grafiğiyle paralel çalışır
+        try:
+            pipeline = run_stages(_analysis_stages(stock, ticker, period, chart_type))
+        except AnalysisStageError as e:
+            logger.warning(f"{ticker} analizi tamamlanamadı: {e}")
+            flash(_stage_error_message(e, ticker), 'error')
             return render_template('index.html', stock_list=DEFAULT_STOCKS)
         
-        # Teknik göstergeleri hesapla
-        indicators = stock_service.calculate_technical_indicators(stock_data)
-        if indicators is None:
-            flash(f'{ticker} için teknik analiz yapılamadı.', 'error')
-            return render_template('index.html', stock_list=DEFAULT_STOCKS)
+        results = pipeline['results']
+        context = {}
+        for section in ANALYSIS_SECTIONS:
+            context.update(_section_context(section, results, stock, period))
         
-        # Hisse senedi temel bilgilerini al
-        stock_info = stock_service.get_stock_info(ticker)
+        _save_analysis(stock, period, chart_type, results)
+        _cache_analysis(ticker, period, chart_type, stock, pipeline, context)
         
-        # Haber analizi yap
-        news_analysis = news_service.get_stock_news_analysis(
-            stock.name, ticker, days_back=7
-        )
+        return _render_analysis(ticker, stock, period, chart_type, context)
         
-        # Fiyat tahmini yap - yeni gelişmiş model
-        prediction_result = prediction_service.predict_stock_price(
-            ticker, stock_data, prediction_days=7
-        )
-        
-        # Temel göstergeleri formatla
+    except Exception as e:
+        logger.error(f"Analiz hatası: {e}")
+        flash('Analiz sırasında bir hata oluştu. Lütfen tekrar deneyin.', 'error')
+        return render_template('index.html', stock_list=DEFAULT_STOCKS)
+
+def _render_analysis(ticker, stock, period, chart_type, context):
+    """Analiz sayfası (context: bölümlerin şablon değişkenleri)."""
+    return render_template('analysis.html',
+                         ticker=ticker,
+                         stock=stock,
+                         chart_type=chart_type,
+                         period=period,
+                         stock_list=DEFAULT_STOCKS,
+                         **context)
+
+@bp.route('/analysis/<job_id>')
+def analysis_job_page(job_id):
+    """Analiz işi sayfası: bölümler yer tutucuyla başlar, iş ilerledikçe doldurulur."""
+    job = analysis_jobs.get_job(job_id)
+    if job is None:
+        flash('Analiz bulunamadı ya da süresi doldu. Lütfen tekrar deneyin.', 'error')
+        return redirect(url_for('main.index'))
+    
+    stock = stock_service.get_or_create_stock(job.ticker)
+    return render_template('analysis.html',
+                         job_id=job_id,
+                         ticker=job.ticker,
+                         stock=stock or {'name': job.ticker, 'market': ''},
+                         chart_type=job.chart_type,
+                         period=job.period,
+                         stock_list=DEFAULT_STOCKS)
+
+@bp.route('/analysis_jobs/<job_id>')
+def analysis_job_status(job_id):
+    """Analiz işinin durumu ve since kimliğinden sonra tamamlanan bölümler (JSON)."""
+    state = analysis_jobs.get_job_state(job_id, since=request.args.get('since', 0, type=int))
+    if state is None:
+        return jsonify({'status': 'failed', 'error': 'Analiz bulunamadı ya da süresi doldu.', 'sections': []}), 404
+    
+    response = jsonify(state)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# Analiz sayfasının bölümleri (templates/analysis/) -> gerektirdiği aşamalar.
+# İş modunda her bölüm, aşamaları tamamlanır tamamlanmaz gönderilir.
+ANALYSIS_SECTIONS = {
+    'chart': ('chart',),
+    'price': ('stock_data', 'stock_info'),
+    'indicators': ('indicators',),
+    'forecast': ('prediction_result',),
+    'news': ('news_analysis',),
+    'sentiment_trend': ('sentiment_chart_html',),
+    'summary': ('stock_data', 'indicators', 'news_analysis', 'prediction_result'),
+    'news_feed': ('news_analysis',),
+}
+
+ANALYSIS_PREDICTION_DAYS = 7  # Analiz sayfasındaki tahmin ufku (iş günü)
+
+def _stage_error_message(error, ticker):
+    """Zorunlu aşama hatası için kullanıcı mesajı."""
+    if error.stage == 'indicators':
+        return f'{ticker} için teknik analiz yapılamadı.'
+    return f'{ticker} için yeterli veri bulunamadı.'
+
+def _section_context(section, results, stock, period):
+    """Bölüm şablonunun değişkenleri (aşama sonuçlarından)."""
+    if section == 'chart':
+        # Sıkıştırılmış veri (şablon istemcide doldurulur) ya da HTML
+        chart_entry = results['chart']
+        body = chart_entry['body'].decode('utf-8') if chart_entry is not None else None
+        if current_app.config.get('CHART_RENDER_MODE', 'json') == 'json':
+            return {'chart_html': None, 'chart_payload_json': body}
+        return {'chart_html': body, 'chart_payload_json': None}
+    
+    if section == 'price':
+        stock_data, stock_info = results['stock_data'], results['stock_info']
         basic_indicators = {}
         if stock_info:
             basic_indicators = {
@@ -122,8 +210,10 @@ def analyze():
                 'Temettü Verimi': format_percentage(get_numeric_value(stock_info, 'dividendYield')),
                 'Beta': format_indicator(get_numeric_value(stock_info, 'beta')),
             }
-        
-        # Teknik göstergeleri formatla
+        return {'basic_indicators': basic_indicators}
+    
+    if section == 'indicators':
+        indicators = results['indicators']
         tech_indicators = {}
         if indicators:
             current_rsi = indicators['RSI'].iloc[-1] if not indicators['RSI'].empty else None
@@ -146,50 +236,131 @@ def analyze():
                 'Williams %R': format_indicator(indicators['Williams_R'].iloc[-1] if not indicators['Williams_R'].empty else None),
                 'ATR': format_indicator(indicators['ATR'].iloc[-1] if not indicators['ATR'].empty else None),
             }
-        
-        # Grafik oluştur
-        chart_html = chart_service.create_stock_chart(
-            stock_data, indicators, prediction_result, chart_type, ticker
-        )
-        
+        return {'tech_indicators': tech_indicators}
+    
+    if section == 'forecast':
+        return {'prediction_result': results['prediction_result']}
+    
+    if section in ('news', 'news_feed'):
+        return {'news_analysis': results['news_analysis']}
+    
+    if section == 'sentiment_trend':
+        return {'sentiment_chart_html': results['sentiment_chart_html']}
+    
+    if section == 'summary':
         # Analiz özetini oluştur
-        summary = generate_analysis_summary(
-            stock, stock_data['Close'], indicators, news_analysis, prediction_result, period
+        return {'summary': generate_analysis_summary(
+            stock, results['stock_data']['Close'], results['indicators'],
+            results['news_analysis'], results['prediction_result'], period
+        )}
+    
+    raise ValueError(f"Bilinmeyen analiz bölümü: {section}")
+
+def _save_analysis(stock, period, chart_type, results):
+    """Analizi veritabanına kaydet (hata analizi engellemez)."""
+    try:
+        stock_data = results['stock_data']
+        news_analysis = results['news_analysis']
+        prediction_result = results['prediction_result']
+        price_info = {
+            'current_price': stock_data['Close'].iloc[-1] if not stock_data['Close'].empty else None,
+            'price_change': calculate_price_change(stock_data['Close'])
+        }
+        
+        stock_service.save_analysis(
+            stock.id, period, chart_type, 
+            format_indicators_for_db(results['indicators']),
+            price_info,
+            {'average': news_analysis['average_sentiment'], 'count': news_analysis['total_count']},
+            {'price': prediction_result['predictions']['predicted_price'].iloc[-1] if prediction_result else None,
+             'confidence': prediction_result['confidence'] if prediction_result else None}
         )
-        
-        # Analizi veritabanına kaydet
-        try:
-            price_info = {
-                'current_price': stock_data['Close'].iloc[-1] if not stock_data['Close'].empty else None,
-                'price_change': calculate_price_change(stock_data['Close'])
-            }
-            
-            stock_service.save_analysis(
-                stock.id, period, chart_type, 
-                format_indicators_for_db(indicators),
-                price_info,
-                {'average': news_analysis['average_sentiment'], 'count': news_analysis['total_count']},
-                {'price': prediction_result['predictions']['predicted_price'].iloc[-1] if prediction_result else None,
-                 'confidence': prediction_result['confidence'] if prediction_result else None}
-            )
-        except Exception as e:
-            logger.warning(f"Analiz kaydedilemedi: {e}")
-        
-        return render_template('analysis.html',
-                             ticker=ticker,
-                             stock=stock,
-                             chart_html=chart_html,
-                             basic_indicators=basic_indicators,
-                             tech_indicators=tech_indicators,
-                             news_analysis=news_analysis,
-                             prediction_result=prediction_result,
-                             summary=summary,
-                             stock_list=DEFAULT_STOCKS)
-        
     except Exception as e:
-        logger.error(f"Analiz hatası: {e}")
-        flash('Analiz sırasında bir hata oluştu. Lütfen tekrar deneyin.', 'error')
-        return render_template('index.html', stock_list=DEFAULT_STOCKS)
+        logger.warning(f"Analiz kaydedilemedi: {e}")
+
+def _cache_analysis(ticker, period, chart_type, stock, pipeline, context):
+    """Tamamlanan analizi sonuç önbelleğine yaz.
+    
+    Varsayılan değere düşen aşama ya da arka planda iyileştirilen hızlı
+    tahmin içeren sonuç geçicidir; önbelleğe alınmaz.
+    """
+    prediction_result = pipeline['results']['prediction_result']
+    if pipeline['failed'] or (prediction_result and prediction_result.get('refining')):
+        return
+    
+    versions = analysis_cache.get_dependency_versions(
+        ticker, period, stock.name, ANALYSIS_PREDICTION_DAYS, stock_data=pipeline['results']['stock_data']
+    )
+    analysis_cache.store_analysis(ticker, period, chart_type, versions, context)
+
+def _run_analysis_job(job_id, ticker, period, chart_type):
+    """Analiz işi: aşamalar çalıştıkça hazır olan bölümleri yayınla."""
+    stock = stock_service.get_or_create_stock(ticker)
+    if not stock:
+        raise AnalysisJobError(f'{ticker} için hisse senedi bilgileri alınamadı.')
+    
+    results = {}
+    context = {}
+    published = set()
+    
+    def publish_ready(stage_name, result):
+        results[stage_name] = result
+        for section, stages in ANALYSIS_SECTIONS.items():
+            if section not in published and all(stage in results for stage in stages):
+                published.add(section)
+                section_context = _section_context(section, results, stock, period)
+                context.update(section_context)
+                html = render_template(f'analysis/{section}.html', ticker=ticker, period=period, chart_type=chart_type,
+                                       **section_context)
+                analysis_jobs.publish_section(job_id, section, html)
+    
+    try:
+        pipeline = run_stages(_analysis_stages(stock, ticker, period, chart_type), on_stage_done=publish_ready)
+    except AnalysisStageError as e:
+        logger.warning(f"{ticker} analizi tamamlanamadı: {e}")
+        raise AnalysisJobError(_stage_error_message(e, ticker))
+    
+    _save_analysis(stock, period, chart_type, pipeline['results'])
+    _cache_analysis(ticker, period, chart_type, stock, pipeline, context)
+
+def _analysis_stages(stock, ticker, period, chart_type):
+    """/analyze aşama grafiği.
+    
+    Fiyat verisi, şirket bilgisi ve haberler birbirinden bağımsızdır; göstergeler
+    ve tahmin fiyat verisini, ana grafik göstergeleri ve tahmini bekler.
+    Veritabanına yazan hisse kaydı ve analiz kaydı istek thread'inde kalır.
+    """
+    config = current_app.config
+    timeouts = config.get('ANALYSIS_STAGE_TIMEOUTS', {})
+    render_mode = config.get('CHART_RENDER_MODE', 'json')
+    latency_budget_ms = config.get('PREDICTION_LATENCY_BUDGET_MS')
+    stock_name = stock.name
+    
+    def load_stock_data():
+        stock_data = stock_service.get_stock_data(ticker, period)
+        return None if stock_data is None or stock_data.empty else stock_data
+    
+    return [
+        Stage('stock_data', load_stock_data, required=True, timeout=timeouts.get('stock_data')),
+        Stage('indicators', stock_service.calculate_technical_indicators, deps=['stock_data'],
+              required=True, timeout=timeouts.get('indicators')),
+        Stage('stock_info', lambda: stock_service.get_stock_info(ticker), timeout=timeouts.get('stock_info')),
+        Stage('news_analysis', lambda: news_service.get_stock_news_analysis(stock_name, ticker, days_back=7),
+              timeout=timeouts.get('news_analysis'), default=news_service.analyze_news_sentiment([])),
+        Stage('prediction_result',
+              lambda stock_data: prediction_service.predict_stock_price(
+                  ticker, stock_data, prediction_days=ANALYSIS_PREDICTION_DAYS, latency_budget_ms=latency_budget_ms),
+              deps=['stock_data'], timeout=timeouts.get('prediction_result')),
+        # Veri ve tahmin sürümü değişmedikçe önbellekten gelir
+        Stage('chart',
+              lambda stock_data, indicators, prediction_result: chart_service.render_stock_chart(
+                  stock_data, indicators, prediction_result, chart_type, ticker, period, mode=render_mode),
+              deps=['stock_data', 'indicators', 'prediction_result'], timeout=timeouts.get('chart')),
+        # Haber duyarlılığı trendi (günlük seri)
+        Stage('sentiment_chart_html',
+              lambda news_analysis: chart_service.create_sentiment_chart(news_analysis.get('daily_sentiment')),
+              deps=['news_analysis'], timeout=timeouts.get('sentiment_chart_html')),
+    ]
 
 @bp.route('/compare')
 def compare():
@@ -199,11 +370,13 @@ def compare():
         if not stock_list:
             stock_list = DEFAULT_STOCKS
             
-        return render_template('compare.html', stock_list=stock_list)
+        return render_template('compare.html', stock_list=stock_list,
+                             max_tickers=current_app.config.get('COMPARISON_MAX_TICKERS', 12))
         
     except Exception as e:
         logger.error(f"Karşılaştırma sayfası hatası: {e}")
-        return render_template('compare.html', stock_list=DEFAULT_STOCKS)
+        return render_template('compare.html', stock_list=DEFAULT_STOCKS,
+                             max_tickers=current_app.config.get('COMPARISON_MAX_TICKERS', 12))
 
 @bp.route('/compare_stocks', methods=['POST'])
 def compare_stocks():
@@ -216,8 +389,9 @@ def compare_stocks():
             flash('En az 2 hisse senedi seçiniz.', 'error')
             return redirect(url_for('main.compare'))
         
-        if len(tickers) > 6:
-            flash('En fazla 6 hisse senedi seçebilirsiniz.', 'error')
+        max_tickers = current_app.config.get('COMPARISON_MAX_TICKERS', 12)
+        if len(tickers) > max_tickers:
+            flash(f'En fazla {max_tickers} hisse senedi seçebilirsiniz.', 'error')
             return redirect(url_for('main.compare'))
         
         # Her hisse için veri çek
@@ -231,16 +405,19 @@ def compare_stocks():
             flash('Seçilen hisse senetleri için veri bulunamadı.', 'error')
             return redirect(url_for('main.compare'))
         
-        # Karşılaştırma grafiği oluştur
-        comparison_chart = chart_service.create_comparison_chart(stocks_data, period)
+        # Ortak tarih ekseninde tek matris: grafik ve performans tablosu aynı çıktıyı kullanır
+        comparison = comparison_service.build_comparison(stocks_data)
+        if comparison is None:
+            flash('Seçilen hisse senetleri için yeterli veri bulunamadı.', 'error')
+            return redirect(url_for('main.compare'))
         
-        # Performans hesapla
-        performance_data = calculate_comparison_performance(stocks_data)
+        comparison_chart = chart_service.create_comparison_chart(stocks_data, period, comparison=comparison)
         
         return render_template('comparison_result.html',
                              comparison_chart=comparison_chart,
-                             performance_data=performance_data,
-                             selected_tickers=list(stocks_data.keys()),
+                             performance_data=comparison['performance'],
+                             correlation=comparison['correlation'],
+                             selected_tickers=comparison['tickers'],
                              period=period)
         
     except Exception as e:
@@ -248,6 +425,97 @@ def compare_stocks():
         flash('Karşılaştırma sırasında bir hata oluştu.', 'error')
         return redirect(url_for('main.compare'))
 
+@bp.route('/chart_template/<chart_type>')
+def chart_template(chart_type):
+    """Ana grafiğin veri içermeyen şablonu (tarayıcıda önbelleğe alınır)."""
+    response = jsonify(chart_service.get_stock_chart_template(chart_type))
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('CHART_TEMPLATE_MAX_AGE_SECONDS', 86400)
+    response.add_etag()
+    return response.make_conditional(request)
+
+def _compressed_chart_response(entry):
+    """Önbellekteki grafik kaydını istemcinin kabul ettiği kodlamayla gönder."""
+    accepted = request.accept_encodings
+    body, encoding = entry['body'], None
+    for name in ('br', 'gzip'):
+        if entry.get(name) is not None and accepted[name]:
+            body, encoding = entry[name], name
+            break
+    
+    response = current_app.response_class(body, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{entry['etag']}-{encoding or 'identity'}")
+    return response.make_conditional(request)
+
+@bp.route('/chart_data/<ticker>')
+def chart_data(ticker):
+    """Yakınlaştırılan aralık için grafik verisini yeniden gönder (aralık içinde tam çözünürlük)."""
+    try:
+        ticker = ticker.strip().upper()
+        period = request.args.get('period', '1y')
+        chart_type = request.args.get('chart_type', 'line')
+        start = request.args.get('start', type=int)
+        end = request.args.get('end', type=int)
+        points = request.args.get('points', type=int)
+        
+        stock_data = stock_service.get_stock_data(ticker, period)
+        if stock_data is None or stock_data.empty:
+            return jsonify({'error': f'{ticker} için veri bulunamadı'}), 404
+        
+        x_range = (start, end) if start is not None and end is not None else None
+        
+        # Göstergeler yalnızca önbellekte yoksa hesaplanır
+        entry = chart_service.render_stock_chart(
+            stock_data, lambda: stock_service.calculate_technical_indicators(stock_data), None,
+            chart_type, ticker, period, mode='json', x_range=x_range, max_points=points
+        )
+        if entry is None:
+            return jsonify({'error': 'Seçilen aralıkta veri yok'}), 404
+        return _compressed_chart_response(entry)
+        
+    except Exception as e:
+        logger.error(f"Grafik verisi hatası ({ticker}): {e}")
+        return jsonify({'error': 'Grafik verisi alınamadı'}), 500
+
+@bp.route('/chart_delta/<ticker>')
+def chart_delta(ticker):
+    """Açık grafiğin son barından itibaren bar ve gösterge farkları (istemci yoklar).
+    
+    since (epoch saniyesi) istemcideki son barın zamanı, version istemcinin
+    son aldığı veri sürümüdür. Veri değişmediyse 204 döner. Göstergeler
+    süreçte hisse/dönem başına tutulan akışta artımlı güncellenir; istek
+    worker thread'ini beklemede tutmaz.
+    """
+    if not current_app.config.get('CHART_STREAM_ENABLED', True):
+        return jsonify({'error': 'Grafik akışı kapalı'}), 404
+    
+    ticker = ticker.strip().upper()
+    period = request.args.get('period', '1y')
+    since = request.args.get('since', type=float)
+    if since is None:
+        return jsonify({'error': 'since parametresi gerekli'}), 400
+    
+    stock_data = stock_service.get_stock_data(ticker, period)
+    if stock_data is None or stock_data.empty:
+        return jsonify({'error': f'{ticker} için veri bulunamadı'}), 404
+    
+    version = stock_service.get_data_version(stock_data)
+    if version is not None and version == request.args.get('version'):
+        return '', 204
+    
+    try:
+        delta = chart_stream.get_delta(ticker, period, stock_data, version, since)
+    except LookupError as e:
+        logger.info(f"Grafik farkı gönderilemedi, istemci yeniden yüklenecek ({ticker}): {e}")
+        return jsonify({'reset': True})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    return jsonify({'version': version, 'delta': delta})
+
 @bp.route('/search_stocks')
 def search_stocks():
     """AJAX ile hisse senedi ara."""
@@ -347,33 +615,3 @@ def format_indicators_for_db(indicators):
                 formatted[key] = {'current': series.iloc[-1]}
     
     return formatted
-
-def calculate_comparison_performance(stocks_data):
-    """Karşılaştırma performansını hesapla."""
-    performance = {}
-    
-    for ticker, data in stocks_data.items():
-        try:
-            close_col = 'Close'
-            if isinstance(data.columns, pd.MultiIndex):
-                close_cols = [col for col in data.columns if col[0] == 'Close']
-                if close_cols:
-                    close_col = close_cols[0]
-            
-            close_series = data[close_col].dropna()
-            if not close_series.empty and len(close_series) >= 2:
-                total_return = ((close_series.iloc[-1] / close_series.iloc[0]) - 1) * 100
-                performance[ticker] = {
-                    'total_return': total_return,
-                    'current_price': close_series.iloc[-1],
-                    'start_price': close_series.iloc[0]
-                }
-        except Exception as e:
-            logger.error(f"Performans hesaplama hatası ({ticker}): {e}")
-            performance[ticker] = {
-                'total_return': 0,
-                'current_price': 0,
-                'start_price': 0
-            }
-    
-    return performance 
\ No newline at end of file
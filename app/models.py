@@ -155,6 +155,183 @@ class Analysis(db.Model):
     def __repr__(self):
         return f'<Analysis {self.stock.ticker}: {self.created_at}>'
 
+class Forecast(db.Model):
+    """Tahmin sonuçları modeli - tam ufuk ve model bazında çıktılar."""
+    __tablename__ = 'forecasts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    ticker = db.Column(db.String(20), nullable=False, index=True)
+    data_version = db.Column(db.String(64), nullable=False)
+    horizon = db.Column(db.Integer, nullable=False)
+    
+    # Ensemble sonucu
+    model_name = db.Column(db.String(50), nullable=False)
+    confidence = db.Column(db.Float)
+    weight_source = db.Column(db.String(20))
+    last_actual_price = db.Column(db.Float)
+    last_data_date = db.Column(db.Date)
+    
+    # Tahmin yolu ve model çıktıları (JSON)
+    prediction_dates = db.Column(db.JSON, nullable=False)  # ['YYYY-MM-DD', ...]
+    predicted_prices = db.Column(db.JSON, nullable=False)
+    model_predictions = db.Column(db.JSON)  # model adı -> tahmin listesi
+    weights = db.Column(db.JSON)  # model adı -> ağırlık
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    # Unique constraint
+    __table_args__ = (db.UniqueConstraint('ticker', 'data_version', 'horizon', name='unique_forecast_version'),)
+    
+    def __repr__(self):
+        return f'<Forecast {self.ticker}: {self.data_version} ({self.horizon} gün)>'
+    
+    def to_dict(self):
+        """Convert forecast to dictionary."""
+        return {
+            'id': self.id,
+            'ticker': self.ticker,
+            'data_version': self.data_version,
+            'horizon': self.horizon,
+            'model_name': self.model_name,
+            'confidence': self.confidence,
+            'weight_source': self.weight_source,
+            'last_actual_price': self.last_actual_price,
+            'last_data_date': self.last_data_date.isoformat() if self.last_data_date else None,
+            'prediction_dates': self.prediction_dates,
+            'predicted_prices': self.predicted_prices,
+            'model_predictions': self.model_predictions,
+            'weights': self.weights,
+            'created_at': self.created_at.isoformat() + 'Z' if self.created_at else None
+        }
+
+class NewsArticle(db.Model):
+    """Yerel haber deposu - NewsAPI'den çekilen haberler sorgu bazında saklanır."""
+    __tablename__ = 'news_articles'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    search_query = db.Column(db.String(200), nullable=False, index=True)
+    url = db.Column(db.String(1000), nullable=False)
+    title = db.Column(db.String(500))
+    description = db.Column(db.Text)
+    source_name = db.Column(db.String(200))
+    published_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Unique constraint
+    __table_args__ = (db.UniqueConstraint('search_query', 'url', name='unique_query_article'),)
+    
+    def __repr__(self):
+        return f'<NewsArticle {self.search_query}: {self.url}>'
+    
+    def to_dict(self):
+        """NewsAPI makale biçiminde sözlük."""
+        return {
+            'title': self.title,
+            'description': self.description,
+            'url': self.url,
+            'publishedAt': self.published_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'source': {'name': self.source_name}
+        }
+
+class NewsQueryState(db.Model):
+    """Sorgu bazında haber deposunun kapsadığı zaman aralığı."""
+    __tablename__ = 'news_query_states'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    search_query = db.Column(db.String(200), unique=True, nullable=False, index=True)
+    covered_from = db.Column(db.DateTime, nullable=False)  # Bu tarihten sonrası depoda
+    newest_published_at = db.Column(db.DateTime)  # Görülen en yeni haber
+    last_fetched_at = db.Column(db.DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f'<NewsQueryState {self.search_query}: {self.newest_published_at}>'
+
+class SentimentCache(db.Model):
+    """Duyarlılık sonuçları önbelleği - metin ve model adının özetiyle anahtarlanır."""
+    __tablename__ = 'sentiment_cache'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    key_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)  # sha256(model + metin)
+    model_name = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(10), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # LRU temizliği için
+    
+    def __repr__(self):
+        return f'<SentimentCache {self.model_name}: {self.category} ({self.score:.2f})>'
+
+class MarketSentimentSnapshot(db.Model):
+    """Genel piyasa duyarlılığı anlık görüntüsü (arka planda periyodik hesaplanır)."""
+    __tablename__ = 'market_sentiment_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sentiment_score = db.Column(db.Float, nullable=False)
+    article_count = db.Column(db.Integer, nullable=False)
+    distribution = db.Column(db.JSON, nullable=False)  # {'positive': n, 'neutral': n, 'negative': n}
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<MarketSentimentSnapshot {self.created_at}: {self.sentiment_score:.2f}>'
+    
+    def to_dict(self):
+        """Convert snapshot to dictionary."""
+        return {
+            'sentiment_score': self.sentiment_score,
+            'article_count': self.article_count,
+            'distribution': self.distribution,
+            'updated_at': self.created_at.isoformat() + 'Z' if self.created_at else None
+        }
+
+class TickerSentimentState(db.Model):
+    """Hisse bazında zamanla sönümlenen duyarlılık durumu (akış halinde güncellenir)."""
+    __tablename__ = 'ticker_sentiment_states'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    ticker = db.Column(db.String(20), unique=True, nullable=False, index=True)
+    decayed_sum = db.Column(db.Float, nullable=False, default=0.0)  # Σ ağırlık * skor * sönüm
+    decayed_weight = db.Column(db.Float, nullable=False, default=0.0)  # Σ ağırlık * sönüm
+    reference_time = db.Column(db.DateTime)  # Sönümlü toplamların referans anı
+    article_count = db.Column(db.Integer, nullable=False, default=0)
+    daily = db.Column(db.JSON, nullable=False)  # {'YYYY-MM-DD': [Σ ağırlık * skor, Σ ağırlık, adet]}
+    seen_keys = db.Column(db.JSON, nullable=False)  # Eklenmiş haberlerin URL özetleri
+    version = db.Column(db.Integer, nullable=False, default=1)  # Her güncellemede artar (iyimser kilit)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<TickerSentimentState {self.ticker}: {self.article_count} haber>'
+
+class AnalysisJob(db.Model):
+    """Arka planda çalışan /analyze işi (durum tüm gunicorn worker'larından okunur)."""
+    __tablename__ = 'analysis_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    ticker = db.Column(db.String(20), nullable=False)
+    period = db.Column(db.String(10), nullable=False)
+    chart_type = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='queued')  # 'queued', 'running', 'done', 'failed'
+    error = db.Column(db.String(300))  # Kullanıcıya gösterilecek hata mesajı
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    finished_at = db.Column(db.DateTime)
+    
+    sections = db.relationship('AnalysisJobSection', backref='job', lazy='dynamic',
+                               cascade='all, delete-orphan', order_by='AnalysisJobSection.id')
+    
+    def __repr__(self):
+        return f'<AnalysisJob {self.ticker}: {self.status}>'
+
+class AnalysisJobSection(db.Model):
+    """Analiz işinin tamamlanan bölümü (oluşturulmuş HTML parçası)."""
+    __tablename__ = 'analysis_job_sections'
+    
+    id = db.Column(db.Integer, primary_key=True)  # İstemci bu kimlikten sonrasını ister
+    job_id = db.Column(db.String(32), db.ForeignKey('analysis_jobs.id'), nullable=False, index=True)
+    name = db.Column(db.String(30), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    
+    def __repr__(self):
+        return f'<AnalysisJobSection {self.job_id}: {self.name}>'
+
 class Alert(db.Model):
     """Fiyat uyarıları modeli."""
     __tablename__ = 'alerts'
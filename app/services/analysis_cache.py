@@ -0,0 +1,84 @@
+"""
+/analyze sonuç önbelleği.
+
+Analiz sayfasının şablon bağlamı (grafik, biçimlendirilmiş göstergeler,
+haberler, tahmin, özet) hisse, dönem ve grafik tipiyle saklanır. Kayıt,
+oluşturulduğu andaki bağımlılık sürümlerini taşır: fiyat verisi sürümü,
+haber deposu sürümü ve kayıtlı tahmin sürümü. İstekte sürümler yeniden
+hesaplanır (ağ isteği yapılmaz); biri değişmişse kayıt silinir ve analiz
+yeniden çalışır. Sürüm hesaplanamıyorsa (fiyat verisi önbellekte yok, haberlerin
+yenilenmesi gerekiyor) önbellek kullanılmaz.
+"""
+
+import time
+import logging
+import threading
+from flask import current_app
+
+from app.services import stock_service, news_service, forecast_service
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+def _get_analysis_cache():
+    """Analiz sonuç önbelleği (lazy)."""
+    global _analysis_cache
+
+    with _analysis_cache_lock:
+        if _analysis_cache is None:
+            _analysis_cache = LRUCache(maxsize=current_app.config.get('ANALYSIS_CACHE_SIZE', 128))
+        return _analysis_cache
+
+def get_dependency_versions(ticker, period, stock_name, prediction_days, stock_data=None):
+    """Analizin bağımlılık sürümleri: (veri, haber, tahmin) ya da None.
+
+    stock_data verilmezse yalnızca önbellekteki fiyat verisine bakılır.
+    """
+    if not current_app.config.get('ANALYSIS_CACHE_ENABLED', True):
+        return None
+
+    if stock_data is None:
+        stock_data = stock_service.get_cached_stock_data(ticker, period)
+    data_version = stock_service.get_data_version(stock_data)
+    if data_version is None:
+        return None
+
+    news_version = news_service.get_news_version(stock_name, ticker)
+    if news_version is None:
+        return None
+
+    forecast_version = forecast_service.get_stored_forecast_version(ticker, data_version, prediction_days)
+    return (data_version, news_version, forecast_version)
+
+def get_cached_analysis(ticker, period, chart_type, versions):
+    """Sürümleri aynıysa önbellekteki şablon bağlamı; değilse kaydı sil ve None döndür."""
+    if versions is None:
+        return None
+
+    cache = _get_analysis_cache()
+    key = (ticker, period, chart_type)
+    entry = cache.get(key)
+    if entry is None:
+        return None
+
+    ttl = current_app.config.get('ANALYSIS_CACHE_TTL_SECONDS', 600)
+    if entry['versions'] != versions or time.time() - entry['timestamp'] >= ttl:
+        cache.pop(key)
+        logger.info(f"{ticker} analiz önbelleği geçersiz (bağımlılık değişti ya da süre doldu)")
+        return None
+
+    logger.info(f"{ticker} analizi önbellekten verildi")
+    return entry['context']
+
+def store_analysis(ticker, period, chart_type, versions, context):
+    """Şablon bağlamını bağımlılık sürümleriyle önbelleğe yaz."""
+    if versions is None:
+        return
+    _get_analysis_cache().set((ticker, period, chart_type), {
+        'versions': versions,
+        'context': context,
+        'timestamp': time.time()
+    })
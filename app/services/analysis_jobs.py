@@ -0,0 +1,151 @@
+"""
+Arka planda çalışan analiz işleri.
+
+/analyze isteği işi kuyruğa ekleyip hemen döner; iş bu süreçteki thread
+havuzunda çalışır ve tamamlanan her bölümü (oluşturulmuş HTML parçası)
+veritabanına yazar. Sayfa bölümleri yokladıkça alır. Durum veritabanında
+tutulduğu için yoklama isteği hangi gunicorn worker'ına düşerse düşsün
+yanıtlanır; işi çalıştıran süreç ölürse iş zaman aşımıyla başarısız sayılır.
+"""
+
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, request, has_request_context
+
+from app import db
+from app.models import AnalysisJob, AnalysisJobSection
+
+logger = logging.getLogger(__name__)
+
+GENERIC_ERROR = 'Analiz sırasında bir hata oluştu. Lütfen tekrar deneyin.'
+
+_job_executor = None
+_job_lock = threading.Lock()
+_active_jobs = 0  # Bu süreçte kuyrukta bekleyen ya da çalışan iş sayısı
+
+class AnalysisJobError(Exception):
+    """İşi kullanıcıya gösterilecek mesajla sonlandır."""
+
+def _get_executor():
+    """İşlerin çalıştığı thread havuzu (lazy)."""
+    global _job_executor
+
+    if _job_executor is None:
+        _job_executor = ThreadPoolExecutor(
+            max_workers=current_app.config.get('ANALYSIS_JOB_WORKERS', 4),
+            thread_name_prefix='analysis-job'
+        )
+    return _job_executor
+
+def _set_status(job_id, status, error=None):
+    job = db.session.get(AnalysisJob, job_id)
+    if job is None:
+        return
+    job.status = status
+    job.error = error
+    if status in ('done', 'failed'):
+        job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+def _run_job(app, url_root, job_id, func, args):
+    """İşi kendi istek bağlamında çalıştır (url_for ve şablonlar için isteğin kök adresiyle)."""
+    global _active_jobs
+
+    try:
+        with app.test_request_context(base_url=url_root):
+            _set_status(job_id, 'running')
+            try:
+                func(job_id, *args)
+            except AnalysisJobError as e:
+                db.session.rollback()
+                _set_status(job_id, 'failed', str(e))
+            except Exception as e:
+                logger.error(f"Analiz işi {job_id} hatası: {e}")
+                db.session.rollback()
+                _set_status(job_id, 'failed', GENERIC_ERROR)
+            else:
+                _set_status(job_id, 'done')
+    except Exception as e:
+        logger.error(f"Analiz işi {job_id} durumu kaydedilemedi: {e}")
+    finally:
+        with _job_lock:
+            _active_jobs -= 1
+
+def _purge_expired():
+    """Saklama süresi dolan işleri ve bölümlerini sil."""
+    ttl = current_app.config.get('ANALYSIS_JOB_TTL_SECONDS', 3600)
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl)
+    expired = db.session.query(AnalysisJob.id).filter(AnalysisJob.created_at < cutoff)
+    AnalysisJobSection.query.filter(AnalysisJobSection.job_id.in_(expired.scalar_subquery())).delete(synchronize_session=False)
+    AnalysisJob.query.filter(AnalysisJob.created_at < cutoff).delete(synchronize_session=False)
+
+def submit_job(func, ticker, period, chart_type):
+    """İşi kuyruğa ekle ve kimliğini döndür.
+
+    func(job_id, ticker, period, chart_type) iş thread'inde çağrılır;
+    AnalysisJobError mesajı kullanıcıya gösterilir. Bu süreçteki iş sayısı
+    ANALYSIS_JOB_MAX_QUEUED sınırındaysa None döner (çağıran eşzamanlı
+    çalışmaya düşer).
+    """
+    global _active_jobs
+
+    with _job_lock:
+        if _active_jobs >= current_app.config.get('ANALYSIS_JOB_MAX_QUEUED', 32):
+            logger.warning(f"Analiz iş kuyruğu dolu, {ticker} eşzamanlı çalışacak")
+            return None
+        _active_jobs += 1
+
+    try:
+        _purge_expired()
+        job_id = uuid.uuid4().hex
+        db.session.add(AnalysisJob(id=job_id, ticker=ticker, period=period, chart_type=chart_type, status='queued'))
+        db.session.commit()
+
+        url_root = request.url_root if has_request_context() else None
+        with _job_lock:
+            executor = _get_executor()
+        executor.submit(_run_job, current_app._get_current_object(), url_root, job_id, func, (ticker, period, chart_type))
+    except Exception as e:
+        db.session.rollback()
+        with _job_lock:
+            _active_jobs -= 1
+        logger.error(f"Analiz işi oluşturulamadı: {e}")
+        return None
+
+    logger.info(f"Analiz işi kuyruğa eklendi: {job_id} ({ticker}, {period})")
+    return job_id
+
+def publish_section(job_id, name, html):
+    """Tamamlanan bölümü kaydet (iş thread'inden çağrılır)."""
+    db.session.add(AnalysisJobSection(job_id=job_id, name=name, html=html))
+    db.session.commit()
+
+def get_job(job_id):
+    """İş kaydı (yoksa ya da süresi dolduysa None)."""
+    return db.session.get(AnalysisJob, job_id)
+
+def get_job_state(job_id, since=0):
+    """İşin durumu ve since kimliğinden sonra tamamlanan bölümler.
+
+    Dönen sözlük: status, error, sections ([{id, name, html}]). Süresi
+    içinde bitmeyen iş (çalıştıran süreç yeniden başlamış olabilir)
+    başarısız sayılır. İş yoksa None.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return None
+
+    sections = job.sections.filter(AnalysisJobSection.id > since).all()
+    status, error = job.status, job.error
+    timeout = current_app.config.get('ANALYSIS_JOB_TIMEOUT_SECONDS', 300)
+    if status in ('queued', 'running') and datetime.utcnow() - job.created_at > timedelta(seconds=timeout):
+        status, error = 'failed', GENERIC_ERROR
+
+    return {
+        'status': status,
+        'error': error,
+        'sections': [{'id': section.id, 'name': section.name, 'html': section.html} for section in sections]
+    }
@@ -0,0 +1,169 @@
+"""
+Bağımlılık grafiği (DAG) olarak çalışan analiz aşamaları.
+
+Her aşama, bağımlı olduğu aşamaların sonuçlarını anahtar kelime argümanı
+olarak alır. Bağımlılıkları tamamlanan aşamalar ortak thread havuzunda
+hemen başlatılır; böylece birbirinden bağımsız aşamalar (fiyat verisi,
+şirket bilgisi, haberler) paralel çalışır ve toplam süre aşamaların
+toplamı değil kritik yolun süresi olur.
+
+Süresi dolan ya da hata veren isteğe bağlı aşamanın yerine varsayılan değeri
+kullanılır (çalışan thread iptal edilemez, sonucu yok sayılır). Süre aşama
+thread'de başladığında işlemeye başlar; havuz doluyken kuyrukta beklemek
+zaman aşımına sayılmaz. Zorunlu
+aşamada hata, zaman aşımı ya da None sonuç AnalysisStageError yükseltir.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+QUEUED_POLL_SECONDS = 0.05  # Kuyruktaki süreli aşamanın başlayıp başlamadığının kontrol aralığı
+
+_pipeline_executor = None
+_pipeline_lock = threading.Lock()
+
+class AnalysisStageError(Exception):
+    """Zorunlu bir analiz aşaması sonuç üretemedi."""
+
+    def __init__(self, stage, reason):
+        super().__init__(f"{stage} aşaması başarısız: {reason}")
+        self.stage = stage
+        self.reason = reason
+
+class Stage:
+    """Tek analiz aşaması.
+
+    func, deps içindeki aşamaların sonuçlarını aynı adlı argümanlar olarak
+    alır. timeout saniye cinsindendir (None: sınırsız).
+    """
+
+    def __init__(self, name, func, deps=(), timeout=None, required=False, default=None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.required = required
+        self.default = default
+
+def _get_executor():
+    """Aşamaların çalıştığı ortak thread havuzu (lazy)."""
+    global _pipeline_executor
+
+    with _pipeline_lock:
+        if _pipeline_executor is None:
+            _pipeline_executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('ANALYSIS_PIPELINE_WORKERS', 8),
+                thread_name_prefix='analysis'
+            )
+        return _pipeline_executor
+
+def _run_stage(app, stage, inputs, started):
+    """Aşamayı kendi uygulama bağlamında çalıştır (veritabanı oturumu thread'e özeldir).
+
+    Başlangıç anı started sözlüğüne yazılır; zaman aşımı buradan ölçülür.
+    """
+    started[stage.name] = time.monotonic()
+    with app.app_context():
+        return stage.func(**inputs)
+
+def _check_graph(stages):
+    """Bilinmeyen bağımlılık ya da döngü varsa ValueError."""
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        missing = set(stage.deps) - names
+        if missing:
+            raise ValueError(f"{stage.name} bilinmeyen aşamalara bağlı: {sorted(missing)}")
+
+    resolved = set()
+    remaining = list(stages)
+    while remaining:
+        ready = [stage for stage in remaining if set(stage.deps) <= resolved]
+        if not ready:
+            raise ValueError(f"Aşama grafiğinde döngü var: {[stage.name for stage in remaining]}")
+        resolved.update(stage.name for stage in ready)
+        remaining = [stage for stage in remaining if stage.name not in resolved]
+
+def run_stages(stages, on_stage_done=None):
+    """Aşamaları bağımlılık sırasına göre paralel çalıştır.
+
+    Dönen sözlük: results (aşama adı -> sonuç), timings (aşama adı -> saniye)
+    ve failed (varsayılan değere düşen aşamalar). on_stage_done(name, result)
+    her aşama bittiğinde çağıran thread'de çağrılır.
+    """
+    _check_graph(stages)
+    app = current_app._get_current_object()
+    executor = _get_executor()
+
+    pending = {stage.name: stage for stage in stages}
+    running = {}
+    started = {}
+    results, timings, failed = {}, {}, set()
+    started_at = time.monotonic()
+
+    def finish(stage, result, error=None):
+        if error is not None:
+            if stage.required:
+                raise AnalysisStageError(stage.name, error)
+            logger.warning(f"Analiz aşaması {stage.name} varsayılan değerle devam ediyor: {error}")
+            failed.add(stage.name)
+            result = stage.default
+        elif stage.required and result is None:
+            raise AnalysisStageError(stage.name, 'sonuç yok')
+
+        results[stage.name] = result
+        if on_stage_done is not None:
+            on_stage_done(stage.name, result)
+
+    try:
+        while pending or running:
+            # Bağımlılıkları tamamlanan aşamaları başlat
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.deps):
+                    inputs = {dep: results[dep] for dep in stage.deps}
+                    future = executor.submit(_run_stage, app, stage, inputs, started)
+                    running[future] = stage
+                    del pending[name]
+
+            # İlk biten aşamayı ya da en yakın zaman aşımını bekle; kuyruktaki
+            # süreli aşama için başlayıp başlamadığına kısa aralıklarla bakılır
+            now = time.monotonic()
+            deadlines = [
+                started[stage.name] + stage.timeout if stage.name in started else now + QUEUED_POLL_SECONDS
+                for stage in running.values() if stage.timeout is not None
+            ]
+            wait_timeout = max(min(deadlines) - now, 0) if deadlines else None
+            done, _ = wait(list(running), timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for future in done:
+                stage = running.pop(future)
+                timings[stage.name] = now - started.get(stage.name, now)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    finish(stage, None, error=e)
+                else:
+                    finish(stage, result)
+
+            for future, stage in list(running.items()):
+                if stage.timeout is not None and stage.name in started and now - started[stage.name] >= stage.timeout:
+                    running.pop(future)
+                    timings[stage.name] = now - started[stage.name]
+                    finish(stage, None, error=f"{stage.timeout} sn zaman aşımı")
+
+    except AnalysisStageError:
+        # Başlamamış aşamalar çalıştırılmaz; çalışanların sonucu yok sayılır
+        for future in running:
+            future.cancel()
+        raise
+
+    logger.info(
+        f"Analiz aşamaları {time.monotonic() - started_at:.2f} sn'de tamamlandı "
+        f"({', '.join(f'{name}={seconds:.2f}' for name, seconds in timings.items())})"
+    )
+    return {'results': results, 'timings': timings, 'failed': failed}
@@ -0,0 +1,236 @@
+"""
+Walk-forward backtest motoru.
+
+Mevcut model fonksiyonlarını (LightGBM, Prophet, RandomForest) genişleyen
+pencerelerle geriye dönük çalıştırır ve hisse / ufuk bazında MAE, RMSE ve yön
+doğruluğu raporlar. Sonuçlar ensemble ağırlıklarını belirler.
+"""
+
+import numpy as np
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+
+from app.services import prediction_service
+
+logger = logging.getLogger(__name__)
+
+# Model anahtarı -> (prediction_service fonksiyon adı, sonuçtaki model adı, özellik kullanır mı)
+MODEL_REGISTRY = {
+    'lightgbm': ('predict_with_lightgbm', 'LightGBM', True),
+    'prophet': ('predict_with_prophet', 'Prophet', False),
+    'random_forest': ('predict_with_random_forest', 'RandomForest', True),
+}
+
+# Önbellek: (ticker, horizon) -> {'data', 'timestamp'}
+_backtest_cache = {}
+_backtest_in_progress = set()
+_backtest_lock = threading.Lock()
+_backtest_executor = None
+
+def _fold_cutoffs(n_rows, horizon, n_folds, min_train_size):
+    """Genişleyen pencere için eğitim bitiş indekslerini hesapla."""
+    last_cutoff = n_rows - horizon
+    if last_cutoff < min_train_size:
+        return []
+
+    step = max(horizon, (last_cutoff - min_train_size) // max(n_folds, 1))
+    cutoffs = list(range(last_cutoff, min_train_size - 1, -step))[:n_folds]
+    return sorted(cutoffs)
+
+def _fold_params(model_key):
+    """Kat için tek çekirdekli model parametreleri (paralellik katlar arasındadır)."""
+    if model_key == 'random_forest':
+        return dict(prediction_service.get_random_forest_params(), n_jobs=1)
+    if model_key == 'lightgbm':
+        return dict(prediction_service.get_lightgbm_params(), num_threads=1)
+    return None
+
+def has_enough_data(stock_data, horizon=7):
+    """Veri en az bir backtest katı için yeterli mi?"""
+    config = current_app.config
+    return bool(_fold_cutoffs(len(stock_data), horizon, config.get('BACKTEST_FOLDS', 5),
+                              config.get('BACKTEST_MIN_TRAIN_SIZE', 120)))
+
+def _run_fold(model_key, train_df, train_features, horizon):
+    """Tek bir katı tek bir model için çalıştır (process havuzunda çalışır)."""
+    function_name, _, uses_features = MODEL_REGISTRY[model_key]
+    model_function = getattr(prediction_service, function_name)
+
+    if uses_features:
+        result = model_function(train_df, horizon, features_df=train_features, params=_fold_params(model_key))
+    else:
+        result = model_function(train_df, horizon)
+
+    if not result:
+        return None
+    return [float(p) for p in result['predictions'][:horizon]]
+
+def _summarize(errors, directions):
+    """Hata ve yön dizilerinden metrikleri hesapla."""
+    return {
+        'mae': float(np.mean(np.abs(errors))),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'directional_accuracy': float(np.mean(directions))
+    }
+
+def run_backtest(ticker, stock_data, horizon=7, n_folds=None, models=None, max_workers=None):
+    """Walk-forward backtest çalıştır ve sonucu önbelleğe yaz.
+
+    Özellikler tüm veri için bir kez hesaplanır; her kat kendi kesim noktasına
+    kadar olan dilimi kullanır (özellikler yalnızca geçmişe baktığı için bu,
+    her katta yeniden hesaplamaya eşdeğerdir). Katlar process havuzunda paralel
+    çalışır; her kat modeli tek çekirdek kullanır.
+    """
+    if stock_data is None or stock_data.empty:
+        return None
+
+    config = current_app.config
+    n_folds = n_folds or config.get('BACKTEST_FOLDS', 5)
+    models = models or [m for m in config.get('PREDICTION_MODELS', list(MODEL_REGISTRY)) if m in MODEL_REGISTRY]
+    max_workers = max_workers or config.get('BACKTEST_MAX_WORKERS')
+    min_train_size = config.get('BACKTEST_MIN_TRAIN_SIZE', 120)
+
+    cutoffs = _fold_cutoffs(len(stock_data), horizon, n_folds, min_train_size)
+    if not cutoffs:
+        logger.warning(f"{ticker} için backtest yapılacak kadar veri yok")
+        return None
+
+    logger.info(f"{ticker} için walk-forward backtest başlatılıyor - {len(cutoffs)} kat, modeller: {models}")
+    started = datetime.now()
+
+    features_df = prediction_service.create_features(stock_data)
+    close = stock_data['Close'].to_numpy(dtype=np.float64).reshape(len(stock_data), -1)[:, 0]
+
+    tasks = []
+    for cutoff in cutoffs:
+        train_df = stock_data.iloc[:cutoff]
+        train_features = features_df.iloc[:cutoff]
+        for model_key in models:
+            tasks.append((model_key, cutoff, train_df, train_features))
+
+    fold_predictions = None
+    if max_workers != 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_run_fold, model_key, train_df, train_features, horizon)
+                           for model_key, _, train_df, train_features in tasks]
+                fold_predictions = [f.result() for f in futures]
+        except Exception as e:
+            logger.warning(f"Paralel backtest başarısız, sıralı çalışılacak: {e}")
+            fold_predictions = None
+
+    if fold_predictions is None:
+        fold_predictions = [_run_fold(model_key, train_df, train_features, horizon)
+                            for model_key, _, train_df, train_features in tasks]
+
+    # Model bazında hata matrisleri (kat x ufuk)
+    per_model = {}
+    for (model_key, cutoff, _, _), predictions in zip(tasks, fold_predictions):
+        if predictions is None or len(predictions) < horizon:
+            continue
+        actual = close[cutoff:cutoff + horizon]
+        last_price = close[cutoff - 1]
+        predicted = np.asarray(predictions)
+        entry = per_model.setdefault(model_key, {'errors': [], 'directions': []})
+        entry['errors'].append(predicted - actual)
+        entry['directions'].append(np.sign(predicted - last_price) == np.sign(actual - last_price))
+
+    model_metrics = {}
+    for model_key, entry in per_model.items():
+        errors = np.vstack(entry['errors'])
+        directions = np.vstack(entry['directions'])
+        metrics = _summarize(errors, directions)
+        metrics['folds'] = len(errors)
+        metrics['by_horizon'] = [
+            dict(step=step + 1, **_summarize(errors[:, step], directions[:, step]))
+            for step in range(horizon)
+        ]
+        model_metrics[MODEL_REGISTRY[model_key][1]] = metrics
+
+    if not model_metrics:
+        logger.warning(f"{ticker} için backtest sonucu üretilemedi")
+        return None
+
+    result = {
+        'ticker': ticker,
+        'horizon': horizon,
+        'folds': len(cutoffs),
+        'models': model_metrics,
+        'duration_seconds': (datetime.now() - started).total_seconds(),
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+    _backtest_cache[(ticker, horizon)] = {
+        'data': result,
+        'timestamp': datetime.now()
+    }
+
+    summary = ', '.join(f"{name}: MAE {m['mae']:.2f}" for name, m in model_metrics.items())
+    logger.info(f"{ticker} backtest tamamlandı ({result['duration_seconds']:.1f} sn) - {summary}")
+    return result
+
+def get_backtest_result(ticker, horizon=7):
+    """Önbellekteki backtest sonucunu al."""
+    cached_entry = _backtest_cache.get((ticker, horizon))
+    if cached_entry is None:
+        return None
+
+    cache_age_seconds = (datetime.now() - cached_entry['timestamp']).total_seconds()
+    if cache_age_seconds < current_app.config.get('BACKTEST_CACHE_SECONDS', 86400):
+        return cached_entry['data']
+
+    _backtest_cache.pop((ticker, horizon), None)
+    return None
+
+def is_backtest_running(ticker, horizon=7):
+    """Bu süreçte (ticker, horizon) için backtest kuyrukta ya da çalışıyor mu?"""
+    with _backtest_lock:
+        return (ticker, horizon) in _backtest_in_progress
+
+def get_ensemble_weights(ticker, horizon=7):
+    """Backtest MAE değerlerinin tersinden normalize edilmiş ensemble ağırlıkları."""
+    result = get_backtest_result(ticker, horizon)
+    if not result:
+        return None
+
+    inverse_mae = {name: 1.0 / max(m['mae'], 1e-9) for name, m in result['models'].items()}
+    total = sum(inverse_mae.values())
+    return {name: value / total for name, value in inverse_mae.items()}
+
+def schedule_backtest(ticker, stock_data, horizon=7):
+    """Backtest'i arka planda çalıştır.
+
+    Backtest'ler tek thread'de sırayla çalışır. Aynı (ticker, horizon) zaten
+    kuyruktaysa yeniden eklenmez. Kuyruk BACKTEST_MAX_QUEUED sınırındaysa
+    False döner.
+    """
+    global _backtest_executor
+
+    key = (ticker, horizon)
+    with _backtest_lock:
+        if key in _backtest_in_progress:
+            return True
+        if len(_backtest_in_progress) >= current_app.config.get('BACKTEST_MAX_QUEUED', 8):
+            logger.warning(f"Backtest kuyruğu dolu, {ticker} eklenmedi")
+            return False
+        _backtest_in_progress.add(key)
+        if _backtest_executor is None:
+            _backtest_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='backtest')
+
+    app = current_app._get_current_object()
+
+    def task():
+        try:
+            with app.app_context():
+                run_backtest(ticker, stock_data, horizon=horizon)
+        except Exception as e:
+            logger.error(f"{ticker} arka plan backtest hatası: {e}")
+        finally:
+            with _backtest_lock:
+                _backtest_in_progress.discard(key)
+
+    _backtest_executor.submit(task)
+    return True
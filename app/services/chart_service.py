@@ -3,11 +3,118 @@ import plotly.io as pio
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
+import base64
+import gzip
+import hashlib
+import json
+import threading
 from datetime import datetime
+from flask import current_app
+from jinja2.utils import htmlsafe_json_dumps
 import logging
 
+from app.utils.cache import ByteBudgetCache
+from app.utils.downsample import lttb_indices, minmax_indices, bucket_ranges
+from app.services.stock_service import get_data_version
+from app.services.comparison_service import build_comparison
+
 logger = logging.getLogger(__name__)
 
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Grafik şablonları (chart_type başına bir kez oluşturulur)
+_chart_templates = {}
+_chart_templates_lock = threading.Lock()
+
+# Oluşturulmuş grafik çıktıları (HTML ya da JSON), bayt bütçeli
+_chart_cache = None
+
+CHART_PAYLOAD_VERSION = 2  # 2: zaman dizileri float64 duvar saati saniyesi
+
+def _max_chart_points(max_points=None):
+    """Grafik başına gönderilecek en fazla nokta sayısı."""
+    limit = current_app.config.get('CHART_MAX_POINTS', 2000)
+    return min(max_points, limit) if max_points else limit
+
+def _wall_clock_index(index):
+    """Tarih indeksinden saat dilimini at (yerel borsa saati korunur)."""
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize(None) if index.tz is not None else index
+
+def epoch_seconds(index):
+    """Tarihleri duvar saati epoch saniyesine çevir (float64).
+    
+    _epoch_ms ve karşılaştırma servisi gibi saat dilimi atılır; böylece BIST
+    barı UTC'ye kayıp önceki günün 21:00'ine düşmez. 1970 öncesi tarihler
+    negatif olur.
+    """
+    return ((_wall_clock_index(index) - pd.Timestamp('1970-01-01')) / pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64)
+
+def _select_indicators(indicators, index, positions=None):
+    """Göstergeleri fiyat tarihlerine hizala; positions verilirse yalnızca o satırlar."""
+    selected = {}
+    for name, series in (indicators or {}).items():
+        if isinstance(series, pd.Series):
+            series = series.reindex(index)
+            selected[name] = series.iloc[positions] if positions is not None else series
+        else:
+            selected[name] = series
+    return selected
+
+def downsample_chart_data(stock_data, indicators, chart_type='line', max_points=None):
+    """Uzun serileri grafik genişliğine göre seyrelt.
+    
+    Çizgi grafikte kapanış fiyatına göre seçilen satırlar (LTTB ya da min-max)
+    tüm serilere uygulanır. Mum grafikte satırlar kovalara toplanır (açılış
+    ilk, yüksek maks., düşük min., kapanış son, hacim toplam); göstergeler kova
+    sonundaki değeri alır. (veri, göstergeler, seyreltildi mi) döner.
+    """
+    max_points = _max_chart_points(max_points)
+    n = len(stock_data)
+    if n <= max_points:
+        return stock_data, indicators, False
+    
+    resolved = _resolve_columns(stock_data)
+    close = stock_data[resolved.get('Close', 'Close')]
+    
+    if chart_type == 'candlestick':
+        starts, ends = bucket_ranges(n, max_points)
+        last = ends - 1
+        columns = {}
+        for name in ('Open', 'High', 'Low', 'Close', 'Volume'):
+            if name not in resolved:
+                continue
+            values = pd.to_numeric(stock_data[resolved[name]], errors='coerce').to_numpy(dtype=np.float64)
+            if name == 'Open':
+                columns[name] = values[starts]
+            elif name == 'High':
+                columns[name] = np.fmax.reduceat(values, starts)
+            elif name == 'Low':
+                columns[name] = np.fmin.reduceat(values, starts)
+            elif name == 'Close':
+                columns[name] = values[last]
+            else:
+                columns[name] = np.add.reduceat(np.nan_to_num(values), starts)
+        reduced = pd.DataFrame(columns, index=stock_data.index[last])
+        return reduced, _select_indicators(indicators, stock_data.index, last), True
+    
+    if current_app.config.get('CHART_DOWNSAMPLE_METHOD', 'lttb') == 'minmax':
+        positions = minmax_indices(close.to_numpy(dtype=np.float64), max_points)
+    else:
+        positions = lttb_indices(close.to_numpy(dtype=np.float64), max_points)
+    
+    return stock_data.iloc[positions], _select_indicators(indicators, stock_data.index, positions), True
+
 def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type='line', ticker=''):
     """Ana hisse senedi grafiği oluştur."""
     try:
@@ -15,12 +122,13 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
             logger.warning("Grafik için veri bulunamadı")
             return None
         
-        # Multi-index sütun kontrolü
-        close_col = 'Close'
-        if isinstance(stock_data.columns, pd.MultiIndex):
-            close_cols = [col for col in stock_data.columns if col[0] == 'Close']
-            if close_cols:
-                close_col = close_cols[0]
+        # Uzun geçmişte nokta sayısını sınırla
+        stock_data, indicators, _ = downsample_chart_data(stock_data, indicators, chart_type)
+        
+        # Sütunları tek geçişte çöz (tek ya da çok seviyeli); izler ndarray olarak verilir
+        columns = _resolve_columns(stock_data)
+        x = stock_data.index.to_numpy()
+        close_col = columns.get('Close', 'Close')
         
         # Subplots oluştur
         fig = make_subplots(
@@ -37,30 +145,14 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
         )
         
         # Ana fiyat grafiği (Row 1)
-        if chart_type == 'candlestick' and all(col in stock_data.columns or (isinstance(stock_data.columns, pd.MultiIndex) and any(c[0] == col for c in stock_data.columns)) for col in ['Open', 'High', 'Low', 'Close']):
-            # Candlestick için sütun adlarını düzelt
-            open_col = 'Open'
-            high_col = 'High'
-            low_col = 'Low'
-            
-            if isinstance(stock_data.columns, pd.MultiIndex):
-                for col_name in ['Open', 'High', 'Low']:
-                    matching_cols = [col for col in stock_data.columns if col[0] == col_name]
-                    if matching_cols:
-                        if col_name == 'Open':
-                            open_col = matching_cols[0]
-                        elif col_name == 'High':
-                            high_col = matching_cols[0]
-                        elif col_name == 'Low':
-                            low_col = matching_cols[0]
-            
+        if chart_type == 'candlestick' and all(col in columns for col in ['Open', 'High', 'Low', 'Close']):
             fig.add_trace(
                 go.Candlestick(
-                    x=stock_data.index,
-                    open=stock_data[open_col],
-                    high=stock_data[high_col],
-                    low=stock_data[low_col],
-                    close=stock_data[close_col],
+                    x=x,
+                    open=stock_data[columns['Open']].to_numpy(),
+                    high=stock_data[columns['High']].to_numpy(),
+                    low=stock_data[columns['Low']].to_numpy(),
+                    close=stock_data[close_col].to_numpy(),
                     name='Mum Grafiği',
                     increasing_line_color='#26a69a',
                     decreasing_line_color='#ef5350'
@@ -71,8 +163,8 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
             # Line chart
             fig.add_trace(
                 go.Scatter(
-                    x=stock_data.index,
-                    y=stock_data[close_col],
+                    x=x,
+                    y=stock_data[close_col].to_numpy(),
                     mode='lines',
                     name='Kapanış Fiyatı',
                     line=dict(color='#1f77b4', width=2)
@@ -86,8 +178,8 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
             if sma_20 is not None and not sma_20.empty:
                 fig.add_trace(
                     go.Scatter(
-                        x=sma_20.index,
-                        y=sma_20,
+                        x=sma_20.index.to_numpy(),
+                        y=sma_20.to_numpy(),
                         mode='lines',
                         name='SMA 20',
                         line=dict(color='#ff7f0e', width=1.5, dash='dot')
@@ -100,8 +192,8 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
             if sma_50 is not None and not sma_50.empty:
                 fig.add_trace(
                     go.Scatter(
-                        x=sma_50.index,
-                        y=sma_50,
+                        x=sma_50.index.to_numpy(),
+                        y=sma_50.to_numpy(),
                         mode='lines',
                         name='SMA 50',
                         line=dict(color='#2ca02c', width=1.5, dash='dash')
@@ -115,11 +207,14 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
             bb_low = indicators['BB_Low']
             
             if bb_high is not None and bb_low is not None and not bb_high.empty and not bb_low.empty:
-                # Bollinger band alanı
+                bb_x_high, bb_y_high = bb_high.index.to_numpy(), bb_high.to_numpy()
+                bb_x_low, bb_y_low = bb_low.index.to_numpy(), bb_low.to_numpy()
+                
+                # Bollinger band alanı (üst bant ileri, alt bant geri)
                 fig.add_trace(
                     go.Scatter(
-                        x=bb_high.index.tolist() + bb_low.index.tolist()[::-1],
-                        y=bb_high.tolist() + bb_low.tolist()[::-1],
+                        x=np.concatenate([bb_x_high, bb_x_low[::-1]]),
+                        y=np.concatenate([bb_y_high, bb_y_low[::-1]]),
                         fill='toself',
                         fillcolor='rgba(52, 152, 219, 0.1)',
                         line=dict(color='rgba(255,255,255,0)'),
@@ -133,8 +228,8 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
                 # BB çizgileri
                 fig.add_trace(
                     go.Scatter(
-                        x=bb_high.index,
-                        y=bb_high,
+                        x=bb_x_high,
+                        y=bb_y_high,
                         mode='lines',
                         name='BB Üst',
                         line=dict(color='rgba(52, 152, 219, 0.7)', width=1, dash='dash')
@@ -144,8 +239,8 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
                 
                 fig.add_trace(
                     go.Scatter(
-                        x=bb_low.index,
-                        y=bb_low,
+                        x=bb_x_low,
+                        y=bb_y_low,
                         mode='lines',
                         name='BB Alt',
                         line=dict(color='rgba(52, 152, 219, 0.7)', width=1, dash='dash')
@@ -157,10 +252,11 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
         if prediction_data is not None and 'predictions' in prediction_data:
             predictions = prediction_data['predictions']
             if not predictions.empty:
+                dates = predictions['date'] if 'date' in predictions.columns else predictions.index
                 fig.add_trace(
                     go.Scatter(
-                        x=predictions.index,
-                        y=predictions['predicted_price'],
+                        x=dates.to_numpy(),
+                        y=predictions['predicted_price'].to_numpy(),
                         mode='lines',
                         name=f'Tahmin (Güven: %{prediction_data.get("confidence", 0)*100:.0f})',
                         line=dict(color='#e74c3c', width=2, dash='dashdot')
@@ -174,8 +270,8 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
             if rsi is not None and not rsi.empty:
                 fig.add_trace(
                     go.Scatter(
-                        x=rsi.index,
-                        y=rsi,
+                        x=rsi.index.to_numpy(),
+                        y=rsi.to_numpy(),
                         mode='lines',
                         name='RSI',
                         line=dict(color='#9467bd', width=1.5)
@@ -199,8 +295,8 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
                 # MACD çizgileri
                 fig.add_trace(
                     go.Scatter(
-                        x=macd.index,
-                        y=macd,
+                        x=macd.index.to_numpy(),
+                        y=macd.to_numpy(),
                         mode='lines',
                         name='MACD',
                         line=dict(color='#1f77b4', width=1.5)
@@ -210,8 +306,8 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
                 
                 fig.add_trace(
                     go.Scatter(
-                        x=macd_signal.index,
-                        y=macd_signal,
+                        x=macd_signal.index.to_numpy(),
+                        y=macd_signal.to_numpy(),
                         mode='lines',
                         name='MACD Signal',
                         line=dict(color='#ff7f0e', width=1.5)
@@ -220,32 +316,31 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
                 )
                 
                 # MACD histogram
-                colors = ['#26a69a' if val >= 0 else '#ef5350' for val in macd_hist]
+                # Renkler iki renkli ölçekte 0/1 dizisi: renk adı metinlerinden çok daha kısa
+                hist_values = macd_hist.to_numpy(dtype=np.float64)
                 fig.add_trace(
                     go.Bar(
-                        x=macd_hist.index,
-                        y=macd_hist,
+                        x=macd_hist.index.to_numpy(),
+                        y=hist_values,
                         name='MACD Histogram',
-                        marker_color=colors,
+                        marker=dict(
+                            color=(hist_values >= 0).astype(np.uint8),
+                            colorscale=[[0, '#ef5350'], [1, '#26a69a']],
+                            cmin=0, cmax=1
+                        ),
                         opacity=0.7
                     ),
                     row=3, col=1
                 )
         
         # Hacim grafiği (Row 4)
-        volume_col = 'Volume'
-        if isinstance(stock_data.columns, pd.MultiIndex):
-            volume_cols = [col for col in stock_data.columns if col[0] == 'Volume']
-            if volume_cols:
-                volume_col = volume_cols[0]
-        
-        if volume_col in stock_data.columns:
-            volume_data = stock_data[volume_col]
+        if 'Volume' in columns:
+            volume_data = stock_data[columns['Volume']]
             if not volume_data.empty:
                 fig.add_trace(
                     go.Bar(
-                        x=volume_data.index,
-                        y=volume_data,
+                        x=x,
+                        y=volume_data.to_numpy(),
                         name='Hacim',
                         marker_color='rgba(158, 158, 158, 0.6)',
                         yaxis='y4'
@@ -294,45 +389,394 @@ def create_stock_chart(stock_data, indicators, prediction_data=None, chart_type=
                 row=i, col=1
             )
         
-        return pio.to_html(fig, full_html=False, include_plotlyjs='cdn')
+        return figure_to_html(fig)
         
     except Exception as e:
         logger.error(f"Grafik oluşturma hatası: {e}")
         return None
 
-def create_comparison_chart(stocks_data, period='1y'):
-    """Birden fazla hisse senedini karşılaştır."""
+def _resolve_columns(stock_data):
+    """Sütun adı -> sütun anahtarı eşlemesi (çok seviyelide ilk eşleşen, tek geçiş)."""
+    columns = {}
+    for col in stock_data.columns:
+        columns.setdefault(col[0] if isinstance(col, tuple) else col, col)
+    return columns
+
+def _column(stock_data, name):
+    """Tek ya da çok seviyeli sütunlardan ilgili sütunu bul (yoksa None)."""
+    key = _resolve_columns(stock_data).get(name)
+    return stock_data[key] if key is not None else None
+
+def encode_float32(values):
+    """Değerleri base64 kodlu little-endian float32 diziye çevir (eksikler NaN)."""
+    array = np.asarray(pd.to_numeric(pd.Series(values), errors='coerce'), dtype='<f4')
+    return base64.b64encode(array.tobytes()).decode('ascii')
+
+def encode_epoch(index):
+    """Tarihleri base64 kodlu little-endian float64 duvar saati epoch saniyesine çevir."""
+    return base64.b64encode(np.asarray(epoch_seconds(index), dtype='<f8').tobytes()).decode('ascii')
+
+def typed_array(values, dtype='f4'):
+    """Plotly'nin ikili dizi gösterimi: {'dtype', 'bdata'} (base64, little-endian)."""
+    array = np.ascontiguousarray(values, dtype=f'<{dtype}')
+    return {'dtype': dtype, 'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+def _epoch_ms(values):
+    """Tarihleri duvar saati epoch milisaniyesine çevir (eksikler NaN).
+    
+    Plotly tarih ekseni sayıları epoch milisaniyesi olarak yorumlar ve saat
+    dilimini yok sayar; metin tarihlerle aynı konuma düşmesi için duvar saati
+    kullanılır.
+    """
+    index = pd.DatetimeIndex(values)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return ((index - pd.Timestamp('1970-01-01')) / pd.Timedelta(milliseconds=1)).to_numpy(dtype=np.float64)
+
+def _value_dtype(values):
+    """float32 yeterliyse 'f4'; 2^24'ü aşan tam sayılar (hacim) için 'f8'."""
+    finite = values[np.isfinite(values)]
+    if finite.size and np.abs(finite).max() >= 2 ** 24 and np.array_equal(finite, np.round(finite)):
+        return 'f8'
+    return 'f4'
+
+def compact_figure(fig):
+    """Figür izlerini ikili dizilere çevir (tarihler f8 epoch ms, değerler f4).
+    
+    Tarih dizileri metin yerine sayı olarak gider; bu izlerin x eksenleri
+    açıkça 'date' tipine alınır, böylece grafik metin tarihlerle aynı çizilir.
+    """
+    date_axes = set()
+    for trace in fig.data:
+        x = trace.x if 'x' in trace else None
+        if isinstance(x, np.ndarray) and len(x) and (
+                x.dtype.kind == 'M' or (x.dtype == object and isinstance(x[0], (pd.Timestamp, datetime)))):
+            trace.x = typed_array(_epoch_ms(x), 'f8')
+            date_axes.add(trace.xaxis or 'x')
+        
+        for attr in ('y', 'open', 'high', 'low', 'close'):
+            values = trace[attr] if attr in trace else None
+            if isinstance(values, np.ndarray) and values.dtype.kind in 'fiu':
+                values = values.astype(np.float64, copy=False)
+                trace[attr] = typed_array(values, _value_dtype(values))
+    
+    for axis in date_axes:
+        fig.layout['xaxis' + axis[1:]].type = 'date'
+    return fig
+
+def figure_to_html(fig):
+    """Figürü HTML parçasına çevir (ayar açıksa ikili dizilerle).
+    
+    Plotly, orjson kuruluysa JSON kodlamasında onu kullanır; izler oluşturulurken
+    doğrulandığı için ikinci doğrulama atlanır.
+    """
+    if current_app.config.get('CHART_COMPACT_ENCODING', True):
+        compact_figure(fig)
+    return pio.to_html(fig, full_html=False, include_plotlyjs='cdn', validate=False)
+
+def html_safe_json(payload):
+    """HTML içine gömülebilir JSON metni (orjson varsa onunla)."""
+    if not ORJSON_AVAILABLE:
+        return str(htmlsafe_json_dumps(payload))
+    
+    text = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    return (text.replace('<', '\\u003c').replace('>', '\\u003e')
+            .replace('&', '\\u0026').replace("'", '\\u0027'))
+
+def _trace_spec(trace_type, name, data, row, **style):
+    """Şablon izi: data, izin hangi alanının hangi diziden doldurulacağını belirtir."""
+    suffix = '' if row == 1 else str(row)
+    spec = {'type': trace_type, 'name': name, 'xaxis': f'x{suffix}', 'yaxis': f'y{suffix}'}
+    spec.update(style)
+    return {'trace': spec, 'data': data}
+
+def get_stock_chart_template(chart_type='line'):
+    """Ana grafiğin veri içermeyen şablonu (yerleşim + iz stilleri).
+    
+    Şablon hisseden bağımsızdır; istemci bir kez alıp önbelleğe alır ve
+    create_stock_chart_payload dizileriyle doldurur.
+    """
+    chart_type = 'candlestick' if chart_type == 'candlestick' else 'line'
+    
+    with _chart_templates_lock:
+        template = _chart_templates.get(chart_type)
+        if template is not None:
+            return template
+    
+    fig = make_subplots(
+        rows=4, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        row_heights=[0.5, 0.15, 0.15, 0.2],
+        subplot_titles=('Fiyat Grafiği', 'RSI (14)', 'MACD', 'Hacim')
+    )
+    
+    # RSI seviye çizgileri ve bölgeleri
+    fig.add_hline(y=70, line_dash="dash", line_color="red", line_width=1, row=2, col=1)
+    fig.add_hline(y=30, line_dash="dash", line_color="green", line_width=1, row=2, col=1)
+    fig.add_hrect(y0=70, y1=100, line_width=0, fillcolor='rgba(255,0,0,0.1)', row=2, col=1)
+    fig.add_hrect(y0=0, y1=30, line_width=0, fillcolor='rgba(0,255,0,0.1)', row=2, col=1)
+    
+    fig.update_layout(
+        title=dict(text='', x=0.5, font=dict(size=20, color='#2c3e50')),
+        height=900,
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5,
+            bgcolor="rgba(255,255,255,0.8)",
+            bordercolor="#E5E5E5",
+            borderwidth=1
+        ),
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family="Arial, sans-serif", size=11, color="#333333"),
+        margin=dict(l=50, r=50, t=100, b=50),
+        xaxis_rangeslider_visible=False,
+        hovermode='x unified'
+    )
+    for i in range(1, 5):
+        fig.update_xaxes(showgrid=True, gridcolor='#E5E5E5', tickformat='%Y-%m-%d', type='date', row=i, col=1)
+        fig.update_yaxes(showgrid=True, gridcolor='#E5E5E5', row=i, col=1)
+    
+    if chart_type == 'candlestick':
+        price = _trace_spec('candlestick', 'Mum Grafiği',
+                            {'x': 'time', 'open': 'open', 'high': 'high', 'low': 'low', 'close': 'close'}, 1,
+                            increasing=dict(line=dict(color='#26a69a')),
+                            decreasing=dict(line=dict(color='#ef5350')))
+    else:
+        price = _trace_spec('scatter', 'Kapanış Fiyatı', {'x': 'time', 'y': 'close'}, 1,
+                            mode='lines', line=dict(color='#1f77b4', width=2))
+    
+    traces = [
+        price,
+        _trace_spec('scatter', 'SMA 20', {'x': 'time', 'y': 'sma_20'}, 1,
+                    mode='lines', line=dict(color='#ff7f0e', width=1.5, dash='dot')),
+        _trace_spec('scatter', 'SMA 50', {'x': 'time', 'y': 'sma_50'}, 1,
+                    mode='lines', line=dict(color='#2ca02c', width=1.5, dash='dash')),
+        # Bollinger alanı: üst bant alt banda kadar doldurulur
+        _trace_spec('scatter', 'BB Alt', {'x': 'time', 'y': 'bb_low'}, 1,
+                    mode='lines', line=dict(color='rgba(52, 152, 219, 0.7)', width=1, dash='dash')),
+        _trace_spec('scatter', 'BB Üst', {'x': 'time', 'y': 'bb_high'}, 1,
+                    mode='lines', fill='tonexty', fillcolor='rgba(52, 152, 219, 0.1)',
+                    line=dict(color='rgba(52, 152, 219, 0.7)', width=1, dash='dash')),
+        _trace_spec('scatter', 'Tahmin', {'x': 'prediction_time', 'y': 'prediction'}, 1,
+                    mode='lines', line=dict(color='#e74c3c', width=2, dash='dashdot')),
+        _trace_spec('scatter', 'RSI', {'x': 'time', 'y': 'rsi'}, 2,
+                    mode='lines', line=dict(color='#9467bd', width=1.5)),
+        _trace_spec('scatter', 'MACD', {'x': 'time', 'y': 'macd'}, 3,
+                    mode='lines', line=dict(color='#1f77b4', width=1.5)),
+        _trace_spec('scatter', 'MACD Signal', {'x': 'time', 'y': 'macd_signal'}, 3,
+                    mode='lines', line=dict(color='#ff7f0e', width=1.5)),
+        # Çubuk rengi işarete göre istemcide seçilir
+        _trace_spec('bar', 'MACD Histogram', {'x': 'time', 'y': 'macd_hist'}, 3,
+                    opacity=0.7, sign_colors=['#26a69a', '#ef5350']),
+        _trace_spec('bar', 'Hacim', {'x': 'time', 'y': 'volume'}, 4,
+                    marker=dict(color='rgba(158, 158, 158, 0.6)'))
+    ]
+    
+    template = {
+        'version': CHART_PAYLOAD_VERSION,
+        'chart_type': chart_type,
+        'layout': json.loads(pio.to_json(fig.layout)),
+        'traces': traces
+    }
+    
+    with _chart_templates_lock:
+        _chart_templates[chart_type] = template
+    return template
+
+def create_stock_chart_payload(stock_data, indicators, prediction_data=None, chart_type='line', ticker='',
+                               x_range=None, max_points=None):
+    """Ana grafik için sıkıştırılmış veri (create_stock_chart'ın JSON karşılığı).
+    
+    Tarihler uint32 epoch saniyesi, değerler float32 olarak base64 kodlanır;
+    yerleşim ve iz stilleri get_stock_chart_template şablonundan gelir.
+    x_range (başlangıç, bitiş epoch saniyesi) yakınlaştırılan aralığı seçer;
+    seri max_points (en fazla CHART_MAX_POINTS) noktaya seyreltilir.
+    """
+    try:
+        if stock_data is None or stock_data.empty:
+            logger.warning("Grafik için veri bulunamadı")
+            return None
+        
+        chart_type = 'candlestick' if chart_type == 'candlestick' else 'line'
+        full_length = len(stock_data)
+        
+        if x_range is not None:
+            # Göstergeler tüm geçmişle hesaplandığı için aralık sonradan kesilir
+            start, end = (pd.Timestamp(value, unit='s') for value in x_range)
+            dates = _wall_clock_index(stock_data.index)
+            mask = (dates >= start) & (dates <= end)
+            indicators = _select_indicators(indicators, stock_data.index, np.flatnonzero(mask))
+            stock_data = stock_data[mask]
+            if stock_data.empty:
+                return None
+        
+        range_length = len(stock_data)
+        stock_data, indicators, downsampled = downsample_chart_data(stock_data, indicators, chart_type, max_points)
+        index = stock_data.index
+        series = {}
+        
+        resolved = _resolve_columns(stock_data)
+        columns = {'close': 'Close', 'volume': 'Volume'}
+        if chart_type == 'candlestick':
+            columns.update({'open': 'Open', 'high': 'High', 'low': 'Low'})
+        for key, column_name in columns.items():
+            if column_name in resolved:
+                series[key] = encode_float32(stock_data[resolved[column_name]].to_numpy())
+        
+        indicator_keys = {
+            'sma_20': 'SMA_20', 'sma_50': 'SMA_50', 'bb_high': 'BB_High', 'bb_low': 'BB_Low',
+            'rsi': 'RSI', 'macd': 'MACD', 'macd_signal': 'MACD_Signal', 'macd_hist': 'MACD_Hist'
+        }
+        for key, indicator_name in indicator_keys.items():
+            indicator = (indicators or {}).get(indicator_name)
+            if indicator is not None and not indicator.empty:
+                # Göstergeler fiyatla aynı tarih dizisini paylaşır
+                series[key] = encode_float32(indicator.reindex(index).to_numpy())
+        
+        labels = {
+            'title': f'{ticker} Detaylı Teknik Analiz',
+            'subplot_title': f'{ticker} Fiyat Grafiği ({chart_type.capitalize()})',
+            'traces': {}  # Şablondaki iz adının yerine geçecek adlar
+        }
+        
+        payload = {
+            'version': CHART_PAYLOAD_VERSION,
+            'ticker': ticker,
+            'chart_type': chart_type,
+            'length': len(index),
+            'source_length': range_length,
+            'full_length': full_length,
+            'downsampled': downsampled,
+            'labels': labels,
+            'arrays': {'time': encode_epoch(index), **series}
+        }
+        
+        if prediction_data is not None and 'predictions' in prediction_data:
+            predictions = prediction_data['predictions']
+            if not predictions.empty:
+                dates = predictions['date'] if 'date' in predictions.columns else predictions.index
+                payload['arrays']['prediction_time'] = encode_epoch(dates)
+                payload['arrays']['prediction'] = encode_float32(predictions['predicted_price'].to_numpy())
+                labels['traces']['Tahmin'] = f'Tahmin (Güven: %{prediction_data.get("confidence", 0)*100:.0f})'
+        
+        return payload
+        
+    except Exception as e:
+        logger.error(f"Grafik verisi oluşturma hatası: {e}")
+        return None
+
+def _get_chart_cache():
+    """Grafik çıktısı önbelleği (lazy)."""
+    global _chart_cache
+    
+    with _chart_templates_lock:
+        if _chart_cache is None:
+            _chart_cache = ByteBudgetCache(current_app.config.get('CHART_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        return _chart_cache
+
+def get_forecast_version(prediction_data):
+    """Tahmin çıktısının sürüm anahtarı (tahmin yoksa 'none')."""
+    if not prediction_data or 'predictions' not in prediction_data:
+        return 'none'
+    
+    predictions = prediction_data['predictions']
+    digest = hashlib.sha1(np.asarray(predictions['predicted_price'], dtype=np.float64).tobytes())
+    digest.update(f"{prediction_data.get('model_name')}-{prediction_data.get('confidence')}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _build_cache_entry(body):
+    """Grafik çıktısını ve isteğe bağlı ön sıkıştırılmış kopyalarını hazırla."""
+    raw = body.encode('utf-8')
+    entry = {'body': raw, 'etag': hashlib.sha1(raw).hexdigest()}
+    
+    if current_app.config.get('CHART_CACHE_PRECOMPRESS', True):
+        entry['gzip'] = gzip.compress(raw, compresslevel=6)
+        if BROTLI_AVAILABLE:
+            entry['br'] = brotli.compress(raw, quality=5)
+    
+    return entry
+
+def render_stock_chart(stock_data, indicators, prediction_data=None, chart_type='line', ticker='', period='',
+                       mode='json', x_range=None, max_points=None):
+    """Ana grafiği önbellekten ver ya da oluşturup önbelleğe yaz.
+    
+    Anahtar: hisse, dönem, grafik tipi, veri sürümü ve tahmin sürümü (ve
+    varsa aralık / nokta sınırı). Kayıt {'body', 'etag', 'gzip', 'br'}
+    sözlüğüdür; body JSON modunda HTML içine gömülebilir JSON metnidir.
+    indicators, yalnızca önbellek ıskasında hesaplanması için çağrılabilir
+    olarak da verilebilir.
+    """
+    key = (
+        'stock', mode, ticker, period, chart_type,
+        get_data_version(stock_data), get_forecast_version(prediction_data),
+        tuple(x_range) if x_range else None, max_points
+    )
+    cache = _get_chart_cache()
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+    
+    if callable(indicators):
+        indicators = indicators()
+    
+    if mode == 'json':
+        payload = create_stock_chart_payload(stock_data, indicators, prediction_data, chart_type, ticker,
+                                             x_range=x_range, max_points=max_points)
+        body = html_safe_json(payload) if payload is not None else None
+    else:
+        body = create_stock_chart(stock_data, indicators, prediction_data, chart_type, ticker)
+    
+    if body is None:
+        return None
+    
+    entry = _build_cache_entry(body)
+    cache.set(key, entry, sum(len(value) for name, value in entry.items() if name != 'etag'))
+    return entry
+
+def create_comparison_chart(stocks_data, period='1y', comparison=None):
+    """Birden fazla hisse senedini karşılaştır.
+    
+    comparison, comparison_service.build_comparison çıktısıdır; verilmezse
+    burada hesaplanır.
+    """
     try:
-        if not stocks_data:
+        if comparison is None:
+            if not stocks_data:
+                return None
+            comparison = build_comparison(stocks_data)
+        if comparison is None:
             return None
         
         fig = go.Figure()
+        max_points = _max_chart_points()
+        dates = comparison['dates'].to_numpy()
         
-        colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
+        colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b',
+                  '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
         
-        for i, (ticker, data) in enumerate(stocks_data.items()):
-            if data is not None and not data.empty:
-                # Close sütununu bul
-                close_col = 'Close'
-                if isinstance(data.columns, pd.MultiIndex):
-                    close_cols = [col for col in data.columns if col[0] == 'Close']
-                    if close_cols:
-                        close_col = close_cols[0]
-                
-                # Normalize et (başlangıç değerine göre)
-                close_series = data[close_col].dropna()
-                if not close_series.empty:
-                    normalized = (close_series / close_series.iloc[0] - 1) * 100
-                    
-                    fig.add_trace(
-                        go.Scatter(
-                            x=normalized.index,
-                            y=normalized,
-                            mode='lines',
-                            name=ticker,
-                            line=dict(color=colors[i % len(colors)], width=2)
-                        )
-                    )
+        for i, ticker in enumerate(comparison['tickers']):
+            # Normalize eğri (başlangıç değerine göre), yalnızca işlem görülen günler
+            values = comparison['normalized'][:, i]
+            valid = np.flatnonzero(~np.isnan(values))
+            
+            # Uzun geçmişte nokta sayısını sınırla
+            valid = valid[lttb_indices(values[valid], max_points)]
+            
+            fig.add_trace(
+                go.Scatter(
+                    x=dates[valid],
+                    y=values[valid],
+                    mode='lines',
+                    name=ticker,
+                    line=dict(color=colors[i % len(colors)], width=2)
+                )
+            )
         
         fig.update_layout(
             title='Hisse Senedi Karşılaştırması (Normalize Edilmiş %)',
@@ -345,7 +789,7 @@ def create_comparison_chart(stocks_data, period='1y'):
             hovermode='x unified'
         )
         
-        return pio.to_html(fig, full_html=False, include_plotlyjs='cdn')
+        return figure_to_html(fig)
         
     except Exception as e:
         logger.error(f"Karşılaştırma grafiği hatası: {e}")
@@ -394,19 +838,28 @@ def create_portfolio_chart(portfolio_data):
         return None
 
 def create_sentiment_chart(sentiment_data, days=30):
-    """Duyarlılık trendi grafiği."""
+    """Duyarlılık trendi grafiği.
+    
+    sentiment_data, sentiment_aggregator.get_daily_sentiment çıktısı (günlük
+    seri: date, sentiment_score, decayed_score) ya da published_at alanlı
+    haber listesi olabilir.
+    """
     try:
         if not sentiment_data:
             return None
         
-        # Günlük duyarlılık verilerini grupla
         df = pd.DataFrame(sentiment_data)
         if df.empty:
             return None
         
-        df['date'] = pd.to_datetime(df['published_at']).dt.date
-        daily_sentiment = df.groupby('date')['sentiment_score'].mean().reset_index()
-        daily_sentiment = daily_sentiment.tail(days)
+        if 'date' in df.columns:
+            # Hazır günlük seri
+            daily_sentiment = df.sort_values('date').tail(days)
+        else:
+            # Haber listesinden günlük ortalama
+            df['date'] = pd.to_datetime(df['published_at']).dt.date
+            daily_sentiment = df.groupby('date')['sentiment_score'].mean().reset_index()
+            daily_sentiment = daily_sentiment.tail(days)
         
         fig = go.Figure()
         
@@ -422,6 +875,18 @@ def create_sentiment_chart(sentiment_data, days=30):
             )
         )
         
+        # Zamanla sönümlenen (ağırlıklı) duyarlılık
+        if 'decayed_score' in daily_sentiment.columns:
+            fig.add_trace(
+                go.Scatter(
+                    x=daily_sentiment['date'],
+                    y=daily_sentiment['decayed_score'],
+                    mode='lines',
+                    name='Sönümlü Duyarlılık',
+                    line=dict(color='#ff7f0e', width=2, dash='dash')
+                )
+            )
+        
         # Pozitif/negatif bölgeler
         fig.add_hline(y=0, line_dash="dash", line_color="gray", line_width=1)
         fig.add_hline(y=0.1, line_dash="dot", line_color="green", line_width=1)
@@ -449,17 +914,17 @@ def create_performance_chart(performance_data):
         if not performance_data:
             return None
         
-        periods = list(performance_data.keys())
-        values = list(performance_data.values())
+        periods = np.array(list(performance_data.keys()), dtype=object)
+        values = np.fromiter(performance_data.values(), dtype=np.float64, count=len(performance_data))
         
-        colors = ['green' if v >= 0 else 'red' for v in values]
+        colors = np.where(values >= 0, 'green', 'red')
         
         fig = go.Figure(data=[
             go.Bar(
                 x=periods,
                 y=values,
                 marker_color=colors,
-                text=[f'{v:+.1f}%' for v in values],
+                texttemplate='%{y:+.1f}%',
                 textposition='outside'
             )
         ])
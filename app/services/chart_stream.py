@@ -0,0 +1,230 @@
+"""
+Açık grafikler için artımlı bar ve gösterge güncellemeleri.
+
+Ana grafiğin göstergeleri (SMA 20/50, Bollinger, RSI, MACD) bar bar
+güncellenen bir durumda tutulur; yeni bar geldiğinde yalnızca o bar işlenir,
+geçmiş yeniden hesaplanmaz. Süreçte hisse/dönem başına bir ChartStream
+tutulur ve o grafiği yoklayan tüm istemciler tarafından paylaşılır. İstemci
+son barının zamanıyla yoklar; fark o bardan (gün içinde değişmiş olabilir)
+itibaren barları ve göstergeleri taşır, istemci Plotly.extendTraces ile ekler.
+"""
+
+import copy
+import math
+import bisect
+import logging
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from flask import current_app
+
+from app.services.chart_service import _resolve_columns, epoch_seconds
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_streams = None
+_streams_lock = threading.Lock()
+
+# Gösterge pencereleri (stock_service.calculate_technical_indicators ile aynı)
+SMA_WINDOWS = (20, 50)
+BB_WINDOW = 20
+BB_DEV = 2
+RSI_WINDOW = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+
+BAR_FIELDS = (('open', 'Open'), ('high', 'High'), ('low', 'Low'), ('close', 'Close'), ('volume', 'Volume'))
+INDICATOR_FIELDS = ('sma_20', 'sma_50', 'bb_high', 'bb_low', 'rsi', 'macd', 'macd_signal', 'macd_hist')
+
+class IncrementalIndicators:
+    """Ana grafik göstergelerinin artımlı durumu (bar başına sabit iş).
+
+    Sonuçlar ta kütüphanesinin tam seri hesabıyla aynıdır: EMA'lar
+    adjust=False özyinelemesi, RSI Wilder ortalaması, Bollinger popülasyon
+    standart sapmasıdır; yeterli bar yokken değer NaN'dır.
+    """
+
+    def __init__(self):
+        self.window = deque(maxlen=max(SMA_WINDOWS + (BB_WINDOW,)))
+        self.count = 0
+        self.prev_close = None
+        self.avg_up = 0.0
+        self.avg_down = 0.0
+        self.ema_fast = None
+        self.ema_slow = None
+        self.signal = None
+        self.signal_count = 0
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    @staticmethod
+    def _ema(previous, value, span):
+        alpha = 2.0 / (span + 1)
+        return value if previous is None else previous + alpha * (value - previous)
+
+    def update(self, close):
+        """Yeni kapanışı işle ve bu barın gösterge değerlerini döndür."""
+        values = dict.fromkeys(INDICATOR_FIELDS, math.nan)
+        if close is None or not math.isfinite(close):
+            return values
+
+        self.window.append(close)
+        self.count += 1
+        recent = np.fromiter(self.window, dtype=np.float64)
+
+        for window in SMA_WINDOWS:
+            if self.count >= window:
+                values[f'sma_{window}'] = recent[-window:].mean()
+
+        if self.count >= BB_WINDOW:
+            band = recent[-BB_WINDOW:]
+            mean, std = band.mean(), band.std()
+            values['bb_high'] = mean + BB_DEV * std
+            values['bb_low'] = mean - BB_DEV * std
+
+        # RSI: ilk barın değişimi 0 kabul edilir (ta ile aynı)
+        change = 0.0 if self.prev_close is None else close - self.prev_close
+        alpha = 1.0 / RSI_WINDOW
+        if self.prev_close is None:
+            self.avg_up, self.avg_down = max(change, 0.0), max(-change, 0.0)
+        else:
+            self.avg_up += alpha * (max(change, 0.0) - self.avg_up)
+            self.avg_down += alpha * (max(-change, 0.0) - self.avg_down)
+        self.prev_close = close
+        if self.count >= RSI_WINDOW:
+            values['rsi'] = 100.0 if self.avg_down == 0 else 100.0 - 100.0 / (1.0 + self.avg_up / self.avg_down)
+
+        self.ema_fast = self._ema(self.ema_fast, close, MACD_FAST)
+        self.ema_slow = self._ema(self.ema_slow, close, MACD_SLOW)
+        if self.count >= MACD_SLOW:
+            macd = self.ema_fast - self.ema_slow
+            self.signal = self._ema(self.signal, macd, MACD_SIGNAL)
+            self.signal_count += 1
+            values['macd'] = macd
+            if self.signal_count >= MACD_SIGNAL:
+                values['macd_signal'] = self.signal
+                values['macd_hist'] = macd - self.signal
+
+        return values
+
+def _bars(stock_data):
+    """Grafik alanları -> float64 dizi sözlüğü."""
+    columns = _resolve_columns(stock_data)
+    bars = {}
+    for field, name in BAR_FIELDS:
+        if name in columns:
+            bars[field] = pd.to_numeric(stock_data[columns[name]], errors='coerce').to_numpy(dtype=np.float64)
+    return bars
+
+def _clean(value):
+    return None if value is None or not math.isfinite(value) else float(value)
+
+class ChartStream:
+    """Bir hisse/dönem grafiğinin bar ve gösterge geçmişi.
+
+    Açılışta göstergeler veriden bir kez hesaplanır; advance() yalnızca son
+    bardan sonraki satırları (ve değişmişse son barı) işler. Zaman ekseni
+    grafik verisiyle aynıdır (duvar saati epoch saniyesi).
+    """
+
+    def __init__(self, stock_data):
+        bars = _bars(stock_data)
+        closes = bars.get('close')
+        if closes is None or not len(closes):
+            raise ValueError("Akış için kapanış verisi yok")
+
+        self.version = None
+        self.times = []
+        self.bars = {field: [] for field in bars}
+        self.indicators = {field: [] for field in INDICATOR_FIELDS}
+        self._committed = IncrementalIndicators()
+        self._extend(bars, epoch_seconds(stock_data.index).tolist())
+        self.last_time = stock_data.index[-1]
+        self.last_row = tuple(values[-1] for values in bars.values())
+
+    def _extend(self, bars, times):
+        """Barları kalıcı durumdan işleyip geçmişe ekle; son bar hariç durum kalıcı olur."""
+        state = self._committed.copy()
+        for position, close in enumerate(bars['close']):
+            if position == len(times) - 1:
+                self._committed = state.copy()
+            values = state.update(close)
+            for field in INDICATOR_FIELDS:
+                self.indicators[field].append(_clean(values[field]))
+
+        self.times.extend(times)
+        for field, values in bars.items():
+            self.bars[field].extend(_clean(value) for value in values)
+
+    def advance(self, stock_data):
+        """Yeni ya da değişen barları işle; değişiklik yoksa False.
+
+        Son işlenen bar veride bulunamazsa (dönem kaydı, veri yenilemesi)
+        LookupError yükseltilir; akış yeniden kurulmalıdır.
+        """
+        index = stock_data.index
+        position = int(index.searchsorted(self.last_time))
+        if position >= len(index) or index[position] != self.last_time:
+            raise LookupError(f"Son bar ({self.last_time}) veride yok")
+
+        tail = stock_data.iloc[position:]
+        bars = _bars(tail)
+        row = tuple(values[0] for values in bars.values())
+        revised = not np.array_equal(np.asarray(row), np.asarray(self.last_row), equal_nan=True)
+        if len(tail) == 1 and not revised:
+            return False
+
+        # Önceki son bar (değişmiş olabilir) yeni barlarla birlikte yeniden işlenir
+        self.times.pop()
+        for values in list(self.bars.values()) + list(self.indicators.values()):
+            values.pop()
+        self._extend(bars, epoch_seconds(tail.index).tolist())
+
+        self.last_time = index[-1]
+        self.last_row = tuple(values[-1] for values in bars.values())
+        return True
+
+    def delta(self, since):
+        """İstemcinin son barından (since) itibaren barlar ve göstergeler.
+
+        İstemcinin son barı da gönderilir ve yerine geçer (replace_last).
+        since geçmişte yoksa LookupError; istemci grafiği yeniden yüklemelidir.
+        """
+        start = bisect.bisect_left(self.times, since)
+        if start >= len(self.times) or self.times[start] != since:
+            raise LookupError(f"İstemcinin son barı ({since}) geçmişte yok")
+
+        delta = {'replace_last': True, 'time': self.times[start:]}
+        for field, values in self.bars.items():
+            delta[field] = values[start:]
+        for field, values in self.indicators.items():
+            delta[field] = values[start:]
+        return delta
+
+def get_delta(ticker, period, stock_data, version, since):
+    """Paylaşılan akışı veri sürümüne getir ve istemcinin farkını döndür.
+
+    Akış yoksa ya da son barı veride bulunamazsa yeniden kurulur; sürüm
+    aynıysa veri yeniden işlenmez.
+    """
+    global _streams
+
+    with _streams_lock:
+        if _streams is None:
+            _streams = LRUCache(maxsize=current_app.config.get('CHART_STREAM_CACHE_SIZE', 64))
+
+        key = (ticker, period)
+        stream = _streams.get(key)
+        if stream is not None and (version is None or stream.version != version):
+            try:
+                stream.advance(stock_data)
+            except LookupError as e:
+                logger.info(f"Grafik akışı yeniden kuruluyor ({ticker}): {e}")
+                stream = None
+        if stream is None:
+            stream = ChartStream(stock_data)
+        stream.version = version
+        _streams.set(key, stream)
+        return stream.delta(since)
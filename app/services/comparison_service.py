@@ -0,0 +1,108 @@
+"""
+Hisse karşılaştırma motoru.
+
+Seçilen hisselerin kapanış fiyatları ortak tarih ekseninde tek bir (tarih x
+hisse) matrise hizalanır; normalize eğriler, toplam getiri, volatilite,
+maksimum düşüş ve korelasyon matrisi bu matris üzerinde tek geçişte
+hesaplanır. Grafik ve performans tablosu aynı çıktıyı kullanır.
+"""
+
+import numpy as np
+import pandas as pd
+import logging
+import warnings
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+
+def _close_series(data):
+    """Tek ya da çok seviyeli sütunlardan kapanış serisi (yoksa None)."""
+    if data is None or data.empty:
+        return None
+    for col in data.columns:
+        if (col[0] if isinstance(col, tuple) else col) == 'Close':
+            series = pd.to_numeric(data[col], errors='coerce')
+            index = pd.DatetimeIndex(series.index)
+            # Farklı borsaların saat dilimleri duvar saatinde hizalanır
+            if index.tz is not None:
+                series.index = index.tz_localize(None)
+            return series[~series.index.duplicated(keep='last')]
+    return None
+
+def align_closes(stocks_data):
+    """Kapanışları ortak tarih ekseninde hizala: (tarihler, hisseler, fiyat matrisi).
+
+    Matris (tarih x hisse) float64'tür; hissenin işlem görmediği günler NaN
+    kalır.
+    """
+    closes = {}
+    for ticker, data in stocks_data.items():
+        series = _close_series(data)
+        if series is not None and series.notna().sum() >= 2:
+            closes[ticker] = series
+
+    if not closes:
+        return pd.DatetimeIndex([]), [], np.empty((0, 0))
+
+    frame = pd.DataFrame(closes).sort_index()
+    return frame.index, list(frame.columns), frame.to_numpy(dtype=np.float64)
+
+def build_comparison(stocks_data):
+    """Karşılaştırma metriklerini tek vektörel geçişte hesapla.
+
+    Dönen sözlük: tickers, dates, normalized (tarih x hisse, başlangıca göre
+    % değişim; işlem olmayan günler NaN), performance (hisse -> total_return, start_price,
+    current_price, volatility, max_drawdown) ve correlation (günlük getiri
+    korelasyonu, hisse sırasıyla liste matrisi). Veri yoksa None.
+    """
+    dates, tickers, prices = align_closes(stocks_data)
+    if not tickers:
+        return None
+
+    observed = ~np.isnan(prices)
+    columns = np.arange(prices.shape[1])
+
+    # İşlem görülmeyen günlerde son fiyat taşınır (başlangıç öncesi NaN kalır)
+    filled = pd.DataFrame(prices).ffill().to_numpy()
+    first = observed.argmax(axis=0)
+    last = len(prices) - 1 - observed[::-1].argmax(axis=0)
+    start_prices = prices[first, columns]
+    current_prices = prices[last, columns]
+
+    # Normalize eğriler yalnızca işlem görülen günlerde tanımlı
+    normalized = (prices / start_prices - 1) * 100
+
+    # Günlük getiri: son gözlenen fiyattan bir sonraki gözleme
+    returns = filled[1:] / filled[:-1] - 1
+    returns[~observed[1:]] = np.nan
+    with warnings.catch_warnings():
+        # Tek getirisi olan hissede volatilite NaN olur
+        warnings.simplefilter('ignore', RuntimeWarning)
+        volatility = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100
+
+    running_max = np.fmax.accumulate(filled, axis=0)
+    max_drawdown = np.nanmin(filled / running_max - 1, axis=0) * 100
+
+    correlation = pd.DataFrame(returns, columns=tickers).corr(min_periods=2)
+
+    total_returns = (current_prices / start_prices - 1) * 100
+    performance = {
+        ticker: {
+            'total_return': float(total_returns[i]),
+            'start_price': float(start_prices[i]),
+            'current_price': float(current_prices[i]),
+            'volatility': float(volatility[i]),
+            'max_drawdown': float(max_drawdown[i])
+        }
+        for i, ticker in enumerate(tickers)
+    }
+
+    logger.debug(f"Karşılaştırma matrisi: {prices.shape[0]} tarih x {prices.shape[1]} hisse")
+    return {
+        'tickers': tickers,
+        'dates': dates,
+        'normalized': normalized,
+        'performance': performance,
+        'correlation': np.round(correlation.to_numpy(), 4).tolist()
+    }
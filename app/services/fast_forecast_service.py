@@ -0,0 +1,159 @@
+"""
+Hızlı tahmin katmanı (fast-path).
+
+Kapalı formlu / artımlı modeller yalnızca NumPy ile çalışır ve milisaniyeler
+içinde sonuç üretir. Ağır ensemble (LightGBM + Prophet + RandomForest) arka
+planda sonucu iyileştirirken kullanıcıya ilk cevabı bu katman verir.
+"""
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Varsayılan ayarlar (Config ile ezilebilir)
+DEFAULT_WINDOW = 250  # Modellerin kullandığı son gözlem sayısı
+DEFAULT_AR_ORDER = 5
+HOLT_ALPHA_GRID = (0.2, 0.5, 0.8)
+HOLT_BETA_GRID = (0.05, 0.1, 0.3)
+HOLT_DAMPING = 0.98
+
+def _close_array(df, window):
+    """Kapanış fiyatlarını float64 dizisi olarak al."""
+    close = df['Close']
+    if hasattr(close, 'ndim') and close.ndim > 1:
+        close = close.iloc[:, 0]
+    values = np.asarray(close, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    return values[-window:]
+
+def forecast_holt(y, prediction_days=7):
+    """Sönümlü trendli Holt üstel düzeltme (küçük grid ile alpha/beta seçimi)."""
+    n = len(y)
+    if n < 3:
+        return None
+
+    best = None
+    for alpha in HOLT_ALPHA_GRID:
+        for beta in HOLT_BETA_GRID:
+            level = y[0]
+            trend = y[1] - y[0]
+            sse = 0.0
+            for t in range(1, n):
+                forecast = level + HOLT_DAMPING * trend
+                error = y[t] - forecast
+                sse += error * error
+                new_level = alpha * y[t] + (1 - alpha) * forecast
+                trend = beta * (new_level - level) + (1 - beta) * HOLT_DAMPING * trend
+                level = new_level
+            mse = sse / (n - 1)
+            if best is None or mse < best[0]:
+                best = (mse, level, trend)
+
+    mse, level, trend = best
+    steps = np.arange(1, prediction_days + 1)
+    damping_sum = np.cumsum(HOLT_DAMPING ** steps)
+    predictions = level + damping_sum * trend
+
+    return {'model_name': 'Holt', 'predictions': predictions, 'mse': mse}
+
+def forecast_ar(y, prediction_days=7, order=DEFAULT_AR_ORDER):
+    """Log getiriler üzerinde en küçük kareler ile AR(p) modeli."""
+    if len(y) < order + 20 or np.any(y <= 0):
+        return None
+
+    returns = np.diff(np.log(y))
+    lagged = np.lib.stride_tricks.sliding_window_view(returns[:-1], order)[:, ::-1]
+    X = np.column_stack([np.ones(len(lagged)), lagged])
+    target = returns[order:]
+
+    coef, *_ = np.linalg.lstsq(X, target, rcond=None)
+
+    # Bir adım ilerisi için örneklem içi fiyat hatası
+    fitted_returns = X @ coef
+    fitted_prices = y[order:-1] * np.exp(fitted_returns)
+    mse = float(np.mean((y[order + 1:] - fitted_prices) ** 2))
+
+    history = list(returns[-order:][::-1])
+    future_returns = np.empty(prediction_days)
+    for i in range(prediction_days):
+        next_return = coef[0] + np.dot(coef[1:], history[:order])
+        future_returns[i] = next_return
+        history.insert(0, next_return)
+
+    predictions = y[-1] * np.exp(np.cumsum(future_returns))
+
+    return {'model_name': 'AR', 'predictions': predictions, 'mse': mse}
+
+def forecast_kalman_local_level(y, prediction_days=7):
+    """Kalman filtresi ile yerel seviye (random walk + gürültü) modeli."""
+    if len(y) < 10:
+        return None
+
+    diffs = np.diff(y)
+    diff_var = np.var(diffs)
+    lag1_cov = np.mean((diffs[1:] - diffs.mean()) * (diffs[:-1] - diffs.mean()))
+
+    # Momentler yöntemi: Var(Δy) = Q + 2R, Cov(Δy_t, Δy_t-1) = -R
+    floor = max(diff_var * 1e-3, 1e-8)
+    obs_var = max(-lag1_cov, floor)
+    state_var = max(diff_var - 2 * obs_var, floor)
+
+    level = y[0]
+    p = diff_var
+    sse = 0.0
+    for t in range(1, len(y)):
+        p_pred = p + state_var
+        innovation = y[t] - level
+        sse += innovation * innovation
+        gain = p_pred / (p_pred + obs_var)
+        level = level + gain * innovation
+        p = (1 - gain) * p_pred
+
+    mse = sse / (len(y) - 1)
+    predictions = np.full(prediction_days, level)
+
+    return {'model_name': 'KalmanLocalLevel', 'predictions': predictions, 'mse': mse}
+
+def predict_fast(df, prediction_days=7, window=DEFAULT_WINDOW, ar_order=DEFAULT_AR_ORDER):
+    """Hızlı modellerin ters-MSE ağırlıklı birleşimi."""
+    try:
+        y = _close_array(df, window)
+        if len(y) < 30:
+            logger.warning("Hızlı tahmin için yeterli veri yok")
+            return None
+
+        candidates = [
+            forecast_holt(y, prediction_days),
+            forecast_ar(y, prediction_days, order=ar_order),
+            forecast_kalman_local_level(y, prediction_days),
+        ]
+        results = [r for r in candidates if r is not None and np.all(np.isfinite(r['predictions']))]
+
+        if not results:
+            return None
+
+        inverse_mse = np.array([1.0 / max(r['mse'], 1e-12) for r in results])
+        weights = inverse_mse / inverse_mse.sum()
+
+        stacked = np.vstack([r['predictions'] for r in results])
+        predictions = weights @ stacked
+
+        # Güven: ufuk sonundaki tahmini standart sapmanın fiyata oranı
+        combined_mse = float(weights @ np.array([r['mse'] for r in results]))
+        horizon_std = np.sqrt(combined_mse * prediction_days)
+        confidence = max(0.1, min(0.9, 1 - 2 * horizon_std / y[-1]))
+
+        return {
+            'model_name': 'FastEnsemble',
+            'predictions': predictions.tolist(),
+            'confidence': confidence,
+            'individual_models': [r['model_name'] for r in results],
+            'model_count': len(results),
+            'weights': dict(zip([r['model_name'] for r in results], weights.tolist())),
+            'is_fast_path': True
+        }
+
+    except Exception as e:
+        logger.error(f"Hızlı tahmin hatası: {e}")
+        return None
@@ -0,0 +1,186 @@
+"""
+FinBERT çıkarım arka uçları.
+
+CPU sunucular için tam hassasiyetli PyTorch modeline alternatif olarak dinamik
+int8 kuantizasyon ('quantized') ya da ONNX Runtime grafiği ('onnx') sunar.
+Alternatif arka uç, sabit örnek cümlelerde fp32 modelle karşılaştırılır;
+uyum eşiğin altındaysa fp32 modele geri dönülür.
+"""
+
+import os
+import logging
+from types import SimpleNamespace
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import torch
+    import torch.nn.functional as F
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+    logging.warning("ONNX Runtime yüklü değil, 'onnx' FinBERT arka ucu kullanılamaz")
+
+SUPPORTED_BACKENDS = ('pytorch', 'quantized', 'onnx')
+
+# Parite kontrolü için sabit finansal cümleler (pozitif / negatif / nötr karışık)
+PARITY_SAMPLE_TEXTS = [
+    "The company reported record quarterly profits and raised its full-year guidance.",
+    "Shares plunged after the bank disclosed a larger than expected loan loss provision.",
+    "The board will meet on Tuesday to discuss the annual budget.",
+    "Revenue grew 12% year over year, beating analyst estimates.",
+    "The firm warned of weaker demand and announced layoffs across its factories.",
+    "Trading volume was in line with the monthly average.",
+    "Regulators fined the lender for compliance failures.",
+    "The airline expects passenger numbers to recover strongly next year.",
+]
+
+class OnnxSequenceClassifier:
+    """ONNX Runtime oturumunu transformers modeli gibi çağrılabilir yapar."""
+
+    def __init__(self, session):
+        self.session = session
+        self.input_names = [model_input.name for model_input in session.get_inputs()]
+
+    def __call__(self, **inputs):
+        feed = {name: inputs[name].cpu().numpy().astype(np.int64) for name in self.input_names if name in inputs}
+        logits = self.session.run(['logits'], feed)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+    def eval(self):
+        return self
+
+def resolve_backend(requested):
+    """İstenen arka ucu mevcut kütüphanelere göre doğrula."""
+    backend = (requested or 'pytorch').lower()
+    if backend not in SUPPORTED_BACKENDS:
+        logger.warning(f"Bilinmeyen FinBERT arka ucu '{requested}', pytorch kullanılacak")
+        return 'pytorch'
+    if backend == 'onnx' and not ONNXRUNTIME_AVAILABLE:
+        logger.warning("ONNX Runtime yok, FinBERT için dinamik kuantizasyon kullanılacak")
+        return 'quantized'
+    return backend
+
+def quantize_model(model):
+    """Linear katmanları dinamik int8 kuantize et."""
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _onnx_path(cache_dir, model_name, quantized):
+    """Model adına göre ONNX dosya yolu."""
+    safe_name = model_name.replace('/', '__')
+    suffix = '-int8' if quantized else ''
+    return os.path.join(cache_dir, 'onnx', f"{safe_name}{suffix}.onnx")
+
+def export_onnx(model, tokenizer, path):
+    """fp32 modeli dinamik batch / dizi uzunluklu ONNX grafiğine aktar."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sample = tokenizer(PARITY_SAMPLE_TEXTS[:2], return_tensors='pt', padding=True)
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['logits'] = {0: 'batch'}
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            tmp_path,
+            input_names=input_names,
+            output_names=['logits'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    os.replace(tmp_path, path)
+    logger.info(f"FinBERT ONNX grafiği oluşturuldu: {path}")
+
+def load_onnx_model(model, tokenizer, model_name, cache_dir, quantize=True, num_threads=None):
+    """ONNX grafiğini (yoksa oluşturarak) yükle; isteğe bağlı int8 kuantizasyon."""
+    fp32_path = _onnx_path(cache_dir, model_name, quantized=False)
+    if not os.path.exists(fp32_path):
+        export_onnx(model, tokenizer, fp32_path)
+
+    path = fp32_path
+    if quantize:
+        path = _onnx_path(cache_dir, model_name, quantized=True)
+        if not os.path.exists(path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantize_dynamic(fp32_path, path, weight_type=QuantType.QInt8)
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+
+    session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+    return OnnxSequenceClassifier(session)
+
+def check_parity(tokenizer, reference_model, candidate_model, texts=None):
+    """Aday arka ucun çıktılarını fp32 modelle karşılaştır."""
+    texts = texts or PARITY_SAMPLE_TEXTS
+    inputs = tokenizer(texts, return_tensors='pt', padding=True, truncation=True, max_length=512)
+
+    with torch.inference_mode():
+        reference = F.softmax(reference_model(**inputs).logits, dim=-1)
+        candidate = F.softmax(candidate_model(**inputs).logits, dim=-1)
+
+    reference_compound = reference[:, 2] - reference[:, 0]
+    candidate_compound = candidate[:, 2] - candidate[:, 0]
+
+    return {
+        'label_agreement': float((reference.argmax(dim=-1) == candidate.argmax(dim=-1)).float().mean()),
+        'max_prob_diff': float((reference - candidate).abs().max()),
+        'max_compound_diff': float((reference_compound - candidate_compound).abs().max())
+    }
+
+def build_backend(backend, model, tokenizer, config):
+    """İstenen arka ucu oluştur ve parite kontrolünden geçir.
+
+    (model, kullanılan arka uç adı, parite raporu) döner. Oluşturma ya da
+    parite kontrolü başarısız olursa fp32 model döner.
+    """
+    backend = resolve_backend(backend)
+    if backend == 'pytorch':
+        return model, 'pytorch', None
+
+    try:
+        if backend == 'quantized':
+            candidate = quantize_model(model)
+        else:
+            candidate = load_onnx_model(
+                model, tokenizer,
+                config.get('FINBERT_MODEL_NAME', 'ProsusAI/finbert'),
+                config.get('MODEL_CACHE_DIR', './.model_cache'),
+                quantize=config.get('FINBERT_ONNX_QUANTIZE', True),
+                num_threads=config.get('FINBERT_NUM_THREADS')
+            )
+    except Exception as e:
+        logger.error(f"FinBERT '{backend}' arka ucu oluşturulamadı, fp32 kullanılacak: {e}")
+        return model, 'pytorch', None
+
+    if not config.get('FINBERT_PARITY_CHECK', True):
+        return candidate, backend, None
+
+    try:
+        report = check_parity(tokenizer, model, candidate)
+    except Exception as e:
+        logger.error(f"FinBERT parite kontrolü başarısız, fp32 kullanılacak: {e}")
+        return model, 'pytorch', None
+
+    min_agreement = config.get('FINBERT_PARITY_MIN_AGREEMENT', 0.9)
+    max_compound_diff = config.get('FINBERT_PARITY_MAX_COMPOUND_DIFF', 0.1)
+    logger.info(f"FinBERT '{backend}' parite: uyum {report['label_agreement']:.2f}, "
+                f"maks. skor farkı {report['max_compound_diff']:.3f}")
+
+    if report['label_agreement'] < min_agreement or report['max_compound_diff'] > max_compound_diff:
+        logger.warning(f"FinBERT '{backend}' arka ucu parite eşiğini geçemedi, fp32 kullanılacak")
+        return model, 'pytorch', report
+
+    return candidate, backend, report
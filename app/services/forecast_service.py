@@ -0,0 +1,177 @@
+"""
+Tahmin deposu.
+
+Tam tahmin ufkunu, ensemble ağırlıklarını ve model bazında çıktıları
+`forecasts` tablosuna hisse + veri sürümü anahtarıyla yazar. Aynı veri için
+taze bir kayıt varsa tahmin yeniden hesaplanmaz; geçmiş kayıtlar gerçekleşen
+fiyatlarla yeniden eğitim yapmadan karşılaştırılabilir.
+"""
+
+import numpy as np
+import pandas as pd
+import logging
+from datetime import datetime
+from flask import current_app
+
+from app import db
+from app.models import Forecast
+
+logger = logging.getLogger(__name__)
+
+def _float_list(values):
+    """Tahmin dizisini JSON'a yazılabilir float listesine çevir."""
+    return [float(v) for v in values]
+
+def save_forecast(ticker, data_version, prediction_result):
+    """Sonlandırılmış tahmin sonucunu kaydet (aynı anahtar varsa güncelle)."""
+    try:
+        predictions = prediction_result['predictions']
+        horizon = prediction_result.get('prediction_horizon_days', len(predictions))
+
+        model_predictions = prediction_result.get('model_predictions')
+        if not model_predictions:
+            model_predictions = {prediction_result['model_name']: _float_list(predictions['predicted_price'])}
+
+        forecast = Forecast.query.filter_by(ticker=ticker, data_version=data_version, horizon=horizon).first()
+        if forecast is None:
+            forecast = Forecast(ticker=ticker, data_version=data_version, horizon=horizon)
+            db.session.add(forecast)
+
+        forecast.model_name = prediction_result['model_name']
+        forecast.confidence = float(prediction_result['confidence'])
+        forecast.weight_source = prediction_result.get('weight_source')
+        forecast.last_actual_price = float(prediction_result['last_actual_price'])
+        forecast.last_data_date = datetime.strptime(prediction_result['last_data_date'], '%Y-%m-%d').date()
+        forecast.prediction_dates = [pd.Timestamp(d).strftime('%Y-%m-%d') for d in predictions['date']]
+        forecast.predicted_prices = _float_list(predictions['predicted_price'])
+        forecast.model_predictions = model_predictions
+        forecast.weights = prediction_result.get('weights')
+        forecast.created_at = datetime.utcnow()
+
+        db.session.commit()
+        logger.info(f"{ticker} tahmini kaydedildi - sürüm {data_version}, {horizon} gün")
+        return forecast
+
+    except Exception as e:
+        logger.error(f"{ticker} tahmini kaydedilirken hata: {e}")
+        db.session.rollback()
+        return None
+
+def to_prediction_result(forecast):
+    """Kaydı predict_stock_price çıktısı biçimine çevir."""
+    dates = pd.DatetimeIndex(pd.to_datetime(forecast.prediction_dates))
+    model_names = list((forecast.model_predictions or {}).keys())
+
+    return {
+        'model_name': forecast.model_name,
+        'confidence': forecast.confidence,
+        'individual_models': model_names,
+        'model_count': len(model_names),
+        'weights': forecast.weights,
+        'weight_source': forecast.weight_source,
+        'model_predictions': forecast.model_predictions,
+        'last_actual_price': forecast.last_actual_price,
+        'last_data_date': forecast.last_data_date.strftime('%Y-%m-%d'),
+        'prediction_horizon_days': forecast.horizon,
+        'predictions': pd.DataFrame({
+            'date': dates,
+            'predicted_price': forecast.predicted_prices
+        }),
+        'prediction_created_at': forecast.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'next_trading_day': forecast.prediction_dates[0] if forecast.prediction_dates else None,
+        'forecast_id': forecast.id,
+        'from_store': True
+    }
+
+def get_stored_forecast(ticker, data_version, horizon):
+    """Aynı veri sürümü için taze kayıt varsa tahmin sonucunu döndür."""
+    try:
+        forecast = Forecast.query.filter_by(ticker=ticker, data_version=data_version, horizon=horizon).first()
+        if forecast is None:
+            return None
+
+        age_seconds = (datetime.utcnow() - forecast.created_at).total_seconds()
+        if age_seconds >= current_app.config.get('FORECAST_MAX_AGE_SECONDS', 21600):
+            return None
+
+        return to_prediction_result(forecast)
+
+    except Exception as e:
+        logger.warning(f"{ticker} kayıtlı tahmini okunamadı: {e}")
+        return None
+
+def get_stored_forecast_version(ticker, data_version, horizon):
+    """Taze kayıtlı tahminin sürüm anahtarı (kayıt yoksa None); tahmin sonucu oluşturulmaz."""
+    try:
+        row = db.session.query(Forecast.id, Forecast.created_at).filter_by(
+            ticker=ticker, data_version=data_version, horizon=horizon
+        ).first()
+        if row is None:
+            return None
+
+        age_seconds = (datetime.utcnow() - row.created_at).total_seconds()
+        if age_seconds >= current_app.config.get('FORECAST_MAX_AGE_SECONDS', 21600):
+            return None
+
+        return f"{row.id}-{row.created_at:%Y%m%d%H%M%S%f}"
+
+    except Exception as e:
+        logger.warning(f"{ticker} kayıtlı tahmin sürümü okunamadı: {e}")
+        return None
+
+def get_forecast_history(ticker, limit=None):
+    """Hissenin son kayıtlı tahminleri (yeniden eskiye)."""
+    limit = limit or current_app.config.get('FORECAST_HISTORY_LIMIT', 30)
+    return Forecast.query.filter_by(ticker=ticker).order_by(Forecast.created_at.desc()).limit(limit).all()
+
+def evaluate_forecasts(ticker, stock_data, limit=None):
+    """Geçmiş tahminleri gerçekleşen kapanış fiyatlarıyla karşılaştır.
+
+    Yalnızca tarihi gerçekleşmiş ufuk adımları değerlendirilir; modeller
+    yeniden çalıştırılmaz.
+    """
+    if stock_data is None or stock_data.empty:
+        return []
+
+    close = stock_data['Close']
+    if hasattr(close, 'ndim') and close.ndim > 1:
+        close = close.iloc[:, 0]
+    index = pd.DatetimeIndex(close.index)
+    index = index.tz_localize(None) if index.tz is not None else index
+    realized = pd.Series(close.to_numpy(dtype=np.float64), index=index.strftime('%Y-%m-%d'))
+
+    evaluations = []
+    for forecast in get_forecast_history(ticker, limit):
+        steps = [(date, price) for date, price in zip(forecast.prediction_dates, forecast.predicted_prices)
+                 if date in realized.index]
+        if not steps:
+            continue
+
+        predicted = np.array([price for _, price in steps])
+        actual = realized.loc[[date for date, _ in steps]].to_numpy()
+        base = forecast.last_actual_price
+
+        evaluation = {
+            'forecast_id': forecast.id,
+            'data_version': forecast.data_version,
+            'created_at': forecast.created_at.isoformat() + 'Z',
+            'model_name': forecast.model_name,
+            'realized_steps': len(steps),
+            'horizon': forecast.horizon,
+            'mae': float(np.mean(np.abs(predicted - actual))),
+            'mape': float(np.mean(np.abs(predicted - actual) / actual) * 100),
+            'directional_accuracy': float(np.mean(np.sign(predicted - base) == np.sign(actual - base)))
+        }
+
+        # Model bazında hatalar
+        model_mae = {}
+        for model_name, model_values in (forecast.model_predictions or {}).items():
+            model_values = np.asarray(model_values[:len(forecast.prediction_dates)], dtype=np.float64)
+            positions = [forecast.prediction_dates.index(date) for date, _ in steps]
+            if len(model_values) > max(positions):
+                model_mae[model_name] = float(np.mean(np.abs(model_values[positions] - actual)))
+        evaluation['model_mae'] = model_mae
+
+        evaluations.append(evaluation)
+
+    return evaluations
@@ -1,8 +1,18 @@
 import requests
+from requests.adapters import HTTPAdapter
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from datetime import datetime, timedelta
 from flask import current_app
 import logging
+from app import db
+from app.models import SentimentCache, MarketSentimentSnapshot, NewsArticle, NewsQueryState
+from app.utils.cache import LRUCache
+from app.utils.minhash import MinHashIndex, minhash_signature
+from app.services import finbert_service, sentiment_worker, sentiment_aggregator
 
 # FinBERT için güvenli import
 try:
@@ -24,52 +34,150 @@ except Exception as e:
 # Global değişkenler
 finbert_tokenizer = None
 finbert_model = None
+finbert_backend = 'pytorch'  # 'pytorch', 'quantized' veya 'onnx'
+_finbert_load_lock = threading.Lock()
+_finbert_state_lock = threading.Lock()
+_finbert_load_thread = None
 vader_analyzer = SentimentIntensityAnalyzer()
 
+# Duyarlılık önbelleği: sha256(model + metin) -> (kategori, skor)
+_sentiment_cache = None
+_sentiment_cache_lock = threading.Lock()
+_sentiment_cache_writes = 0  # Son tablo temizliğinden beri yazılan kayıt sayısı
+
+# Yakın kopya haber indeksi (süreç boyunca kalıcı)
+_duplicate_index = None
+
+# NewsAPI istekleri: paylaşılan bağlantı havuzu ve sınırlı iş parçacığı havuzu
+_news_session = None
+_news_executor = None
+_news_lock = threading.Lock()
+
+# Piyasa duyarlılığı anlık görüntüsü
+_market_sentiment_snapshot = {}
+_market_sentiment_refresher = None
+_market_sentiment_stop = threading.Event()
+
+def _load_pretrained(loader, model_name, cache_dir):
+    """from_pretrained - mümkünse safetensors (mmap, hızlı yükleme), değilse varsayılan biçim."""
+    try:
+        return loader.from_pretrained(model_name, cache_dir=cache_dir, local_files_only=False, use_safetensors=True)
+    except (OSError, ValueError, TypeError) as e:
+        logger.info(f"safetensors ile yüklenemedi, varsayılan biçim denenecek: {e}")
+        return loader.from_pretrained(model_name, cache_dir=cache_dir, local_files_only=False)
+
 def initialize_finbert():
-    """FinBERT modelini ve tokenizer'ını yükler (güvenli versiyon)."""
-    global finbert_tokenizer, finbert_model
+    """FinBERT modelini ve tokenizer'ını yükler (güvenli, iş parçacığı güvenli versiyon).
+    
+    Model süreç başına bir kez yüklenir. Gunicorn'da preload_app ile master
+    süreçte çağrılırsa worker'lar ağırlıkları copy-on-write paylaşır.
+    """
+    global finbert_tokenizer, finbert_model, finbert_backend
     
     if not TRANSFORMERS_AVAILABLE:
         logger.warning("Transformers kütüphanesi mevcut değil, VADER kullanılacak")
         return False
     
-    if finbert_model is None and finbert_tokenizer is None:
+    with _finbert_load_lock:
+        if is_finbert_ready():
+            return True
+        
         try:
-            model_name = getattr(current_app.config, 'FINBERT_MODEL_NAME', 'ProsusAI/finbert')
+            model_name = current_app.config.get('FINBERT_MODEL_NAME', 'ProsusAI/finbert')
+            cache_dir = current_app.config.get('MODEL_CACHE_DIR', './.model_cache')
             logger.info(f"FinBERT modeli yükleniyor: {model_name}")
+            started = time.perf_counter()
+            
+            # İş parçacığı sayısı yüklemeden önce ayarlanır (torch/OpenMP havuzu bu sayıyla kurulur)
+            set_inference_threads(current_app.config.get('FINBERT_NUM_THREADS'))
             
             # Önce cache kontrol et
             try:
-                finbert_tokenizer = AutoTokenizer.from_pretrained(
+                tokenizer = AutoTokenizer.from_pretrained(
                     model_name,
-                    cache_dir="./.model_cache",
-                    local_files_only=False
-                )
-                finbert_model = AutoModelForSequenceClassification.from_pretrained(
-                    model_name,
-                    cache_dir="./.model_cache",
+                    cache_dir=cache_dir,
                     local_files_only=False
                 )
+                model = _load_pretrained(AutoModelForSequenceClassification, model_name, cache_dir)
             except Exception as cache_error:
                 logger.warning(f"Model cache hatası, alternatif yüklenecek: {cache_error}")
                 # Alternatif model veya basit sentiment analizi kullan
-                finbert_tokenizer = None
-                finbert_model = None
                 return False
             
-            if finbert_model:
-                finbert_model.eval()
-                logger.info("FinBERT modeli başarıyla yüklendi")
-                return True
+            model.eval()
+            
+            # CPU için alternatif çıkarım arka ucu (parite kontrolünden geçerse)
+            model, backend, _ = finbert_service.build_backend(
+                current_app.config.get('FINBERT_BACKEND', 'pytorch'),
+                model, tokenizer, current_app.config
+            )
+            
+            # Model en son atanır: hazır olana kadar istekler VADER kullanır
+            finbert_backend = backend
+            finbert_tokenizer = tokenizer
+            finbert_model = model
+            
+            logger.info(f"FinBERT modeli başarıyla yüklendi - arka uç: {backend}, "
+                        f"süre: {time.perf_counter() - started:.1f} sn")
+            return True
             
         except Exception as e:
             logger.error(f"FinBERT modeli yüklenirken kritik hata: {e}")
-            finbert_tokenizer = None
-            finbert_model = None
             return False
+
+def set_inference_threads(num_threads):
+    """torch çıkarım iş parçacığı sayısını ayarla.
+    
+    gunicorn worker'larında fork sonrasında da çağrılır; master'da kurulan
+    havuz worker'a geçmez ve her worker tüm çekirdekleri kullanmamalıdır.
+    """
+    if TRANSFORMERS_AVAILABLE and num_threads:
+        torch.set_num_threads(num_threads)
+
+def is_finbert_ready():
+    """FinBERT yüklenip kullanıma hazır mı."""
+    return finbert_model is not None and finbert_tokenizer is not None
+
+def _ensure_finbert_loading():
+    """FINBERT_ENABLED ise ve model yüklenmemişse ilk kullanımda arka planda yüklemeyi başlat.
+    
+    Yükleme bitene kadar istekler VADER ile cevaplanır; süreç başına bir kez denenir.
+    """
+    global _finbert_load_thread
     
-    return finbert_model is not None
+    if not TRANSFORMERS_AVAILABLE or is_finbert_ready() or not current_app.config.get('FINBERT_ENABLED', False):
+        return
+    
+    with _finbert_state_lock:
+        if _finbert_load_thread is not None:
+            return
+        
+        app = current_app._get_current_object()
+        
+        def load():
+            with app.app_context():
+                initialize_finbert()
+        
+        _finbert_load_thread = threading.Thread(target=load, name='finbert-loader', daemon=True)
+        _finbert_load_thread.start()
+        logger.info("FinBERT ilk kullanımda arka planda yükleniyor, hazır olana kadar VADER kullanılacak")
+
+def _categorize_sentiment(compound_score):
+    """Compound skoru kategoriye çevir."""
+    if compound_score >= 0.05:
+        return "positive"
+    elif compound_score <= -0.05:
+        return "negative"
+    return "neutral"
+
+def _prepare_text(text):
+    """Metni temizle ve FinBERT için kısalt."""
+    text = str(text).strip()
+    
+    # Çok uzun metinleri kısalt
+    if len(text) > 500:
+        text = text[:500]
+    return text
 
 def get_sentiment_finbert(text):
     """FinBERT ile duyarlılık analizi yap (güvenli versiyon)."""
@@ -81,14 +189,10 @@ def get_sentiment_finbert(text):
     
     try:
         # Metni temizle ve kısalt
-        text = str(text).strip()
+        text = _prepare_text(text)
         if len(text) == 0:
             return "neutral", 0.0
         
-        # Çok uzun metinleri kısalt
-        if len(text) > 500:
-            text = text[:500]
-        
         # Metni tokenize et
         inputs = finbert_tokenizer(
             text, 
@@ -99,64 +203,282 @@ def get_sentiment_finbert(text):
         )
         
         # Model çıktısını al
-        with torch.no_grad():
+        with torch.inference_mode():
             outputs = finbert_model(**inputs)
             predictions = F.softmax(outputs.logits, dim=-1)
         
         # Sınıfları al: [negatif, nötr, pozitif]
         scores = predictions[0].tolist()
         negative_score = scores[0]
-        neutral_score = scores[1]
         positive_score = scores[2]
         
         # Compound score hesapla (-1 ile +1 arası)
         compound_score = positive_score - negative_score
         
-        # Kategori belirle
-        if compound_score >= 0.05:
-            category = "positive"
-        elif compound_score <= -0.05:
-            category = "negative"
-        else:
-            category = "neutral"
-        
-        return category, compound_score
+        return _categorize_sentiment(compound_score), compound_score
         
     except Exception as e:
         logger.error(f"FinBERT analizi hatası: {e}")
         # Hata durumunda VADER'a geç
         return get_sentiment_vader(text)
 
+def _score_finbert_batch(texts, batch_size=None):
+    """Toplu FinBERT çıkarımı.
+    
+    Tüm metinler bir kez (padding'siz) tokenize edilir, token uzunluğuna göre
+    sıralanıp mikro-batch'lere bölünür ve her batch yalnızca kendi en uzun
+    metnine kadar pad edilir. Bir batch başarısız olursa o batch'teki metinler
+    tek tek analiz edilir (hata veren metin VADER'a düşer). (sonuçlar,
+    önbelleğe yazılabilir mi) listeleri döner; tek tek analiz edilenler
+    VADER'a düşmüş olabileceği için önbelleğe yazılmaz.
+    """
+    texts = [_prepare_text(text) for text in texts]
+    results = [("neutral", 0.0)] * len(texts)
+    cacheable = [False] * len(texts)
+    pending = [i for i, text in enumerate(texts) if text]
+    if not pending:
+        return results, cacheable
+    
+    batch_size = batch_size or current_app.config.get('FINBERT_BATCH_SIZE', 16)
+    
+    try:
+        encoded = finbert_tokenizer([texts[i] for i in pending], truncation=True, max_length=512)
+    except Exception as e:
+        logger.error(f"FinBERT toplu tokenize hatası: {e}")
+        for i in pending:
+            results[i] = get_sentiment_finbert(texts[i])
+        return results, cacheable
+    
+    # Benzer uzunluktaki metinler aynı batch'e düşsün (padding israfı az olur)
+    order = sorted(range(len(pending)), key=lambda k: len(encoded['input_ids'][k]))
+    
+    for start in range(0, len(order), batch_size):
+        chunk = order[start:start + batch_size]
+        try:
+            features = [{key: encoded[key][k] for key in encoded.keys()} for k in chunk]
+            inputs = finbert_tokenizer.pad(features, return_tensors="pt")
+            
+            with torch.inference_mode():
+                outputs = finbert_model(**inputs)
+                predictions = F.softmax(outputs.logits, dim=-1).tolist()
+            
+            # Sınıfları al: [negatif, nötr, pozitif]
+            for k, scores in zip(chunk, predictions):
+                compound_score = scores[2] - scores[0]
+                results[pending[k]] = (_categorize_sentiment(compound_score), compound_score)
+                cacheable[pending[k]] = True
+                
+        except Exception as e:
+            logger.error(f"FinBERT toplu analiz hatası, metinler tek tek analiz edilecek: {e}")
+            for k in chunk:
+                results[pending[k]] = get_sentiment_finbert(texts[pending[k]])
+    
+    return results, cacheable
+
+def get_active_sentiment_model():
+    """Kullanılan duyarlılık modelinin adı (önbellek anahtarının parçası)."""
+    if sentiment_worker.is_enabled():
+        # Model ayrı worker sürecinde; ulaşılamıyorsa VADER
+        return sentiment_worker.get_worker_model() or 'vader'
+    return get_local_sentiment_model()
+
+def get_local_sentiment_model():
+    """Bu süreçte yüklü duyarlılık modelinin adı."""
+    _ensure_finbert_loading()
+    
+    if TRANSFORMERS_AVAILABLE and is_finbert_ready():
+        model_name = current_app.config.get('FINBERT_MODEL_NAME', 'ProsusAI/finbert')
+        # Kuantize / ONNX skorları fp32'den az da olsa farklı olabilir
+        return model_name if finbert_backend == 'pytorch' else f"{model_name}:{finbert_backend}"
+    return 'vader'
+
+def sentiment_cache_key(text, model_name):
+    """Model adı ve analiz edilen metnin sha256 özeti."""
+    return hashlib.sha256(f"{model_name}\n{text}".encode('utf-8')).hexdigest()
+
+def _get_sentiment_cache():
+    """Bellekteki LRU duyarlılık önbelleğini (lazy) oluştur."""
+    global _sentiment_cache
+    
+    with _sentiment_cache_lock:
+        if _sentiment_cache is None:
+            _sentiment_cache = LRUCache(maxsize=current_app.config.get('SENTIMENT_CACHE_SIZE', 5000))
+        return _sentiment_cache
+
+def _load_cached_sentiments(keys):
+    """Önce bellekten, sonra veritabanından önbelleğe alınmış sonuçları oku."""
+    cache = _get_sentiment_cache()
+    found = {}
+    for key in keys:
+        value = cache.get(key)
+        if value is not None:
+            found[key] = value
+    
+    missing = [key for key in keys if key not in found]
+    if missing and current_app.config.get('SENTIMENT_CACHE_PERSIST', True):
+        try:
+            now = datetime.utcnow()
+            touch_before = now - timedelta(seconds=current_app.config.get('SENTIMENT_CACHE_TOUCH_SECONDS', 3600))
+            stale_ids = []
+            for row in SentimentCache.query.filter(SentimentCache.key_hash.in_(missing)).all():
+                value = (row.category, row.score)
+                found[row.key_hash] = value
+                cache.set(row.key_hash, value)
+                if row.last_used_at is None or row.last_used_at < touch_before:
+                    stale_ids.append(row.id)
+            
+            # Kullanım zamanı (LRU temizliği için) toplu ve seyrek güncellenir
+            if stale_ids:
+                SentimentCache.query.filter(SentimentCache.id.in_(stale_ids)).update(
+                    {'last_used_at': now}, synchronize_session=False)
+                db.session.commit()
+        except Exception as e:
+            logger.warning(f"Duyarlılık önbelleği okunamadı: {e}")
+            db.session.rollback()
+    
+    return found
+
+def _prune_sentiment_cache_table():
+    """Tablo sınırını aşan, en uzun süredir kullanılmayan kayıtları sil."""
+    max_rows = current_app.config.get('SENTIMENT_CACHE_DB_MAX_ROWS', 100000)
+    excess = SentimentCache.query.count() - max_rows
+    if excess <= 0:
+        return
+    
+    stale_ids = [row_id for (row_id,) in db.session.query(SentimentCache.id)
+                 .order_by(SentimentCache.last_used_at.asc(), SentimentCache.id.asc())
+                 .limit(excess)]
+    for start in range(0, len(stale_ids), 500):
+        SentimentCache.query.filter(SentimentCache.id.in_(stale_ids[start:start + 500])).delete(synchronize_session=False)
+    db.session.commit()
+    logger.info(f"Duyarlılık önbelleğinden {len(stale_ids)} kayıt silindi")
+
+def _store_cached_sentiments(entries, model_name):
+    """Yeni sonuçları belleğe ve veritabanına yaz.
+    
+    Tablo boyutu her yazmada değil, SENTIMENT_CACHE_PRUNE_EVERY yeni kayıtta
+    bir kontrol edilir.
+    """
+    global _sentiment_cache_writes
+    
+    if not entries:
+        return
+    
+    cache = _get_sentiment_cache()
+    for key, value in entries.items():
+        cache.set(key, value)
+    
+    if not current_app.config.get('SENTIMENT_CACHE_PERSIST', True):
+        return
+    
+    try:
+        for key, (category, score) in entries.items():
+            db.session.add(SentimentCache(key_hash=key, model_name=model_name, category=category, score=score))
+        db.session.commit()
+        
+        with _sentiment_cache_lock:
+            _sentiment_cache_writes += len(entries)
+            prune = _sentiment_cache_writes >= current_app.config.get('SENTIMENT_CACHE_PRUNE_EVERY', 1000)
+            if prune:
+                _sentiment_cache_writes = 0
+        if prune:
+            _prune_sentiment_cache_table()
+    except Exception as e:
+        # Aynı metin başka bir istekte eş zamanlı yazılmış olabilir
+        logger.warning(f"Duyarlılık önbelleğine yazılamadı: {e}")
+        db.session.rollback()
+
+def get_sentiments_finbert(texts, batch_size=None):
+    """Metin listesi için toplu duyarlılık analizi (önbellekli).
+    
+    Her metin, kullanılan modelin adı ve analiz edilen metnin özetiyle önbellekte
+    aranır (önce bellek içi LRU, sonra sentiment_cache tablosu). Yalnızca
+    bulunamayan metinler modele gönderilir. Sonuçlar giriş sırasıyla
+    (kategori, skor) listesi olarak döner.
+    """
+    model_name = get_active_sentiment_model()
+    use_finbert = model_name != 'vader'
+    
+    keys = [sentiment_cache_key(_prepare_text(text) if use_finbert else str(text), model_name) for text in texts]
+    cached = _load_cached_sentiments(list(dict.fromkeys(keys)))
+    
+    results = [cached.get(key) for key in keys]
+    missing = [i for i, value in enumerate(results) if value is None]
+    
+    if missing:
+        worker_reply = None
+        if use_finbert and sentiment_worker.is_enabled():
+            worker_reply = sentiment_worker.score_texts([texts[i] for i in missing])
+        
+        if worker_reply is not None:
+            scored, cacheable = worker_reply
+        elif use_finbert and sentiment_worker.is_enabled():
+            # Worker zaman aşımı: VADER sonuçları FinBERT anahtarıyla önbelleğe yazılmaz
+            scored = [get_sentiment_vader(texts[i]) for i in missing]
+            cacheable = [False] * len(missing)
+        elif use_finbert:
+            scored, cacheable = _score_finbert_batch([texts[i] for i in missing], batch_size)
+        else:
+            # FinBERT mevcut değilse direkt VADER kullan
+            scored = [get_sentiment_vader(texts[i]) for i in missing]
+            cacheable = [True] * len(missing)
+        
+        new_entries = {}
+        for i, value, can_cache in zip(missing, scored, cacheable):
+            results[i] = value
+            if can_cache:
+                new_entries[keys[i]] = value
+        _store_cached_sentiments(new_entries, model_name)
+    
+    logger.debug(f"Duyarlılık analizi: {len(texts)} metin, {len(texts) - len(missing)} önbellekten")
+    return results
+
 def get_sentiment_vader(text):
     """VADER ile duyarlılık analizi yap."""
     try:
         scores = vader_analyzer.polarity_scores(text)
         compound = scores['compound']
         
-        if compound >= 0.05:
-            category = "positive"
-        elif compound <= -0.05:
-            category = "negative"
-        else:
-            category = "neutral"
-        
-        return category, compound
+        return _categorize_sentiment(compound), compound
         
     except Exception as e:
         logger.error(f"VADER analizi hatası: {e}")
         return "neutral", 0.0
 
-def get_news_data(query, days_back=7, page_size=10):
-    """NewsAPI'den haber verilerini çek."""
+def _get_news_session():
+    """NewsAPI için paylaşılan (keep-alive) HTTP oturumu."""
+    global _news_session
+    
+    with _news_lock:
+        if _news_session is None:
+            pool_size = current_app.config.get('NEWS_FETCH_MAX_WORKERS', 5)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _news_session = session
+        return _news_session
+
+def _get_news_executor():
+    """NewsAPI sorguları için iş parçacığı havuzu (lazy)."""
+    global _news_executor
+    
+    with _news_lock:
+        if _news_executor is None:
+            workers = current_app.config.get('NEWS_FETCH_MAX_WORKERS', 5)
+            _news_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='news-fetch')
+        return _news_executor
+
+def _fetch_news_api(query, from_param, page_size):
+    """NewsAPI'ye tek istek at; hata durumunda None döner."""
     api_key = current_app.config.get('NEWS_API_KEY')
     
     if not api_key:
         logger.warning("NEWS_API_KEY bulunamadı")
-        return []
+        return None
     
     try:
         url = current_app.config['NEWS_API_URL']
-        from_date = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
         
         params = {
             'q': query,
@@ -164,10 +486,10 @@ def get_news_data(query, days_back=7, page_size=10):
             'language': 'en',
             'pageSize': page_size,
             'sortBy': 'publishedAt',
-            'from': from_date
+            'from': from_param
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = _get_news_session().get(url, params=params, timeout=current_app.config.get('NEWS_API_TIMEOUT_SECONDS', 10))
         response.raise_for_status()
         
         data = response.json()
@@ -180,13 +502,194 @@ def get_news_data(query, days_back=7, page_size=10):
             
     except requests.exceptions.RequestException as e:
         logger.error(f"NewsAPI isteği başarısız: {e}")
-        return []
+        return None
     except Exception as e:
         logger.error(f"Haber verisi işlenirken hata: {e}")
+        return None
+
+def _parse_published_at(value):
+    """NewsAPI publishedAt değerini (UTC, timezone'suz) datetime'a çevir."""
+    try:
+        return datetime.strptime(str(value)[:19], '%Y-%m-%dT%H:%M:%S')
+    except (ValueError, TypeError):
+        return None
+
+def _store_articles(query, articles):
+    """Yeni haberleri depoya ekle (URL'ye göre tekilleştirerek); en yeni tarihi döndür."""
+    existing_urls = {url for (url,) in db.session.query(NewsArticle.url).filter_by(search_query=query).all()}
+    newest = None
+    
+    for article in articles:
+        url = article.get('url', '')
+        published_at = _parse_published_at(article.get('publishedAt'))
+        if not url or published_at is None:
+            continue
+        
+        newest = published_at if newest is None else max(newest, published_at)
+        if url in existing_urls:
+            continue
+        existing_urls.add(url)
+        
+        db.session.add(NewsArticle(
+            search_query=query,
+            url=url,
+            title=article.get('title'),
+            description=article.get('description'),
+            source_name=(article.get('source') or {}).get('name'),
+            published_at=published_at
+        ))
+    
+    return newest
+
+def get_news_data(query, days_back=7, page_size=10):
+    """Haber verilerini yerel depodan, gerekirse NewsAPI'den artımlı çekerek al.
+    
+    Depo, sorgu için kapsadığı zaman aralığını ve görülen en yeni haberin
+    tarihini tutar. İstenen pencere depoda varsa yalnızca en yeni haberden
+    sonrası istenir (NEWS_STORE_REFRESH_SECONDS içinde hiç istenmez); yoksa
+    tüm pencere çekilir. Cevap her durumda depodan, yeniden eskiye verilir.
+    """
+    now = datetime.utcnow()
+    window_start = now - timedelta(days=days_back)
+    
+    try:
+        state = NewsQueryState.query.filter_by(search_query=query).first()
+        covered = state is not None and state.covered_from <= window_start
+        refresh_seconds = current_app.config.get('NEWS_STORE_REFRESH_SECONDS', 300)
+        
+        if not covered or (now - state.last_fetched_at).total_seconds() >= refresh_seconds:
+            if covered and state.newest_published_at is not None:
+                from_param = state.newest_published_at.strftime('%Y-%m-%dT%H:%M:%S')
+            else:
+                from_param = window_start.strftime('%Y-%m-%d')
+            
+            articles = _fetch_news_api(query, from_param, page_size)
+            
+            if articles is not None:
+                newest = _store_articles(query, articles)
+                
+                if state is None:
+                    state = NewsQueryState(search_query=query, covered_from=window_start, last_fetched_at=now)
+                    db.session.add(state)
+                if not covered:
+                    state.covered_from = min(state.covered_from, window_start)
+                if newest is not None and (state.newest_published_at is None or newest > state.newest_published_at):
+                    state.newest_published_at = newest
+                state.last_fetched_at = now
+                
+                # Saklama süresini aşan haberleri temizle
+                retention_start = now - timedelta(days=current_app.config.get('NEWS_STORE_RETENTION_DAYS', 30))
+                NewsArticle.query.filter(
+                    NewsArticle.search_query == query,
+                    NewsArticle.published_at < retention_start
+                ).delete(synchronize_session=False)
+                state.covered_from = max(state.covered_from, retention_start)
+                
+                db.session.commit()
+        
+        stored = NewsArticle.query.filter(
+            NewsArticle.search_query == query,
+            NewsArticle.published_at >= window_start
+        ).order_by(NewsArticle.published_at.desc()).limit(page_size).all()
+        
+        return [article.to_dict() for article in stored]
+        
+    except Exception as e:
+        logger.error(f"Haber deposu hatası ({query}), doğrudan NewsAPI kullanılacak: {e}")
+        db.session.rollback()
+        return _fetch_news_api(query, window_start.strftime('%Y-%m-%d'), page_size) or []
+
+def get_news_data_concurrent(queries, days_back=7, page_size=10, deadline_seconds=None):
+    """Birden fazla sorguyu eş zamanlı çek.
+    
+    Sorgular sınırlı bir iş parçacığı havuzunda paylaşılan HTTP oturumuyla
+    çalışır; toplam süre en yavaş sorgu kadardır. deadline_seconds içinde
+    bitmeyen sorgular beklenmez, o ana kadar gelen haberler (sorgu sırasıyla)
+    döndürülür.
+    """
+    queries = [query for query in queries if query]
+    if not queries:
         return []
+    
+    if deadline_seconds is None:
+        deadline_seconds = current_app.config.get('NEWS_FETCH_DEADLINE_SECONDS', 12)
+    
+    app = current_app._get_current_object()
+    
+    def fetch(query):
+        with app.app_context():
+            return get_news_data(query, days_back=days_back, page_size=page_size)
+    
+    executor = _get_news_executor()
+    futures = [executor.submit(fetch, query) for query in queries]
+    done, not_done = wait(futures, timeout=deadline_seconds)
+    
+    if not_done:
+        pending_queries = [query for query, future in zip(queries, futures) if future in not_done]
+        logger.warning(f"NewsAPI süre sınırı ({deadline_seconds} sn) aşıldı, kısmi sonuç kullanılacak: {pending_queries}")
+        for future in not_done:
+            future.cancel()
+    
+    all_articles = []
+    for future in futures:
+        if future in done:
+            try:
+                all_articles.extend(future.result())
+            except Exception as e:
+                logger.error(f"Haber sorgusu hatası: {e}")
+    
+    return all_articles
 
-def analyze_news_sentiment(articles):
-    """Haber listesinin duyarlılığını analiz et."""
+def _get_duplicate_index():
+    """Yakın kopya haber indeksi (lazy)."""
+    global _duplicate_index
+    
+    with _sentiment_cache_lock:
+        if _duplicate_index is None:
+            _duplicate_index = MinHashIndex(
+                threshold=current_app.config.get('NEWS_DEDUP_THRESHOLD', 0.7),
+                maxsize=current_app.config.get('NEWS_DEDUP_INDEX_SIZE', 10000)
+            )
+        return _duplicate_index
+
+def _cluster_near_duplicates(candidates):
+    """Başlık + açıklaması neredeyse aynı haberleri kümele.
+    
+    Farklı URL'lerle yayılan ajans haberleri tek kümede toplanır. Her küme için
+    temsilci metin döner; önceki çağrılarda görülmüş bir kümenin temsilcisi
+    kullanılır, böylece skor duyarlılık önbelleğinden gelir.
+    """
+    if not current_app.config.get('NEWS_DEDUP_ENABLED', True):
+        return [{'article': article, 'text': text, 'score_text': text, 'duplicate_count': 1}
+                for article, text in candidates]
+    
+    index = _get_duplicate_index()
+    clusters = []
+    cluster_positions = {}
+    
+    for article, text in candidates:
+        signature = minhash_signature(f"{article.get('title') or ''} {article.get('description') or ''}")
+        representative = index.find(signature)
+        if representative is None:
+            representative = text
+            index.add(signature, text)
+        
+        if representative in cluster_positions:
+            clusters[cluster_positions[representative]]['duplicate_count'] += 1
+            continue
+        
+        cluster_positions[representative] = len(clusters)
+        clusters.append({'article': article, 'text': text, 'score_text': representative, 'duplicate_count': 1})
+    
+    return clusters
+
+def analyze_news_sentiment(articles, max_articles=None):
+    """Haber listesinin duyarlılığını analiz et.
+    
+    Yakın kopya haberler tek kümede sayılır ve yalnızca temsilcisi skorlanır;
+    ortalama küme başına hesaplanır. max_articles, kümelemeden sonra
+    uygulanan farklı haber sınırıdır.
+    """
     if not articles:
         return {
             'articles': [],
@@ -199,31 +702,36 @@ def analyze_news_sentiment(articles):
     sentiment_scores = []
     sentiment_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
     
+    # Analiz edilecek haberler (açıklama yoksa başlık kullanılır)
+    candidates = []
     for article in articles:
-        title = article.get('title', '')
-        description = article.get('description', '')
-        url = article.get('url', '')
-        published_at = article.get('publishedAt', '')
-        
-        # Analiz için metni seç
-        text_to_analyze = description if description else title
+        text_to_analyze = article.get('description', '') or article.get('title', '')
+        if text_to_analyze and article.get('url', ''):
+            candidates.append((article, text_to_analyze))
+    
+    clusters = _cluster_near_duplicates(candidates)
+    if max_articles:
+        clusters = clusters[:max_articles]
+    
+    # Duyarlılık analizi - küme temsilcileri tek seferde
+    sentiments = get_sentiments_finbert([cluster['score_text'] for cluster in clusters])
+    
+    for cluster, (category, score) in zip(clusters, sentiments):
+        article = cluster['article']
+        sentiment_scores.append(score)
+        sentiment_counts[category] += 1
         
-        if text_to_analyze and url:
-            # Duyarlılık analizi yap
-            category, score = get_sentiment_finbert(text_to_analyze)
-            
-            sentiment_scores.append(score)
-            sentiment_counts[category] += 1
-            
-            analyzed_articles.append({
-                'title': title,
-                'description': description,
-                'url': url,
-                'published_at': published_at,
-                'sentiment_category': category,
-                'sentiment_score': score,
-                'analyzed_text': text_to_analyze
-            })
+        analyzed_articles.append({
+            'title': article.get('title', ''),
+            'description': article.get('description', ''),
+            'url': article.get('url', ''),
+            'published_at': article.get('publishedAt', ''),
+            'sentiment_category': category,
+            'sentiment_score': score,
+            'source': (article.get('source') or {}).get('name', ''),
+            'analyzed_text': cluster['text'],
+            'duplicate_count': cluster['duplicate_count']
+        })
     
     # Ortalama duyarlılık hesapla
     average_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0.0
@@ -235,17 +743,53 @@ def analyze_news_sentiment(articles):
         'total_count': len(analyzed_articles)
     }
 
+def _stock_news_queries(stock_name, ticker):
+    """Hisse haberleri için arama terimleri (şirket adı ve borsa eki olmadan kod)."""
+    return [query for query in (stock_name, ticker.replace('.IS', '')) if query]
+
+def get_news_version(stock_name, ticker, days_back=7):
+    """Hisse haber analizinin girdilerinin sürüm anahtarı (haber çekilmez).
+    
+    Etkin duyarlılık modeli ve sorguların depodaki en yeni haber tarihinden
+    oluşur. Bir sorgunun penceresi depoda yoksa ya da yenileme zamanı
+    geldiyse (NEWS_STORE_REFRESH_SECONDS) None döner: sonraki analiz
+    haberleri çekmelidir. NEWS_API_KEY yoksa haberler hep boştur.
+    """
+    model_name = get_active_sentiment_model()
+    if not current_app.config.get('NEWS_API_KEY'):
+        return f"{model_name}|no-api"
+    
+    queries = _stock_news_queries(stock_name, ticker)
+    now = datetime.utcnow()
+    window_start = now - timedelta(days=days_back)
+    refresh_seconds = current_app.config.get('NEWS_STORE_REFRESH_SECONDS', 300)
+    
+    try:
+        states = {
+            state.search_query: state
+            for state in NewsQueryState.query.filter(NewsQueryState.search_query.in_(queries)).all()
+        }
+    except Exception as e:
+        logger.warning(f"Haber deposu sürümü okunamadı ({ticker}): {e}")
+        db.session.rollback()
+        return None
+    
+    parts = [model_name]
+    for query in queries:
+        state = states.get(query)
+        if state is None or state.covered_from > window_start or \
+                (now - state.last_fetched_at).total_seconds() >= refresh_seconds:
+            return None
+        parts.append(state.newest_published_at.strftime('%Y%m%d%H%M%S') if state.newest_published_at else '-')
+    
+    return '|'.join(parts)
+
 def get_stock_news_analysis(stock_name, ticker, days_back=7):
     """Hisse senedi için haber analizi yap."""
     try:
         # Farklı arama terimleri dene
-        search_queries = [stock_name, ticker.replace('.IS', '')]
-        all_articles = []
-        
-        for query in search_queries:
-            if query:
-                articles = get_news_data(query, days_back=days_back)
-                all_articles.extend(articles)
+        search_queries = _stock_news_queries(stock_name, ticker)
+        all_articles = get_news_data_concurrent(search_queries, days_back=days_back)
         
         # Tekrar eden haberleri temizle (URL'ye göre)
         seen_urls = set()
@@ -257,7 +801,20 @@ def get_stock_news_analysis(stock_name, ticker, days_back=7):
                 unique_articles.append(article)
         
         # Duyarlılık analizi yap
-        analysis_result = analyze_news_sentiment(unique_articles[:20])  # En fazla 20 haber
+        analysis_result = analyze_news_sentiment(unique_articles, max_articles=20)  # En fazla 20 farklı haber
+        
+        # Yeni haberleri hissenin sönümlü duyarlılık durumuna ekle
+        sentiment_aggregator.update_ticker_sentiment(ticker, [
+            {
+                'key': sentiment_aggregator.article_key(article['url']),
+                'score': article['sentiment_score'],
+                'source': article['source'],
+                'published_at': _parse_published_at(article['published_at'])
+            }
+            for article in analysis_result['articles']
+        ])
+        analysis_result['decayed_sentiment'] = sentiment_aggregator.get_ticker_sentiment(ticker)
+        analysis_result['daily_sentiment'] = sentiment_aggregator.get_daily_sentiment(ticker)
         
         logger.info(f"{ticker} için {len(analysis_result['articles'])} haber analiz edildi")
         
@@ -277,11 +834,7 @@ def get_market_sentiment():
     try:
         # Genel piyasa haberlerini çek
         market_terms = ["stock market", "financial markets", "economy", "inflation", "interest rates"]
-        all_articles = []
-        
-        for term in market_terms:
-            articles = get_news_data(term, days_back=3, page_size=5)
-            all_articles.extend(articles)
+        all_articles = get_news_data_concurrent(market_terms, days_back=3, page_size=5)
         
         # Tekrar eden haberleri temizle
         seen_urls = set()
@@ -293,7 +846,7 @@ def get_market_sentiment():
                 unique_articles.append(article)
         
         # Duyarlılık analizi yap
-        analysis_result = analyze_news_sentiment(unique_articles[:30])
+        analysis_result = analyze_news_sentiment(unique_articles, max_articles=30)
         
         return {
             'sentiment_score': analysis_result['average_sentiment'],
@@ -307,4 +860,83 @@ def get_market_sentiment():
             'sentiment_score': 0.0,
             'article_count': 0,
             'distribution': {'positive': 0, 'neutral': 0, 'negative': 0}
-        } 
\ No newline at end of file
+        } 
+
+def refresh_market_sentiment():
+    """Piyasa duyarlılığını hesapla ve anlık görüntü olarak sakla (bellek + veritabanı)."""
+    market_sentiment = get_market_sentiment()
+    now = datetime.utcnow()
+    
+    try:
+        snapshot = MarketSentimentSnapshot(
+            sentiment_score=market_sentiment['sentiment_score'],
+            article_count=market_sentiment['article_count'],
+            distribution=market_sentiment['distribution'],
+            created_at=now
+        )
+        db.session.add(snapshot)
+        db.session.commit()
+    except Exception as e:
+        logger.error(f"Piyasa duyarlılığı kaydedilemedi: {e}")
+        db.session.rollback()
+    
+    data = dict(market_sentiment, updated_at=now.isoformat() + 'Z')
+    _market_sentiment_snapshot['data'] = data
+    _market_sentiment_snapshot['timestamp'] = now
+    
+    logger.info(f"Piyasa duyarlılığı güncellendi - {data['article_count']} haber, skor {data['sentiment_score']:.2f}")
+    return data
+
+def get_market_sentiment_snapshot():
+    """Son piyasa duyarlılığı anlık görüntüsü - NewsAPI çağrısı yapmaz.
+    
+    Bellekte yoksa (ya da eskiyse) veritabanındaki son kayıt okunur; hiç kayıt
+    yoksa None döner.
+    """
+    # Yenileyici başka bir süreçte olabilir (ör. gunicorn master); bellekteki kopya
+    # yenileme aralığından eskiyse veritabanından tekrar okunur
+    if _market_sentiment_snapshot.get('data') is not None:
+        age_seconds = (datetime.utcnow() - _market_sentiment_snapshot['timestamp']).total_seconds()
+        if age_seconds < current_app.config.get('MARKET_SENTIMENT_REFRESH_SECONDS', 900):
+            return _market_sentiment_snapshot['data']
+    
+    try:
+        snapshot = MarketSentimentSnapshot.query.order_by(MarketSentimentSnapshot.created_at.desc()).first()
+    except Exception as e:
+        logger.warning(f"Piyasa duyarlılığı anlık görüntüsü okunamadı: {e}")
+        return None
+    
+    if snapshot is None:
+        return _market_sentiment_snapshot.get('data')
+    
+    _market_sentiment_snapshot['data'] = snapshot.to_dict()
+    _market_sentiment_snapshot['timestamp'] = snapshot.created_at
+    return _market_sentiment_snapshot['data']
+
+def start_market_sentiment_refresher(app):
+    """Piyasa duyarlılığını periyodik yenileyen arka plan iş parçacığını başlat."""
+    global _market_sentiment_refresher
+    
+    if _market_sentiment_refresher is not None and _market_sentiment_refresher.is_alive():
+        return _market_sentiment_refresher
+    
+    interval = app.config.get('MARKET_SENTIMENT_REFRESH_SECONDS', 900)
+    _market_sentiment_stop.clear()
+    
+    def refresh_loop():
+        while not _market_sentiment_stop.is_set():
+            try:
+                with app.app_context():
+                    refresh_market_sentiment()
+            except Exception as e:
+                logger.error(f"Piyasa duyarlılığı yenileme hatası: {e}")
+            _market_sentiment_stop.wait(interval)
+    
+    _market_sentiment_refresher = threading.Thread(target=refresh_loop, name='market-sentiment-refresher', daemon=True)
+    _market_sentiment_refresher.start()
+    logger.info(f"Piyasa duyarlılığı yenileyicisi başlatıldı ({interval} sn aralıkla)")
+    return _market_sentiment_refresher
+
+def stop_market_sentiment_refresher():
+    """Arka plan yenileyicisini durdur."""
+    _market_sentiment_stop.set()
@@ -2,8 +2,17 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
-from flask import current_app
+import json
+import os
+import re
+import time
+from flask import current_app, has_app_context
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import threading
 import pytz
+from app.services import fast_forecast_service, backtest_service, tuning_service, forecast_service
+from config import Config
+from app.services.stock_service import get_data_version
 
 # Modern ML models
 try:
@@ -34,6 +43,35 @@ logger = logging.getLogger(__name__)
 # Önbellek
 _prediction_cache = {}
 
+# Hızlı yol sonrası arka planda tamamlanan ensemble tahminleri
+_refined_prediction_cache = {}
+_refine_in_progress = set()
+_refine_lock = threading.Lock()
+_refine_executor = None
+
+# Prophet sezonsallık profilleri (Config.PROPHET_SEASONALITY_PROFILE)
+PROPHET_SEASONALITY_PROFILES = {
+    'trading': {'daily_seasonality': False, 'weekly_seasonality': 3, 'yearly_seasonality': 'auto'},
+    'full': {'daily_seasonality': True, 'weekly_seasonality': True, 'yearly_seasonality': True},
+}
+PROPHET_SETTING_KEYS = (
+    'PROPHET_SEASONALITY_PROFILE', 'PROPHET_USE_VOLUME_REGRESSOR', 'PROPHET_PARAMS', 'PROPHET_MAX_ITER',
+    'PROPHET_UNCERTAINTY_SAMPLES', 'PROPHET_FIT_TIMEOUT_SECONDS', 'PROPHET_WARM_START', 'PROPHET_STATE_DIR'
+)
+
+# Prophet fit durumu: ticker -> {'data': {'signature', 'data_version', 'init', 'model'}, 'timestamp'}
+_prophet_state_cache = {}
+_prophet_state_lock = threading.Lock()
+_prophet_fit_executor = None
+
+# Süre sınırlı fit'ler için havuz boyutu. Süresi aşan fit bitene kadar yerini
+# tutar; boş yer yoksa yeni fit kuyruğa alınmaz, Prophet atlanır
+PROPHET_FIT_WORKERS = 2
+_prophet_fit_slots = threading.BoundedSemaphore(PROPHET_FIT_WORKERS)
+
+class ProphetFitBusyError(Exception):
+    """Prophet fit havuzunda boş yer yok."""
+
 def safe_datetime_diff(date1, date2):
     """Güvenli datetime fark hesaplama - timezone sorunlarını çözer."""
     try:
@@ -150,51 +188,61 @@ def calculate_rsi(prices, window=14):
     rsi = 100 - (100 / (1 + rs))
     return rsi
 
-def predict_with_lightgbm(df, prediction_days=7):
-    """LightGBM ile tahmin."""
+def build_training_set(features_df):
+    """Özellik tablosundan (X, y) eğitim setini oluştur - hedef: ertesi günün kapanışı."""
+    features_df = features_df.copy()
+    features_df['target'] = features_df['Close'].shift(-1)
+    features_df = features_df.dropna()
+    
+    feature_columns = [col for col in features_df.columns if col not in ['target', 'Open', 'High', 'Low', 'Close', 'Volume']]
+    
+    return features_df[feature_columns], features_df['target']
+
+def get_lightgbm_params():
+    """Config'deki LightGBM parametreleri (app context dışında, ör. process havuzunda da çalışır)."""
+    if has_app_context():
+        return dict(current_app.config.get('LIGHTGBM_PARAMS', Config.LIGHTGBM_PARAMS))
+    return dict(Config.LIGHTGBM_PARAMS)
+
+def get_random_forest_params():
+    """Config'deki RandomForest parametreleri."""
+    if has_app_context():
+        return dict(current_app.config.get('RANDOM_FOREST_PARAMS', Config.RANDOM_FOREST_PARAMS))
+    return dict(Config.RANDOM_FOREST_PARAMS)
+
+def predict_with_lightgbm(df, prediction_days=7, features_df=None, params=None):
+    """LightGBM ile tahmin.
+    
+    features_df verilirse (ör. ensemble ya da backtest katları) özellikler
+    yeniden hesaplanmaz. params verilmezse Config.LIGHTGBM_PARAMS kullanılır;
+    'num_boost_round' anahtarı (ayarlanmış parametrelerde) tur sayısını belirler.
+    """
     if not LIGHTGBM_AVAILABLE:
         return None
     
     try:
         logger.info("LightGBM ile tahmin başlatılıyor...")
         
-        # Feature engineering
-        features_df = create_features(df)
-        
-        # Target variable (gelecek günün kapanış fiyatı)
-        features_df['target'] = features_df['Close'].shift(-1)
+        # Feature engineering (önceden hesaplanmışsa yeniden kullan)
+        if features_df is None:
+            features_df = create_features(df)
         
-        # NaN değerleri temizle
-        features_df = features_df.dropna()
+        # Hedef: gelecek günün kapanış fiyatı, NaN satırlar temizlenir
+        X, y = build_training_set(features_df)
+        feature_columns = list(X.columns)
         
-        if len(features_df) < 50:
+        if len(X) < 50:
             logger.warning("LightGBM için yeterli veri yok")
             return None
         
-        # Feature seçimi
-        feature_columns = [col for col in features_df.columns if col not in ['target', 'Open', 'High', 'Low', 'Close', 'Volume']]
-        
-        X = features_df[feature_columns]
-        y = features_df['target']
-        
         # Train/validation split
         train_size = int(len(X) * 0.8)
         X_train, X_val = X[:train_size], X[train_size:]
         y_train, y_val = y[:train_size], y[train_size:]
         
-        # LightGBM parametreleri
-        params = {
-            'objective': 'regression',
-            'metric': 'mae',
-            'boosting_type': 'gbdt',
-            'num_leaves': 31,
-            'learning_rate': 0.05,
-            'feature_fraction': 0.9,
-            'bagging_fraction': 0.8,
-            'bagging_freq': 5,
-            'verbose': -1,
-            'random_state': 42
-        }
+        # LightGBM parametreleri (Config veya hisseye özel ayarlanmış)
+        params = dict(params) if params is not None else get_lightgbm_params()
+        num_boost_round = params.pop('num_boost_round', 1000)
         
         # Model training
         train_data = lgb.Dataset(X_train, label=y_train)
@@ -204,7 +252,7 @@ def predict_with_lightgbm(df, prediction_days=7):
             params,
             train_data,
             valid_sets=[val_data],
-            num_boost_round=1000,
+            num_boost_round=num_boost_round,
             callbacks=[lgb.early_stopping(50), lgb.log_evaluation(0)]
         )
         
@@ -243,13 +291,138 @@ def predict_with_lightgbm(df, prediction_days=7):
         logger.error(f"LightGBM tahmin hatası: {e}")
         return None
 
-def predict_with_prophet(df, prediction_days=7):
-    """Prophet ile tahmin."""
+def get_prophet_settings():
+    """Config'deki Prophet ayarları (app context dışında, ör. process havuzunda da çalışır)."""
+    if has_app_context():
+        return {key: current_app.config.get(key, getattr(Config, key)) for key in PROPHET_SETTING_KEYS}
+    return {key: getattr(Config, key) for key in PROPHET_SETTING_KEYS}
+
+def _prophet_model_kwargs(settings, df):
+    """Profil ve Config parametrelerinden Prophet yapıcı argümanlarını oluştur."""
+    profile = settings['PROPHET_SEASONALITY_PROFILE']
+    kwargs = dict(PROPHET_SEASONALITY_PROFILES.get(profile, PROPHET_SEASONALITY_PROFILES['trading']))
+    
+    # 'auto' kararını burada ver: imza (ve dolayısıyla Stan parametre boyutları) veriyle değişmesin
+    if kwargs['yearly_seasonality'] == 'auto':
+        span_days = safe_datetime_diff(normalize_datetime(df.index[-1]), normalize_datetime(df.index[0]))
+        kwargs['yearly_seasonality'] = span_days >= 730
+    
+    kwargs.update(settings['PROPHET_PARAMS'])
+    kwargs['uncertainty_samples'] = settings['PROPHET_UNCERTAINTY_SAMPLES']
+    return kwargs
+
+def _prophet_signature(model_kwargs, use_volume):
+    """Warm start uyumluluğu için model yapısının imzası."""
+    structure = {key: value for key, value in model_kwargs.items() if key != 'uncertainty_samples'}
+    structure['volume'] = use_volume
+    return json.dumps(structure, sort_keys=True, default=str)
+
+def _prophet_stan_init(model):
+    """Fit edilmiş modelin parametrelerini Stan başlangıç değerlerine çevir."""
+    init = {name: float(model.params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+    for name in ('delta', 'beta'):
+        init[name] = [float(value) for value in model.params[name][0]]
+    return init
+
+def _prophet_state_path(state_dir, ticker):
+    """Hisse için Prophet durum dosyasının yolu."""
+    return os.path.join(state_dir, re.sub(r'[^A-Za-z0-9_.-]', '_', ticker) + '.json')
+
+def _load_prophet_state(ticker, state_dir):
+    """Önce bellekten, yoksa diskten önceki fit durumunu al."""
+    cached_entry = _prophet_state_cache.get(ticker)
+    if cached_entry is not None:
+        return cached_entry['data']
+    
+    try:
+        with open(_prophet_state_path(state_dir, ticker), 'r', encoding='utf-8') as state_file:
+            state = json.load(state_file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"{ticker} Prophet durumu okunamadı: {e}")
+        return None
+    
+    state['model'] = None
+    _prophet_state_cache[ticker] = {
+        'data': state,
+        'timestamp': datetime.now()
+    }
+    return state
+
+def _save_prophet_state(ticker, state_dir, signature, data_version, model):
+    """Fit durumunu belleğe ve (başlangıç değerlerini) diske yaz."""
+    state = {
+        'signature': signature,
+        'data_version': data_version,
+        'init': _prophet_stan_init(model),
+        'model': model
+    }
+    with _prophet_state_lock:
+        _prophet_state_cache[ticker] = {
+            'data': state,
+            'timestamp': datetime.now()
+        }
+    
+    try:
+        os.makedirs(state_dir, exist_ok=True)
+        path = _prophet_state_path(state_dir, ticker)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as state_file:
+            json.dump({key: state[key] for key in ('signature', 'data_version', 'init')}, state_file)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"{ticker} Prophet durumu kaydedilemedi: {e}")
+
+def _get_prophet_fit_executor():
+    """Süre sınırlı Prophet fit'leri için iş parçacığı havuzu (lazy)."""
+    global _prophet_fit_executor
+    
+    with _prophet_state_lock:
+        if _prophet_fit_executor is None:
+            _prophet_fit_executor = ThreadPoolExecutor(max_workers=PROPHET_FIT_WORKERS, thread_name_prefix='prophet-fit')
+        return _prophet_fit_executor
+
+def _fit_prophet(model, prophet_df, fit_kwargs, timeout):
+    """Prophet'i fit et; timeout saniyeyi aşarsa FuturesTimeoutError fırlatır.
+    
+    Stan fit'i yarıda kesilemediği için süresi aşan fit havuzda bitene kadar
+    çalışır. Havuzda boş yer yoksa fit beklemeye alınmaz, ProphetFitBusyError
+    fırlatılır; böylece arka arkaya gelen istekler kuyrukta birikip sınırı aşmaz.
+    """
+    if not timeout:
+        return model.fit(prophet_df, **fit_kwargs)
+    
+    if not _prophet_fit_slots.acquire(blocking=False):
+        raise ProphetFitBusyError()
+    
+    def fit():
+        try:
+            return model.fit(prophet_df, **fit_kwargs)
+        finally:
+            _prophet_fit_slots.release()
+    
+    try:
+        future = _get_prophet_fit_executor().submit(fit)
+    except Exception:
+        _prophet_fit_slots.release()
+        raise
+    return future.result(timeout=timeout)
+
+def predict_with_prophet(df, prediction_days=7, ticker=None):
+    """Prophet ile tahmin.
+    
+    ticker verilirse fit durumu hisse bazında saklanır: aynı veri sürümü için
+    fit edilmiş model yeniden kullanılır, yeni veride Stan önceki fit'in
+    parametrelerinden başlatılır (warm start). Sezonsallık profili, hacim
+    regresörü, iterasyon ve süre sınırı Config'den gelir.
+    """
     if not PROPHET_AVAILABLE:
         return None
     
     try:
         logger.info("Prophet ile tahmin başlatılıyor...")
+        settings = get_prophet_settings()
         
         # Prophet için veri hazırlama
         prophet_df = pd.DataFrame()
@@ -260,23 +433,61 @@ def predict_with_prophet(df, prediction_days=7):
             logger.warning("Prophet için yeterli veri yok")
             return None
         
-        # Model oluşturma ve eğitim
-        model = Prophet(
-            daily_seasonality=True,
-            weekly_seasonality=True,
-            yearly_seasonality=True,
-            changepoint_prior_scale=0.05,
-            seasonality_prior_scale=10.0,
-            holidays_prior_scale=10.0,
-            seasonality_mode='multiplicative'
-        )
+        use_volume = bool(settings['PROPHET_USE_VOLUME_REGRESSOR']) and 'Volume' in df.columns
+        model_kwargs = _prophet_model_kwargs(settings, df)
+        signature = _prophet_signature(model_kwargs, use_volume)
+        data_version = get_data_version(df) if ticker else None
         
-        # Volume özelliği ekleme
-        if 'Volume' in df.columns:
-            model.add_regressor('volume')
+        state = _load_prophet_state(ticker, settings['PROPHET_STATE_DIR']) if ticker else None
+        if state is not None and state['signature'] != signature:
+            state = None
+        
+        if use_volume:
             prophet_df['volume'] = df['Volume'].values
         
-        model.fit(prophet_df)
+        fit_seconds = 0.0
+        warm_started = False
+        
+        if state is not None and state['model'] is not None and state['data_version'] == data_version:
+            # Aynı veri için fit edilmiş model - yeniden eğitme
+            model = state['model']
+            logger.info(f"{ticker} için fit edilmiş Prophet modeli yeniden kullanılıyor")
+        else:
+            def build_model():
+                model = Prophet(**model_kwargs)
+                if use_volume:
+                    model.add_regressor('volume')
+                return model
+            
+            fit_kwargs = {}
+            if settings['PROPHET_MAX_ITER']:
+                fit_kwargs['iter'] = settings['PROPHET_MAX_ITER']
+            if state is not None and settings['PROPHET_WARM_START']:
+                fit_kwargs['init'] = state['init']
+                warm_started = True
+            
+            timeout = settings['PROPHET_FIT_TIMEOUT_SECONDS']
+            fit_started = time.perf_counter()
+            model = build_model()
+            try:
+                _fit_prophet(model, prophet_df, fit_kwargs, timeout)
+            except (FuturesTimeoutError, ProphetFitBusyError):
+                raise
+            except Exception as e:
+                if not warm_started:
+                    raise
+                # Uyumsuz başlangıç değerleri - soğuk fit
+                logger.warning(f"Prophet warm start başarısız, soğuk fit yapılacak: {e}")
+                fit_kwargs.pop('init', None)
+                warm_started = False
+                model = build_model()
+                _fit_prophet(model, prophet_df, fit_kwargs, timeout)
+            fit_seconds = time.perf_counter() - fit_started
+            
+            if ticker:
+                _save_prophet_state(ticker, settings['PROPHET_STATE_DIR'], signature, data_version, model)
+            
+            logger.info(f"Prophet fit süresi: {fit_seconds:.2f} sn ({'warm start' if warm_started else 'soğuk başlangıç'})")
         
         # Gelecek iş günleri için tahmin
         last_date = df.index[-1]
@@ -298,7 +509,7 @@ def predict_with_prophet(df, prediction_days=7):
         # Future dataframe oluştur
         future = pd.DataFrame({'ds': future_business_days})
         
-        if 'Volume' in df.columns:
+        if use_volume:
             # Volume için basit extrapolation (son 5 günün ortalaması)
             avg_volume = df['Volume'].tail(5).mean()
             future['volume'] = avg_volume
@@ -317,36 +528,57 @@ def predict_with_prophet(df, prediction_days=7):
             'trend': forecast['trend'].iloc[-1] if len(forecast) > 0 else 0,
             'uncertainty': uncertainty,
             'forecast_data': forecast,
-            'future_dates': future_business_days
+            'future_dates': future_business_days,
+            'fit_seconds': fit_seconds,
+            'warm_started': warm_started
         }
         
         logger.info(f"Prophet tahmin tamamlandı - Confidence: {confidence:.2f}")
         logger.info(f"Prophet tahmin tarihleri: {future_business_days[0].date()} - {future_business_days[-1].date()}")
         return result
         
+    except FuturesTimeoutError:
+        logger.warning(f"Prophet fit süre sınırını aştı ({settings['PROPHET_FIT_TIMEOUT_SECONDS']} sn), atlanıyor")
+        return None
+    except ProphetFitBusyError:
+        logger.warning("Prophet fit havuzu dolu (önceki fit'ler sürüyor), atlanıyor")
+        return None
     except Exception as e:
         logger.error(f"Prophet tahmin hatası: {e}")
         return None
 
-def predict_with_ensemble(df, prediction_days=7):
-    """Ensemble model (LightGBM + Prophet + RandomForest)."""
+def predict_with_ensemble(df, prediction_days=7, model_weights=None, model_params=None, ticker=None):
+    """Ensemble model (LightGBM + Prophet + RandomForest).
+    
+    ticker, Prophet fit durumunun hisse bazında yeniden kullanılması içindir.
+    model_weights (model adı -> ağırlık) verilirse, örneğin walk-forward backtest
+    sonuçlarından, modellerin kendi bildirdiği confidence yerine kullanılır.
+    model_params ('lightgbm' / 'random_forest' -> parametreler) ayarlanmış
+    hiperparametreleri taşır.
+    """
+    model_params = model_params or {}
     logger.info("Ensemble tahmin başlatılıyor...")
     
     results = []
     
+    # Özellikler LightGBM ve RandomForest arasında paylaşılır
+    features_df = create_features(df) if (LIGHTGBM_AVAILABLE or SKLEARN_AVAILABLE) else None
+    
     # LightGBM
-    lgb_result = predict_with_lightgbm(df, prediction_days)
+    lgb_result = predict_with_lightgbm(df, prediction_days, features_df=features_df,
+                                       params=model_params.get('lightgbm'))
     if lgb_result:
         results.append(lgb_result)
     
     # Prophet
-    prophet_result = predict_with_prophet(df, prediction_days)
+    prophet_result = predict_with_prophet(df, prediction_days, ticker=ticker)
     if prophet_result:
         results.append(prophet_result)
     
     # RandomForest (fallback)
     if SKLEARN_AVAILABLE:
-        rf_result = predict_with_random_forest(df, prediction_days)
+        rf_result = predict_with_random_forest(df, prediction_days, features_df=features_df,
+                                               params=model_params.get('random_forest'))
         if rf_result:
             results.append(rf_result)
     
@@ -355,7 +587,15 @@ def predict_with_ensemble(df, prediction_days=7):
         return None
     
     # Ensemble predictions (weighted average)
-    weights = [r['confidence'] for r in results]
+    known_weights = [model_weights[r['model_name']] for r in results
+                     if model_weights and model_weights.get(r['model_name'])]
+    if known_weights:
+        # Backtest'i olmayan model en düşük ölçülmüş ağırlığı alır
+        weights = [model_weights.get(r['model_name']) or min(known_weights) for r in results]
+        weight_source = 'backtest'
+    else:
+        weights = [r['confidence'] for r in results]
+        weight_source = 'confidence'
     total_weight = sum(weights)
     
     if total_weight == 0:
@@ -379,13 +619,15 @@ def predict_with_ensemble(df, prediction_days=7):
         'confidence': ensemble_confidence,
         'individual_models': [r['model_name'] for r in results],
         'model_count': len(results),
-        'weights': dict(zip([r['model_name'] for r in results], weights))
+        'weights': dict(zip([r['model_name'] for r in results], weights)),
+        'weight_source': weight_source,
+        'model_predictions': {r['model_name']: [float(p) for p in r['predictions'][:prediction_days]] for r in results}
     }
     
     logger.info(f"Ensemble tahmin tamamlandı - {len(results)} model, Confidence: {ensemble_confidence:.2f}")
     return result
 
-def predict_with_random_forest(df, prediction_days=7):
+def predict_with_random_forest(df, prediction_days=7, features_df=None, params=None):
     """RandomForest ile tahmin (fallback)."""
     if not SKLEARN_AVAILABLE:
         return None
@@ -393,28 +635,27 @@ def predict_with_random_forest(df, prediction_days=7):
     try:
         logger.info("RandomForest ile tahmin başlatılıyor...")
         
-        # Feature engineering
-        features_df = create_features(df)
-        features_df['target'] = features_df['Close'].shift(-1)
-        features_df = features_df.dropna()
+        # Feature engineering (önceden hesaplanmışsa yeniden kullan)
+        if features_df is None:
+            features_df = create_features(df)
         
-        if len(features_df) < 30:
-            return None
+        X, y = build_training_set(features_df)
         
-        # Feature selection
-        feature_columns = [col for col in features_df.columns if col not in ['target', 'Open', 'High', 'Low', 'Close', 'Volume']]
+        if len(X) < 30:
+            return None
         
-        X = features_df[feature_columns]
-        y = features_df['target']
+        # Model (Config veya hisseye özel ayarlanmış parametreler)
+        params = params if params is not None else get_random_forest_params()
         
-        # Model
-        model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42,
-            n_jobs=-1
-        )
+        # Güven, LightGBM'deki gibi zaman sıralı %20 doğrulama hatasından
+        train_size = int(len(X) * 0.8)
+        validation_model = RandomForestRegressor(**params)
+        validation_model.fit(X[:train_size], y[:train_size])
+        mae = mean_absolute_error(y[train_size:], validation_model.predict(X[train_size:]))
+        confidence = max(0.1, min(0.9, 1 - (mae / y.mean())))
         
+        # Tahmin modeli son barlar dahil tüm veriyle eğitilir
+        model = RandomForestRegressor(**params)
         model.fit(X, y)
         
         # Predictions
@@ -425,24 +666,181 @@ def predict_with_random_forest(df, prediction_days=7):
             pred = model.predict(last_features)[0]
             predictions.append(pred)
         
-        # Simple confidence based on feature importance variance
-        confidence = 0.6  # Default medium confidence for RF
-        
         result = {
             'model_name': 'RandomForest',
             'predictions': predictions,
-            'confidence': confidence
+            'confidence': confidence,
+            'mae': mae
         }
         
-        logger.info(f"RandomForest tahmin tamamlandı")
+        logger.info(f"RandomForest tahmin tamamlandı - MAE: {mae:.2f}, Confidence: {confidence:.2f}")
         return result
         
     except Exception as e:
         logger.error(f"RandomForest tahmin hatası: {e}")
         return None
 
-def predict_stock_price(ticker, stock_data, prediction_days=7):
-    """Ana tahmin fonksiyonu - en iyi mevcut modeli kullan."""
+def _run_heavy_prediction(ticker, stock_data, prediction_days):
+    """Ağır modelleri çalıştır - önce ensemble, başarısız olursa en iyi tek model."""
+    model_weights = backtest_service.get_ensemble_weights(ticker, prediction_days)
+    if model_weights is None and current_app.config.get('BACKTEST_AUTO_RUN', False):
+        backtest_service.schedule_backtest(ticker, stock_data, prediction_days)
+    
+    model_params = tuning_service.get_tuned_params(ticker) or {}
+    
+    result = predict_with_ensemble(stock_data, prediction_days, model_weights=model_weights,
+                                   model_params=model_params, ticker=ticker)
+    
+    if not result:
+        if LIGHTGBM_AVAILABLE:
+            result = predict_with_lightgbm(stock_data, prediction_days, params=model_params.get('lightgbm'))
+        elif PROPHET_AVAILABLE:
+            result = predict_with_prophet(stock_data, prediction_days, ticker=ticker)
+        elif SKLEARN_AVAILABLE:
+            result = predict_with_random_forest(stock_data, prediction_days, params=model_params.get('random_forest'))
+    
+    return result
+
+def _finalize_prediction(ticker, result, stock_data, last_data_date, prediction_days):
+    """Ham model çıktısına gerçek fiyat, tarih ve tahmin tablosunu ekle."""
+    # Son gerçek fiyat ve tahmin verilerini ekle
+    result['last_actual_price'] = float(stock_data['Close'].iloc[-1])
+    result['last_data_date'] = last_data_date.strftime('%Y-%m-%d')
+    result['prediction_horizon_days'] = prediction_days
+    
+    # Gelecek tarihler için güvenli hesaplama
+    try:
+        # Başlangıç tarihini güvenli şekilde hesapla
+        start_date = last_data_date + timedelta(days=1)
+        while start_date.weekday() >= 5:  # Hafta sonunu atla
+            start_date += timedelta(days=1)
+        
+        # İş günlerini hesapla
+        future_dates = pd.bdate_range(
+            start=start_date,
+            periods=prediction_days,
+            freq='B'
+        )
+        
+        # Timezone bilgisini temizle
+        future_dates = future_dates.tz_localize(None) if future_dates.tz is not None else future_dates
+        
+    except Exception as e:
+        logger.warning(f"Tarih hesaplama hatası: {e}, varsayılan yöntem kullanılacak")
+        # Fallback: basit tarih hesaplama
+        future_dates = []
+        current_date_iter = last_data_date + timedelta(days=1)
+        while len(future_dates) < prediction_days:
+            if current_date_iter.weekday() < 5:  # İş günü
+                future_dates.append(current_date_iter)
+            current_date_iter += timedelta(days=1)
+        future_dates = pd.DatetimeIndex(future_dates)
+    
+    # Tahmin dizisini düzelt
+    predictions_list = list(result['predictions'])
+    if len(predictions_list) != len(future_dates):
+        if len(predictions_list) > len(future_dates):
+            predictions_list = predictions_list[:len(future_dates)]
+        else:
+            # Eksik tahmini son değerle doldur
+            last_pred = predictions_list[-1] if predictions_list else result['last_actual_price']
+            while len(predictions_list) < len(future_dates):
+                predictions_list.append(last_pred)
+    
+    result['predictions'] = pd.DataFrame({
+        'date': future_dates,
+        'predicted_price': predictions_list
+    })
+    
+    # Güncel tarih bilgilerini ekle
+    result['prediction_created_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    result['next_trading_day'] = future_dates[0].strftime('%Y-%m-%d') if len(future_dates) > 0 else None
+    
+    logger.info(f"{ticker} tahmin başarılı - Model: {result['model_name']}, Confidence: {result['confidence']:.2f}")
+    if len(future_dates) > 0:
+        logger.info(f"Tahmin tarihleri: {future_dates[0].date()} - {future_dates[-1].date()}")
+    
+    return result
+
+def _get_refine_executor():
+    """Arka plan iyileştirme havuzunu (lazy) oluştur."""
+    global _refine_executor
+    
+    with _refine_lock:
+        if _refine_executor is None:
+            workers = current_app.config.get('PREDICTION_REFINE_WORKERS', 2)
+            _refine_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prediction-refine')
+        return _refine_executor
+
+def _get_refined_prediction(cache_key):
+    """Arka planda tamamlanmış ensemble tahminini önbellekten al.
+    
+    Çağıran sonucu değiştirebileceği için kopya döner (tahmin tablosu dahil).
+    """
+    cached_entry = _refined_prediction_cache.get(cache_key)
+    if cached_entry is None:
+        return None
+    
+    cache_age_seconds = (datetime.now() - cached_entry['timestamp']).total_seconds()
+    if cache_age_seconds < current_app.config.get('PREDICTION_REFINED_CACHE_SECONDS', 3600):
+        result = dict(cached_entry['data'])
+        result['predictions'] = result['predictions'].copy()
+        return result
+    
+    _refined_prediction_cache.pop(cache_key, None)
+    return None
+
+def _schedule_refinement(cache_key, ticker, stock_data, prediction_days, last_data_date):
+    """Ağır ensemble'ı arka planda çalıştır ve sonucunu önbelleğe yaz."""
+    with _refine_lock:
+        if cache_key in _refine_in_progress:
+            return
+        _refine_in_progress.add(cache_key)
+    
+    app = current_app._get_current_object()
+    
+    def refine():
+        try:
+            with app.app_context():
+                result = _run_heavy_prediction(ticker, stock_data, prediction_days)
+                if result:
+                    result = _finalize_prediction(ticker, result, stock_data, last_data_date, prediction_days)
+                    max_age = app.config.get('PREDICTION_REFINED_CACHE_SECONDS', 3600)
+                    now = datetime.now()
+                    
+                    # Süresi dolmuş girdileri temizle
+                    for key in [k for k, v in _refined_prediction_cache.items()
+                                if (now - v['timestamp']).total_seconds() >= max_age]:
+                        _refined_prediction_cache.pop(key, None)
+                    
+                    _refined_prediction_cache[cache_key] = {
+                        'data': result,
+                        'timestamp': now
+                    }
+                    forecast_service.save_forecast(ticker, cache_key[1], result)
+                    logger.info(f"{ticker} için ensemble tahmini arka planda tamamlandı")
+        except Exception as e:
+            logger.error(f"{ticker} arka plan tahmin hatası: {e}")
+        finally:
+            with _refine_lock:
+                _refine_in_progress.discard(cache_key)
+    
+    try:
+        _get_refine_executor().submit(refine)
+    except Exception as e:
+        logger.warning(f"Arka plan tahmini başlatılamadı: {e}")
+        with _refine_lock:
+            _refine_in_progress.discard(cache_key)
+
+def predict_stock_price(ticker, stock_data, prediction_days=7, latency_budget_ms=None):
+    """Ana tahmin fonksiyonu - en iyi mevcut modeli kullan.
+    
+    Aynı veri sürümü için forecasts tablosunda taze kayıt varsa o döndürülür;
+    ağır modellerin sonuçları tabloya yazılır. latency_budget_ms verilirse ve
+    ağır modellerin tahmini süresinin altındaysa önce hızlı modeller cevap
+    verir, ensemble arka planda iyileştirir. Sonraki istekler (aynı veri sürümü
+    için) iyileştirilmiş sonucu alır.
+    """
     logger.info(f"{ticker} için {prediction_days} günlük tahmin başlatılıyor...")
     
     if stock_data is None or stock_data.empty:
@@ -463,75 +861,42 @@ def predict_stock_price(ticker, stock_data, prediction_days=7):
         if data_age > 3:
             logger.warning(f"{ticker} verisi {data_age} gün eski - {last_data_date.date()}")
         
-        # Önce ensemble dene
-        result = predict_with_ensemble(stock_data, prediction_days)
+        # Aynı veri sürümü için kaydedilmiş taze tahmin
+        data_version = get_data_version(stock_data)
+        stored = forecast_service.get_stored_forecast(ticker, data_version, prediction_days)
+        if stored is not None:
+            logger.info(f"{ticker} için tahmin veritabanından alındı - sürüm {data_version}")
+            return stored
         
-        # Ensemble başarısız olursa en iyi tek modeli dene
-        if not result:
-            if LIGHTGBM_AVAILABLE:
-                result = predict_with_lightgbm(stock_data, prediction_days)
-            elif PROPHET_AVAILABLE:
-                result = predict_with_prophet(stock_data, prediction_days)
-            elif SKLEARN_AVAILABLE:
-                result = predict_with_random_forest(stock_data, prediction_days)
+        result = None
         
-        if result:
-            # Son gerçek fiyat ve tahmin verilerini ekle
-            result['last_actual_price'] = float(stock_data['Close'].iloc[-1])
-            result['last_data_date'] = last_data_date.strftime('%Y-%m-%d')
-            result['prediction_horizon_days'] = prediction_days
-            
-            # Gelecek tarihler için güvenli hesaplama
-            try:
-                # Başlangıç tarihini güvenli şekilde hesapla
-                start_date = last_data_date + timedelta(days=1)
-                while start_date.weekday() >= 5:  # Hafta sonunu atla
-                    start_date += timedelta(days=1)
-                
-                # İş günlerini hesapla
-                future_dates = pd.bdate_range(
-                    start=start_date,
-                    periods=prediction_days,
-                    freq='B'
-                )
-                
-                # Timezone bilgisini temizle
-                future_dates = future_dates.tz_localize(None) if future_dates.tz is not None else future_dates
-                
-            except Exception as e:
-                logger.warning(f"Tarih hesaplama hatası: {e}, varsayılan yöntem kullanılacak")
-                # Fallback: basit tarih hesaplama
-                future_dates = []
-                current_date_iter = last_data_date + timedelta(days=1)
-                while len(future_dates) < prediction_days:
-                    if current_date_iter.weekday() < 5:  # İş günü
-                        future_dates.append(current_date_iter)
-                    current_date_iter += timedelta(days=1)
-                future_dates = pd.DatetimeIndex(future_dates)
+        if latency_budget_ms is not None:
+            cache_key = (ticker, data_version, prediction_days)
             
-            # Tahmin dizisini düzelt
-            predictions_list = result['predictions']
-            if len(predictions_list) != len(future_dates):
-                if len(predictions_list) > len(future_dates):
-                    predictions_list = predictions_list[:len(future_dates)]
-                else:
-                    # Eksik tahmini son değerle doldur
-                    last_pred = predictions_list[-1] if predictions_list else result['last_actual_price']
-                    while len(predictions_list) < len(future_dates):
-                        predictions_list.append(last_pred)
+            refined = _get_refined_prediction(cache_key)
+            if refined is not None:
+                logger.info(f"{ticker} için iyileştirilmiş ensemble tahmini önbellekten alındı")
+                return refined
             
-            result['predictions'] = pd.DataFrame({
-                'date': future_dates,
-                'predicted_price': predictions_list
-            })
-            
-            # Güncel tarih bilgilerini ekle
-            result['prediction_created_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            result['next_trading_day'] = future_dates[0].strftime('%Y-%m-%d') if len(future_dates) > 0 else None
-            
-            logger.info(f"{ticker} tahmin başarılı - Model: {result['model_name']}, Confidence: {result['confidence']:.2f}")
-            if len(future_dates) > 0:
-                logger.info(f"Tahmin tarihleri: {future_dates[0].date()} - {future_dates[-1].date()}")
+            heavy_budget_ms = current_app.config.get('PREDICTION_HEAVY_BUDGET_MS', 5000)
+            if latency_budget_ms < heavy_budget_ms:
+                result = fast_forecast_service.predict_fast(
+                    stock_data,
+                    prediction_days,
+                    window=current_app.config.get('FAST_PATH_WINDOW', 250),
+                    ar_order=current_app.config.get('FAST_PATH_AR_ORDER', 5)
+                )
+                if result:
+                    result['refining'] = True
+                    _schedule_refinement(cache_key, ticker, stock_data, prediction_days, last_data_date)
+        
+        if not result:
+            result = _run_heavy_prediction(ticker, stock_data, prediction_days)
+        
+        if result:
+            result = _finalize_prediction(ticker, result, stock_data, last_data_date, prediction_days)
+            if not result.get('is_fast_path'):
+                forecast_service.save_forecast(ticker, data_version, result)
         else:
             logger.error(f"{ticker} için tüm tahmin modelleri başarısız oldu")
         
@@ -0,0 +1,268 @@
+"""
+Akış halinde, zamanla sönümlenen hisse duyarlılığı.
+
+Her hisse için üstel sönümlü ağırlıklı toplam (Σ w·s·e^(-λΔt)) ve ağırlık
+(Σ w·e^(-λΔt)) tutulur; yeni bir haber O(1) sürede eklenir ve haber geçmişi
+yeniden taranmaz. Ağırlık haber kaynağına göre belirlenir. Günlük kovalar
+grafik için günlük seriyi verir.
+
+Durumun esası `ticker_sentiment_states` tablosudur; böylece yeniden başlatmada
+skorlar yeniden hesaplanmaz ve birden fazla gunicorn worker'ı aynı durumu
+paylaşır. Her güncelleme kaydı yeniden okur ve sürüm kontrollü yazar (başka
+bir süreç araya girdiyse yeniden dener), böylece haberler iki kez sayılmaz
+ve güncellemeler kaybolmaz. Bellekte yalnızca son okunan sürüm tutulur.
+"""
+
+import math
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import TickerSentimentState
+
+logger = logging.getLogger(__name__)
+
+# Hisse bazında son okunan durum: ticker -> (sürüm, durum)
+_ticker_states = {}
+_aggregator_lock = threading.Lock()
+
+# Sürüm çakışmasında güncellemenin en fazla deneme sayısı
+MAX_UPDATE_ATTEMPTS = 5
+
+def article_key(url):
+    """Haberin tekrar eklenmesini önlemek için kısa URL özeti."""
+    return hashlib.sha1(str(url).encode('utf-8')).hexdigest()[:16]
+
+def _decay_rate():
+    """Saniye başına sönüm katsayısı (λ = ln 2 / yarı ömür)."""
+    half_life_hours = current_app.config.get('SENTIMENT_DECAY_HALF_LIFE_HOURS', 24)
+    return math.log(2) / (half_life_hours * 3600.0)
+
+def source_weight(source_name):
+    """Haber kaynağının ağırlığı (tanımlı değilse varsayılan)."""
+    weights = current_app.config.get('SENTIMENT_SOURCE_WEIGHTS', {})
+    default = current_app.config.get('SENTIMENT_DEFAULT_SOURCE_WEIGHT', 1.0)
+    return weights.get((source_name or '').strip().lower(), default)
+
+def _empty_state():
+    return {'sum': 0.0, 'weight': 0.0, 'reference_time': None, 'count': 0, 'daily': {}, 'seen': {}}
+
+def _copy_state(state):
+    return dict(state, daily={day: list(bucket) for day, bucket in state['daily'].items()},
+                seen=dict(state['seen']))
+
+def _read_state(ticker):
+    """Hissenin (sürüm, durum) çifti; kayıt yoksa (None, boş durum).
+
+    Önce yalnızca sürüm okunur; bellekteki sürümle aynıysa kayıt yeniden
+    ayrıştırılmaz.
+    """
+    version = db.session.query(TickerSentimentState.version).filter_by(ticker=ticker).scalar()
+    if version is None:
+        return None, _empty_state()
+
+    cached = _ticker_states.get(ticker)
+    if cached is not None and cached[0] == version:
+        return cached
+
+    row = TickerSentimentState.query.filter_by(ticker=ticker).populate_existing().first()
+    if row is None:
+        return None, _empty_state()
+
+    state = _empty_state()
+    state.update({
+        'sum': row.decayed_sum,
+        'weight': row.decayed_weight,
+        'reference_time': row.reference_time,
+        'count': row.article_count,
+        'daily': {day: list(bucket) for day, bucket in (row.daily or {}).items()},
+        'seen': dict.fromkeys(row.seen_keys or [])
+    })
+    _ticker_states[ticker] = (row.version, state)
+    return row.version, state
+
+def _load_state(ticker):
+    """Okuma için hisse durumu (hata durumunda boş durum)."""
+    try:
+        return _read_state(ticker)[1]
+    except Exception as e:
+        logger.warning(f"{ticker} duyarlılık durumu okunamadı: {e}")
+        db.session.rollback()
+        return _empty_state()
+
+def _save_state(ticker, version, state):
+    """Durumu okunduğu sürümün üzerine yaz.
+
+    Başka bir süreç kaydı bu arada değiştirdiyse (ya da aynı anda ilk kaydı
+    oluşturduysa) hiçbir şey yazılmaz ve None döner; değilse yeni sürüm.
+    """
+    values = {
+        'decayed_sum': state['sum'],
+        'decayed_weight': state['weight'],
+        'reference_time': state['reference_time'],
+        'article_count': state['count'],
+        'daily': {day: list(bucket) for day, bucket in state['daily'].items()},
+        'seen_keys': list(state['seen']),
+        'updated_at': datetime.utcnow()
+    }
+
+    if version is None:
+        db.session.add(TickerSentimentState(ticker=ticker, version=1, **values))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return None
+        new_version = 1
+    else:
+        updated = TickerSentimentState.query.filter_by(ticker=ticker, version=version).update(
+            dict(values, version=version + 1), synchronize_session=False)
+        if not updated:
+            db.session.rollback()
+            return None
+        db.session.commit()
+        new_version = version + 1
+
+    _ticker_states[ticker] = (new_version, state)
+    return new_version
+
+def _add_observation(state, score, weight, published_at, rate):
+    """Tek haberi sönümlü toplamlara ve günlük kovaya ekle (O(1))."""
+    reference = state['reference_time']
+    if reference is None:
+        state['reference_time'] = reference = published_at
+    elif published_at > reference:
+        # Referans anını ileri al: mevcut toplamlar birlikte sönümlenir
+        factor = math.exp(-rate * (published_at - reference).total_seconds())
+        state['sum'] *= factor
+        state['weight'] *= factor
+        state['reference_time'] = reference = published_at
+
+    decay = math.exp(-rate * (reference - published_at).total_seconds())
+    state['sum'] += weight * score * decay
+    state['weight'] += weight * decay
+    state['count'] += 1
+
+    bucket = state['daily'].setdefault(published_at.strftime('%Y-%m-%d'), [0.0, 0.0, 0])
+    bucket[0] += weight * score
+    bucket[1] += weight
+    bucket[2] += 1
+
+def _prune(state):
+    """Saklama süresini aşan günlük kovaları ve en eski URL özetlerini at."""
+    retention_days = current_app.config.get('SENTIMENT_DAILY_RETENTION_DAYS', 90)
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+    for day in [day for day in state['daily'] if day < cutoff]:
+        del state['daily'][day]
+
+    max_seen = current_app.config.get('SENTIMENT_AGGREGATOR_MAX_SEEN', 2000)
+    overflow = len(state['seen']) - max_seen
+    if overflow > 0:
+        for key in list(state['seen'])[:overflow]:
+            del state['seen'][key]
+
+def update_ticker_sentiment(ticker, observations):
+    """Yeni haber skorlarını hissenin durumuna ekle.
+
+    observations: {'key', 'score', 'source', 'published_at' (datetime, UTC)}
+    sözlükleri. Daha önce eklenmiş haberler (key) atlanır. Eklenen haber
+    sayısını döndürür.
+    """
+    rate = _decay_rate()
+
+    with _aggregator_lock:
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            try:
+                version, state = _read_state(ticker)
+                state = _copy_state(state)
+                added = 0
+                for observation in observations:
+                    if observation['published_at'] is None or observation['key'] in state['seen']:
+                        continue
+                    _add_observation(state, observation['score'], source_weight(observation.get('source')),
+                                     observation['published_at'], rate)
+                    state['seen'][observation['key']] = None
+                    added += 1
+
+                if not added:
+                    return 0
+
+                _prune(state)
+                if _save_state(ticker, version, state) is not None:
+                    break
+            except Exception as e:
+                logger.warning(f"{ticker} duyarlılık durumu kaydedilemedi: {e}")
+                db.session.rollback()
+                return 0
+        else:
+            logger.warning(f"{ticker} duyarlılık durumu sürüm çakışması nedeniyle güncellenemedi")
+            return 0
+
+    logger.debug(f"{ticker} sönümlü duyarlılığına {added} haber eklendi")
+    return added
+
+def get_ticker_sentiment(ticker, now=None):
+    """Hissenin sönümlü duyarlılık skoru ve şu andaki etkin ağırlığı."""
+    with _aggregator_lock:
+        state = _load_state(ticker)
+        if not state['weight']:
+            return {'score': 0.0, 'effective_weight': 0.0, 'article_count': state['count'], 'as_of': None}
+
+        now = now or datetime.utcnow()
+        elapsed = max((now - state['reference_time']).total_seconds(), 0.0)
+        return {
+            # Oran sönümden bağımsızdır; etkin ağırlık haber akışının tazeliğini gösterir
+            'score': state['sum'] / state['weight'],
+            'effective_weight': state['weight'] * math.exp(-_decay_rate() * elapsed),
+            'article_count': state['count'],
+            'as_of': state['reference_time'].isoformat() + 'Z'
+        }
+
+def get_daily_sentiment(ticker, days=30):
+    """Grafik için günlük seri: ağırlıklı günlük ortalama ve gün sonu sönümlü skor.
+
+    Sönümlü skor günlük kovalardan O(gün) sürede hesaplanır (günün haberleri
+    gün sonunda eklenmiş kabul edilir).
+    """
+    with _aggregator_lock:
+        daily = {day: tuple(bucket) for day, bucket in _load_state(ticker)['daily'].items()}
+
+    if not daily:
+        return []
+
+    day_factor = math.exp(-_decay_rate() * 86400)
+    series = []
+    decayed_sum = decayed_weight = 0.0
+    previous = None
+
+    for day in sorted(daily):
+        weighted_sum, weight, count = daily[day]
+        current = datetime.strptime(day, '%Y-%m-%d')
+        if previous is not None:
+            factor = day_factor ** (current - previous).days
+            decayed_sum *= factor
+            decayed_weight *= factor
+        decayed_sum += weighted_sum
+        decayed_weight += weight
+        previous = current
+
+        series.append({
+            'date': day,
+            'sentiment_score': weighted_sum / weight if weight else 0.0,
+            'decayed_score': decayed_sum / decayed_weight if decayed_weight else 0.0,
+            'article_count': count
+        })
+
+    return series[-days:]
+
+def reset_ticker_sentiment(ticker=None):
+    """Bellek içi durumu boşalt (veritabanındaki kayıt korunur)."""
+    with _aggregator_lock:
+        if ticker is None:
+            _ticker_states.clear()
+        else:
+            _ticker_states.pop(ticker, None)
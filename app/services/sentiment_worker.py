@@ -0,0 +1,263 @@
+"""
+Süreç dışı duyarlılık çıkarım servisi.
+
+FinBERT, host başına tek bir worker süreçte yüklenir; web worker'ları metinleri
+Unix soketi üzerinden (multiprocessing.connection) gönderir. Worker, tüm
+istemcilerden kısa bir zaman penceresi içinde gelen istekleri tek bir
+mikro-batch'te birleştirip skorlar. İstemci zaman aşımında ya da bağlantı
+hatasında None döner; news_service bu durumda VADER kullanır.
+
+Bağlantı pickle kullandığı için iki taraf da ortak bir anahtarla doğrulanır.
+SENTIMENT_WORKER_AUTHKEY verilmezse worker rastgele bir anahtar üretip yalnızca
+sahibinin okuyabileceği (0600) bir dosyaya yazar; web süreçleri anahtarı bu
+dosyadan okur. Soket de yalnızca sahibine açıktır.
+
+Çalıştırma: python -m app.services.sentiment_worker
+"""
+
+import os
+import stat
+import time
+import queue
+import logging
+import secrets
+import threading
+from multiprocessing.connection import Listener, Client
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# İstemci durumu (süreç başına)
+_client_local = threading.local()
+_client_state = {'down_until': 0.0, 'model': None, 'model_timestamp': 0.0}
+_client_lock = threading.Lock()
+
+MODEL_INFO_TTL_SECONDS = 60
+
+def _authkey_path(config):
+    """Üretilen anahtarın yazıldığı dosya (varsayılan: soket adresi + .key)."""
+    return config.get('SENTIMENT_WORKER_AUTHKEY_FILE') or f"{config['SENTIMENT_WORKER_ADDRESS']}.key"
+
+def _write_authkey_file(path, key):
+    """Anahtarı yalnızca sahibinin okuyabileceği yeni bir dosyaya yaz (symlink izlenmez)."""
+    if os.path.lexists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as key_file:
+        key_file.write(key)
+
+def _read_authkey_file(path):
+    """Worker'ın ürettiği anahtarı oku; dosya bu kullanıcıya ait ve 0600 değilse reddet."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+    with os.fdopen(fd, 'r', encoding='utf-8') as key_file:
+        info = os.fstat(key_file.fileno())
+        if info.st_uid != os.getuid() or info.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+            raise PermissionError(f"Duyarlılık worker anahtar dosyası güvenli değil: {path}")
+        return key_file.read().strip().encode('utf-8')
+
+def _authkey(config):
+    """İstemcinin kullandığı doğrulama anahtarı: açıkça verilen ya da worker'ın dosyası."""
+    if config.get('SENTIMENT_WORKER_AUTHKEY'):
+        return config['SENTIMENT_WORKER_AUTHKEY'].encode('utf-8')
+    return _read_authkey_file(_authkey_path(config))
+
+# --- Worker (sunucu) tarafı ---
+
+def _serve_connection(connection, requests_queue, model_name):
+    """Tek bir istemci bağlantısından gelen istekleri kuyruğa aktar."""
+    send_lock = threading.Lock()
+    try:
+        while True:
+            message = connection.recv()
+            if message.get('type') == 'info':
+                with send_lock:
+                    connection.send({'model': model_name()})
+            elif message.get('type') == 'score':
+                requests_queue.put((connection, send_lock, list(message.get('texts', []))))
+    except (EOFError, OSError):
+        pass
+    finally:
+        connection.close()
+
+def _batch_loop(app, requests_queue, stop_event):
+    """Zaman penceresi içindeki istekleri birleştir, skorla ve cevapla."""
+    from app.services import news_service
+
+    window = app.config.get('SENTIMENT_WORKER_BATCH_WINDOW_MS', 10) / 1000.0
+    max_batch = app.config.get('SENTIMENT_WORKER_MAX_BATCH', 64)
+
+    with app.app_context():
+        while not stop_event.is_set():
+            try:
+                batch = [requests_queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+
+            total = len(batch[0][2])
+            deadline = time.monotonic() + window
+            while total < max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = requests_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                total += len(item[2])
+
+            texts = [text for _, _, item_texts in batch for text in item_texts]
+            if news_service.is_finbert_ready():
+                results, cacheable = news_service._score_finbert_batch(texts)
+            else:
+                results = [news_service.get_sentiment_vader(text) for text in texts]
+                cacheable = [True] * len(texts)
+
+            offset = 0
+            for connection, send_lock, item_texts in batch:
+                count = len(item_texts)
+                reply = {'results': results[offset:offset + count], 'cacheable': cacheable[offset:offset + count]}
+                offset += count
+                try:
+                    with send_lock:
+                        connection.send(reply)
+                except (OSError, ValueError):
+                    # İstemci zaman aşımıyla bağlantıyı kapatmış olabilir
+                    pass
+
+            logger.debug(f"Duyarlılık worker batch: {len(batch)} istek, {len(texts)} metin")
+
+def run_sentiment_worker(app, stop_event=None):
+    """Worker'ı başlat: FinBERT'i yükle ve soketi dinle (bloklar)."""
+    from app.services import news_service
+
+    stop_event = stop_event or threading.Event()
+    address = app.config['SENTIMENT_WORKER_ADDRESS']
+
+    with app.app_context():
+        news_service.initialize_finbert()
+
+    def model_name():
+        with app.app_context():
+            return news_service.get_local_sentiment_model()
+
+    if os.path.exists(address):
+        os.unlink(address)
+
+    key_path = None
+    if app.config.get('SENTIMENT_WORKER_AUTHKEY'):
+        authkey = app.config['SENTIMENT_WORKER_AUTHKEY'].encode('utf-8')
+    else:
+        key_path = _authkey_path(app.config)
+        authkey = secrets.token_hex(32)
+        _write_authkey_file(key_path, authkey)
+        authkey = authkey.encode('utf-8')
+
+    requests_queue = queue.Queue()
+    batcher = threading.Thread(target=_batch_loop, args=(app, requests_queue, stop_event),
+                               name='sentiment-batcher', daemon=True)
+    batcher.start()
+
+    # Soket dosyası oluşturulurken yalnızca sahibine açık olsun (0600)
+    previous_umask = os.umask(0o177)
+    try:
+        listener = Listener(address, family='AF_UNIX', authkey=authkey)
+    finally:
+        os.umask(previous_umask)
+    logger.info(f"Duyarlılık worker'ı dinliyor: {address} - model: {model_name()}")
+
+    try:
+        while not stop_event.is_set():
+            try:
+                connection = listener.accept()
+            except Exception as e:
+                if stop_event.is_set():
+                    break
+                logger.warning(f"Duyarlılık worker bağlantı hatası: {e}")
+                continue
+            threading.Thread(target=_serve_connection, args=(connection, requests_queue, model_name),
+                             name='sentiment-connection', daemon=True).start()
+    finally:
+        listener.close()
+        if os.path.exists(address):
+            os.unlink(address)
+        if key_path and os.path.exists(key_path):
+            os.unlink(key_path)
+
+# --- İstemci (web süreci) tarafı ---
+
+def is_enabled():
+    """Süreç dışı duyarlılık servisi açık mı."""
+    return current_app.config.get('SENTIMENT_WORKER_ENABLED', False)
+
+def _close_connection():
+    """Bu iş parçacığının bağlantısını kapat."""
+    connection = getattr(_client_local, 'connection', None)
+    _client_local.connection = None
+    if connection is not None:
+        try:
+            connection.close()
+        except OSError:
+            pass
+
+def _mark_down(error):
+    """Worker'a ulaşılamadı: bir süre yeniden denenmez."""
+    _close_connection()
+    retry_seconds = current_app.config.get('SENTIMENT_WORKER_RETRY_SECONDS', 30)
+    with _client_lock:
+        _client_state['down_until'] = time.monotonic() + retry_seconds
+        _client_state['model'] = None
+    logger.warning(f"Duyarlılık worker'ına ulaşılamadı, {retry_seconds} sn VADER kullanılacak: {error}")
+
+def _request(message):
+    """İsteği gönder ve SENTIMENT_WORKER_TIMEOUT_SECONDS içinde cevabı bekle."""
+    if time.monotonic() < _client_state['down_until']:
+        return None
+
+    try:
+        connection = getattr(_client_local, 'connection', None)
+        if connection is None:
+            connection = Client(current_app.config['SENTIMENT_WORKER_ADDRESS'], family='AF_UNIX',
+                                authkey=_authkey(current_app.config))
+            _client_local.connection = connection
+
+        connection.send(message)
+        if not connection.poll(current_app.config.get('SENTIMENT_WORKER_TIMEOUT_SECONDS', 5)):
+            # Geç gelen cevap bir sonraki isteğe karışmasın diye bağlantı kapatılır
+            _close_connection()
+            logger.warning("Duyarlılık worker'ı zaman aşımına uğradı, VADER kullanılacak")
+            return None
+        return connection.recv()
+
+    except Exception as e:
+        _mark_down(e)
+        return None
+
+def get_worker_model():
+    """Worker'da kullanılan model adı (ulaşılamıyorsa None)."""
+    now = time.monotonic()
+    with _client_lock:
+        if _client_state['model'] is not None and now - _client_state['model_timestamp'] < MODEL_INFO_TTL_SECONDS:
+            return _client_state['model']
+
+    reply = _request({'type': 'info'})
+    if reply is None:
+        return None
+
+    with _client_lock:
+        _client_state['model'] = reply['model']
+        _client_state['model_timestamp'] = now
+    return reply['model']
+
+def score_texts(texts):
+    """Metinleri worker'da skorla; (sonuçlar, önbelleğe yazılabilir mi) ya da None döner."""
+    reply = _request({'type': 'score', 'texts': list(texts)})
+    if reply is None:
+        return None
+    return [tuple(result) for result in reply['results']], reply['cacheable']
+
+if __name__ == '__main__':
+    from app import create_app
+
+    worker_app = create_app(os.getenv('FLASK_CONFIG', 'production'), start_background=False)
+    run_sentiment_worker(worker_app)
@@ -126,8 +126,8 @@ def create_demo_data(ticker):
     
     return df
 
-def get_stock_data(ticker, period='1y'):
-    """Hisse senedi verilerini çek (rate limiting ile)."""
+def get_cached_stock_data(ticker, period='1y'):
+    """Önbellekteki hisse verisi (yoksa ya da süresi dolduysa None); veri çekilmez."""
     cache_key = f"{ticker}_{period}_data"
     now = datetime.now()
     
@@ -147,6 +147,17 @@ def get_stock_data(ticker, period='1y'):
         logger.info(f"{ticker} için demo veri kullanılıyor")
         return _demo_data_cache[cache_key]
     
+    return None
+
+def get_stock_data(ticker, period='1y'):
+    """Hisse senedi verilerini çek (rate limiting ile)."""
+    cached_data = get_cached_stock_data(ticker, period)
+    if cached_data is not None:
+        return cached_data
+    
+    cache_key = f"{ticker}_{period}_data"
+    now = datetime.now()
+    
     try:
         # Rate limit bekle
         wait_for_rate_limit()
@@ -194,6 +205,21 @@ def get_stock_data(ticker, period='1y'):
         _demo_data_cache[cache_key] = demo_data
         return demo_data
 
+def get_data_version(stock_data):
+    """Veri setinin sürüm anahtarını üret (son tarih, kayıt sayısı ve son kapanış)."""
+    if stock_data is None or stock_data.empty:
+        return None
+    
+    try:
+        close = stock_data['Close']
+        if isinstance(close, pd.DataFrame):
+            close = close.iloc[:, 0]
+        last_date = pd.Timestamp(stock_data.index[-1]).strftime('%Y%m%d%H%M')
+        return f"{last_date}-{len(stock_data)}-{float(close.iloc[-1]):.4f}"
+    except Exception as e:
+        logger.warning(f"Veri sürümü hesaplanamadı: {e}")
+        return None
+
 def get_stock_info(ticker):
     """Hisse senedi temel bilgilerini çek (rate limiting ile)."""
     cache_key = f"{ticker}_info"
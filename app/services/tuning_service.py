@@ -0,0 +1,458 @@
+"""
+Hiperparametre arama servisi.
+
+LightGBM ve RandomForest için hisse ya da piyasa bazında successive halving
+ile arama yapar. Aramalar tek bir arka plan thread'inde sırayla çalışır.
+Denemeler process havuzunda çalışır (her deneme tek çekirdek); özellik setleri her
+worker'a bir kez yüklenir (LightGBM için binary Dataset dosyaları diske
+önbelleklenir) ve denemeler arasında yeniden kullanılır. Kazanan parametreler
+JSON dosyasına yazılır; istek yolu bunları ek maliyet olmadan kullanır.
+"""
+
+import os
+import re
+import json
+import random
+import hashlib
+import tempfile
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+
+from app.services import prediction_service
+
+try:
+    import lightgbm as lgb
+    LIGHTGBM_AVAILABLE = True
+except ImportError:
+    LIGHTGBM_AVAILABLE = False
+
+try:
+    from sklearn.ensemble import RandomForestRegressor
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+LIGHTGBM_SEARCH_SPACE = {
+    'num_leaves': [15, 31, 63],
+    'learning_rate': [0.02, 0.05, 0.1],
+    'feature_fraction': [0.7, 0.9, 1.0],
+    'bagging_fraction': [0.7, 0.8, 1.0],
+    'min_data_in_leaf': [10, 20, 40],
+    'lambda_l2': [0.0, 1.0, 10.0],
+}
+
+RANDOM_FOREST_SEARCH_SPACE = {
+    'max_depth': [5, 10, 20, None],
+    'min_samples_leaf': [1, 3, 5],
+    'max_features': [1.0, 0.5, 'sqrt'],
+}
+
+# Binary Dataset'ler farklı ağaç parametreleriyle yeniden kullanılabilsin diye
+LIGHTGBM_DATASET_PARAMS = {'feature_pre_filter': False, 'verbose': -1}
+
+# Worker başına bir kez yüklenen eğitim verisi
+_worker_state = {}
+
+# Kalıcı parametre dosyasının bellek kopyası
+_tuned_params_cache = {'mtime': None, 'data': {}}
+_tuned_params_lock = threading.Lock()
+
+# Arka plan aramaları
+_tuning_in_progress = set()
+_tuning_lock = threading.Lock()
+_tuning_executor = None
+
+def _init_worker(arrays, dataset_paths):
+    """Process havuzu başlatıcısı - veri worker başına bir kez yüklenir."""
+    _worker_state.clear()
+    _worker_state['arrays'] = arrays
+    _worker_state['dataset_paths'] = dataset_paths
+
+def _lightgbm_datasets():
+    """Worker'daki LightGBM Dataset'lerini oluştur ve denemeler arasında sakla."""
+    if 'lgb_train' not in _worker_state:
+        paths = _worker_state.get('dataset_paths')
+        if paths and all(os.path.exists(p) for p in paths):
+            train_data = lgb.Dataset(paths[0], params=LIGHTGBM_DATASET_PARAMS, free_raw_data=False)
+            val_data = lgb.Dataset(paths[1], reference=train_data, free_raw_data=False)
+        else:
+            X_train, y_train, X_val, y_val = _worker_state['arrays']
+            train_data = lgb.Dataset(X_train, label=y_train, params=LIGHTGBM_DATASET_PARAMS, free_raw_data=False)
+            val_data = lgb.Dataset(X_val, label=y_val, reference=train_data, free_raw_data=False)
+        _worker_state['lgb_train'] = train_data.construct()
+        _worker_state['lgb_val'] = val_data.construct()
+    return _worker_state['lgb_train'], _worker_state['lgb_val']
+
+def _evaluate_lightgbm(candidate, resource):
+    """Bir LightGBM adayını en fazla `resource` tur ile değerlendir."""
+    train_data, val_data = _lightgbm_datasets()
+    params = dict(prediction_service.get_lightgbm_params(), **candidate)
+    params.update({'metric': 'mae', 'verbose': -1, 'num_threads': 1})  # Paralellik process havuzundan gelir
+
+    model = lgb.train(
+        params,
+        train_data,
+        valid_sets=[val_data],
+        num_boost_round=resource,
+        callbacks=[lgb.early_stopping(50, verbose=False), lgb.log_evaluation(0)]
+    )
+    score = model.best_score['valid_0']['l1']
+    return float(score), int(model.best_iteration or resource)
+
+def _evaluate_random_forest(candidate, resource):
+    """Bir RandomForest adayını `resource` ağaç ile değerlendir."""
+    X_train, y_train, X_val, y_val = _worker_state['arrays']
+    params = dict(prediction_service.get_random_forest_params(), **candidate)
+    params['n_estimators'] = resource
+    params['n_jobs'] = 1  # Paralellik process havuzundan gelir
+
+    model = RandomForestRegressor(**params)
+    model.fit(X_train, y_train)
+    score = np.mean(np.abs(model.predict(X_val) - y_val))
+    return float(score), resource
+
+EVALUATORS = {
+    'lightgbm': _evaluate_lightgbm,
+    'random_forest': _evaluate_random_forest,
+}
+
+def _evaluate(model_key, candidate, resource):
+    """Process havuzunda çalışan değerlendirme girişi."""
+    try:
+        return EVALUATORS[model_key](candidate, resource)
+    except Exception as e:
+        logger.warning(f"Deneme başarısız ({model_key}, {candidate}): {e}")
+        return float('inf'), resource
+
+def _sample_candidates(search_space, n_candidates, seed):
+    """Arama uzayından tekrarsız rastgele adaylar seç."""
+    rng = random.Random(seed)
+    keys = list(search_space)
+    seen = set()
+    candidates = []
+    max_combinations = int(np.prod([len(search_space[k]) for k in keys]))
+    while len(candidates) < min(n_candidates, max_combinations):
+        candidate = {k: rng.choice(search_space[k]) for k in keys}
+        signature = tuple(candidate[k] for k in keys)
+        if signature not in seen:
+            seen.add(signature)
+            candidates.append(candidate)
+    return candidates
+
+def _successive_halving(model_key, candidates, min_resource, max_resource, eta, run_trials):
+    """Her turda adayların en iyi 1/eta'sını tutup kaynağı eta katına çıkar."""
+    resource = min_resource
+    history = []
+    while True:
+        scores = run_trials([(model_key, c, resource) for c in candidates])
+        ranked = sorted(zip(scores, candidates), key=lambda item: item[0][0])
+        history.append({'resource': resource, 'candidates': len(candidates), 'best_score': ranked[0][0][0]})
+
+        if len(ranked) == 1 or resource >= max_resource:
+            (best_score, best_resource), best_candidate = ranked[0]
+            return best_candidate, best_score, best_resource, history
+
+        candidates = [c for _, c in ranked[:max(1, len(ranked) // eta)]]
+        resource = min(resource * eta, max_resource)
+
+def _split_frames(frames):
+    """Her veri setini zaman sırasına göre %80/%20 ayırıp birleştir."""
+    parts = {'X_train': [], 'y_train': [], 'X_val': [], 'y_val': []}
+    for frame in frames:
+        X, y = prediction_service.build_training_set(prediction_service.create_features(frame))
+        if len(X) < 50:
+            continue
+        train_size = int(len(X) * 0.8)
+        parts['X_train'].append(X.iloc[:train_size])
+        parts['y_train'].append(y.iloc[:train_size])
+        parts['X_val'].append(X.iloc[train_size:])
+        parts['y_val'].append(y.iloc[train_size:])
+
+    if not parts['X_train']:
+        return None
+
+    return tuple(
+        pd.concat(parts[name]).to_numpy(dtype=np.float64)
+        for name in ('X_train', 'y_train', 'X_val', 'y_val')
+    )
+
+def _dataset_cache_key(scope_key, arrays):
+    """Kapsam ve eğitim dizilerinin özetinden Dataset önbellek anahtarı.
+
+    Anahtar verinin kendisinden üretilir; kapsamın herhangi bir veri seti
+    değişince (piyasa kapsamında da) yeni Dataset dosyaları yazılır.
+    """
+    digest = hashlib.sha1()
+    for array in arrays:
+        digest.update(str(array.shape).encode())
+        digest.update(np.ascontiguousarray(array).tobytes())
+    scope = re.sub(r'[^A-Za-z0-9.\-]', '_', scope_key)
+    return f'{scope}_{digest.hexdigest()[:16]}'
+
+def _remove_stale_datasets(cache_dir, cache_key):
+    """Aynı kapsamın eski veriye ait Dataset dosyalarını sil."""
+    scope = cache_key.rsplit('_', 1)[0]
+    stale = re.compile(rf'^{re.escape(scope)}_[0-9a-f]{{16}}_(train|val)\.bin$')
+    for name in os.listdir(cache_dir):
+        if stale.match(name) and not name.startswith(f'{cache_key}_'):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+def _save_lightgbm_datasets(arrays, cache_key):
+    """Binary LightGBM Dataset'lerini diske yaz (aynı veri için yeniden kullanılır)."""
+    if not LIGHTGBM_AVAILABLE:
+        return None
+
+    try:
+        cache_dir = os.path.join(current_app.config.get('MODEL_CACHE_DIR', './.model_cache'), 'tuning')
+        os.makedirs(cache_dir, exist_ok=True)
+        train_path = os.path.join(cache_dir, f'{cache_key}_train.bin')
+        val_path = os.path.join(cache_dir, f'{cache_key}_val.bin')
+        _remove_stale_datasets(cache_dir, cache_key)
+
+        if not (os.path.exists(train_path) and os.path.exists(val_path)):
+            X_train, y_train, X_val, y_val = arrays
+            train_data = lgb.Dataset(X_train, label=y_train, params=LIGHTGBM_DATASET_PARAMS, free_raw_data=False)
+            val_data = lgb.Dataset(X_val, label=y_val, reference=train_data, free_raw_data=False)
+            train_data.save_binary(train_path)
+            val_data.save_binary(val_path)
+            logger.info(f"LightGBM binary Dataset'leri kaydedildi: {cache_key}")
+
+        return train_path, val_path
+
+    except Exception as e:
+        logger.warning(f"LightGBM Dataset önbelleği oluşturulamadı: {e}")
+        return None
+
+def _tuned_params_path():
+    return current_app.config.get(
+        'TUNED_PARAMS_PATH',
+        os.path.join(current_app.config.get('MODEL_CACHE_DIR', './.model_cache'), 'tuned_params.json')
+    )
+
+def _read_tuned_params(path):
+    """Kalıcı parametre dosyasını oku (dosya değişmediyse bellekten).
+
+    _tuned_params_lock tutulurken çağrılır.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+
+    if _tuned_params_cache['mtime'] != mtime:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                _tuned_params_cache['data'] = json.load(f)
+            _tuned_params_cache['mtime'] = mtime
+        except Exception as e:
+            logger.warning(f"Ayarlanmış parametreler okunamadı: {e}")
+            return {}
+    return _tuned_params_cache['data']
+
+def _load_tuned_params():
+    """Kalıcı parametre dosyası."""
+    path = _tuned_params_path()
+    with _tuned_params_lock:
+        return _read_tuned_params(path)
+
+def _store_tuned_params(scope_key, entry):
+    """Kazanan parametreleri dosyaya atomik olarak yaz.
+
+    Okuma-değiştirme-yazma kilit altında yapılır; eşzamanlı kapsamlar
+    birbirinin kaydını silmez. Her yazıcı kendi geçici dosyasını kullanır.
+    """
+    path = _tuned_params_path()
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    with _tuned_params_lock:
+        data = dict(_read_tuned_params(path))
+        data[scope_key] = entry
+
+        tmp = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp', delete=False)
+        try:
+            with tmp:
+                json.dump(data, tmp, indent=2, ensure_ascii=False)
+            os.replace(tmp.name, path)
+        except Exception:
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+            raise
+
+        # Aynı zaman damgalı yeniden yazımda eski kopya okunmasın
+        _tuned_params_cache['data'] = data
+        _tuned_params_cache['mtime'] = os.path.getmtime(path)
+
+def market_scope_key(market):
+    """Piyasa bazlı parametreler için anahtar."""
+    return f'market:{market}'
+
+def get_tuned_params(ticker):
+    """Hisse (yoksa piyasa) için ayarlanmış parametreleri Config ile birleştirerek döndür."""
+    try:
+        from app.services.stock_service import get_market_from_ticker
+
+        data = _load_tuned_params()
+        entry = data.get(ticker) or data.get(market_scope_key(get_market_from_ticker(ticker)))
+        if not entry:
+            return None
+
+        params = {}
+        if entry.get('lightgbm'):
+            params['lightgbm'] = dict(prediction_service.get_lightgbm_params(), **entry['lightgbm'])
+        if entry.get('random_forest'):
+            params['random_forest'] = dict(prediction_service.get_random_forest_params(), **entry['random_forest'])
+        return params or None
+
+    except Exception as e:
+        logger.warning(f"Ayarlanmış parametreler alınamadı ({ticker}): {e}")
+        return None
+
+def tune_hyperparameters(scope_key, frames, data_version=None, models=None, n_candidates=None, max_workers=None):
+    """Successive halving ile hiperparametre araması yap ve kazananları kaydet.
+
+    scope_key bir ticker ya da market_scope_key(...) olabilir; frames o kapsamın
+    OHLCV veri setleridir.
+    """
+    config = current_app.config
+    models = models or [m for m in ('lightgbm', 'random_forest')
+                        if (m == 'lightgbm' and LIGHTGBM_AVAILABLE) or (m == 'random_forest' and SKLEARN_AVAILABLE)]
+    n_candidates = n_candidates or config.get('TUNING_CANDIDATES', 27)
+    max_workers = max_workers or config.get('TUNING_MAX_WORKERS')
+    eta = config.get('TUNING_ETA', 3)
+
+    arrays = _split_frames(frames)
+    if arrays is None or not models:
+        logger.warning(f"{scope_key} için hiperparametre araması yapılamadı (veri/model yok)")
+        return None
+
+    started = datetime.now()
+    dataset_paths = _save_lightgbm_datasets(arrays, _dataset_cache_key(scope_key, arrays)) if 'lightgbm' in models else None
+
+    executor = None
+    if max_workers != 1:
+        try:
+            executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                           initargs=(arrays, dataset_paths))
+        except Exception as e:
+            logger.warning(f"Process havuzu başlatılamadı, sıralı çalışılacak: {e}")
+
+    if executor is None:
+        _init_worker(arrays, dataset_paths)
+
+    def run_trials(trials):
+        if executor is not None:
+            return list(executor.map(_evaluate, *zip(*trials)))
+        return [_evaluate(*trial) for trial in trials]
+
+    entry = {
+        'data_version': data_version,
+        'tuned_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'scores': {}
+    }
+
+    try:
+        if 'lightgbm' in models:
+            candidates = _sample_candidates(LIGHTGBM_SEARCH_SPACE, n_candidates, seed=42)
+            best, score, best_iteration, history = _successive_halving(
+                'lightgbm', candidates,
+                config.get('TUNING_LIGHTGBM_MIN_ROUNDS', 100),
+                config.get('TUNING_LIGHTGBM_MAX_ROUNDS', 1000),
+                eta, run_trials
+            )
+            if np.isfinite(score):
+                # Erken durdurmanın bulduğu tur sayısı istek yolunda yeniden kullanılır
+                entry['lightgbm'] = dict(best, num_boost_round=best_iteration)
+                entry['scores']['lightgbm'] = {'mae': score, 'history': history}
+
+        if 'random_forest' in models:
+            candidates = _sample_candidates(RANDOM_FOREST_SEARCH_SPACE, n_candidates, seed=42)
+            best, score, n_estimators, history = _successive_halving(
+                'random_forest', candidates,
+                config.get('TUNING_RF_MIN_TREES', 25),
+                config.get('TUNING_RF_MAX_TREES', 200),
+                eta, run_trials
+            )
+            if np.isfinite(score):
+                entry['random_forest'] = dict(best, n_estimators=n_estimators)
+                entry['scores']['random_forest'] = {'mae': score, 'history': history}
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        else:
+            _worker_state.clear()
+
+    if not entry['scores']:
+        logger.warning(f"{scope_key} için hiçbir deneme başarılı olmadı")
+        return None
+
+    entry['duration_seconds'] = (datetime.now() - started).total_seconds()
+    _store_tuned_params(scope_key, entry)
+
+    logger.info(f"{scope_key} için hiperparametre araması tamamlandı ({entry['duration_seconds']:.1f} sn)")
+    return entry
+
+def get_tuning_result(scope_key):
+    """Kapsam için kaydedilmiş arama sonucu (yoksa None)."""
+    return _load_tuned_params().get(scope_key)
+
+def is_tuning_running(scope_key):
+    """Bu süreçte kapsam için arama kuyrukta ya da çalışıyor mu?"""
+    with _tuning_lock:
+        return scope_key in _tuning_in_progress
+
+def schedule_tuning(scope_key, tickers, period='2y'):
+    """Aramayı arka planda çalıştır.
+
+    Veriler iş thread'inde çekilir. Aynı kapsam zaten kuyruktaysa yeniden
+    eklenmez. Kuyruk TUNING_MAX_QUEUED sınırındaysa False döner.
+    """
+    global _tuning_executor
+
+    with _tuning_lock:
+        if scope_key in _tuning_in_progress:
+            return True
+        if len(_tuning_in_progress) >= current_app.config.get('TUNING_MAX_QUEUED', 4):
+            logger.warning(f"Hiperparametre arama kuyruğu dolu, {scope_key} eklenmedi")
+            return False
+        _tuning_in_progress.add(scope_key)
+        if _tuning_executor is None:
+            _tuning_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tuning')
+
+    app = current_app._get_current_object()
+
+    def task():
+        from app.services import stock_service
+
+        try:
+            with app.app_context():
+                frames = []
+                for symbol in tickers:
+                    stock_data = stock_service.get_stock_data(symbol, period)
+                    if stock_data is not None and not stock_data.empty:
+                        frames.append(stock_data)
+
+                if not frames:
+                    logger.warning(f"{scope_key} için hiperparametre araması yapılamadı (veri yok)")
+                    return
+
+                data_version = stock_service.get_data_version(frames[0]) if tickers == [scope_key] else None
+                tune_hyperparameters(scope_key, frames, data_version=data_version)
+        except Exception as e:
+            logger.error(f"{scope_key} arka plan hiperparametre arama hatası: {e}")
+        finally:
+            with _tuning_lock:
+                _tuning_in_progress.discard(scope_key)
+
+    _tuning_executor.submit(task)
+    return True
@@ -0,0 +1,138 @@
+"""
+Bellek içi önbellek yardımcıları.
+"""
+
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """İş parçacığı güvenli, boyut sınırlı LRU önbellek."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Anahtarı al ve en son kullanılan olarak işaretle."""
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key, value):
+        """Anahtarı yaz; kapasite aşılırsa en eski kullanılanı çıkar."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Anahtarı sil."""
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        """Önbelleği boşalt."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        """İsabet / ıska istatistikleri."""
+        with self._lock:
+            return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+class ByteBudgetCache:
+    """İş parçacığı güvenli, toplam bayt bütçeli LRU önbellek.
+    
+    Her kayıt boyutuyla birlikte saklanır; toplam boyut bütçeyi aşınca en eski
+    kullanılan kayıtlar çıkarılır. Bütçeden büyük tek kayıt saklanmaz.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Anahtarı al ve en son kullanılan olarak işaretle."""
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+
+    def set(self, key, value, size):
+        """Kaydı boyutuyla yaz; bütçe aşılırsa en eski kullanılanları çıkar."""
+        with self._lock:
+            if key in self._data:
+                self.total_bytes -= self._data.pop(key)[1]
+            if size > self.max_bytes:
+                return False
+            self._data[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+            return True
+
+    def pop(self, key, default=None):
+        """Anahtarı sil."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            value, size = self._data.pop(key)
+            self.total_bytes -= size
+            return value
+
+    def clear(self):
+        """Önbelleği boşalt."""
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        """Boyut, isabet / ıska ve çıkarma istatistikleri."""
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
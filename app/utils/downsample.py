@@ -0,0 +1,80 @@
+"""
+Uzun zaman serileri için görsel olarak sadık seyreltme.
+
+LTTB (Largest-Triangle-Three-Buckets) çizgi grafiklerde şekli korur; min-max
+seyreltme her kovanın en düşük ve en yüksek noktasını tutar (tepe/dipler
+kaybolmaz). Her iki yöntem de seçilen satırların indekslerini döndürür, böylece
+aynı tarih eksenini paylaşan tüm seriler birlikte seyreltilebilir.
+"""
+
+import numpy as np
+import pandas as pd
+
+def _fill_missing(values):
+    """NaN değerleri komşularla doldur (alan hesabı için)."""
+    series = pd.Series(np.asarray(values, dtype=np.float64))
+    if series.isna().all():
+        return None
+    return series.interpolate(limit_direction='both').to_numpy()
+
+def lttb_indices(values, threshold):
+    """LTTB ile seçilen nokta indeksleri (ilk ve son nokta her zaman dahil)."""
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = _fill_missing(values)
+    if y is None:
+        return np.unique(np.linspace(0, n - 1, threshold).astype(np.int64))
+    x = np.arange(n, dtype=np.float64)
+
+    # Kova sınırları (ilk ve son nokta ayrı kovalardır) ve kova ortalamaları tek seferde
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    edges[-1] = n - 1
+    starts, ends = edges[:-1], edges[1:]
+    ends = np.maximum(ends, starts + 1)
+    avg_x = np.add.reduceat(x[:n - 1], starts) / (ends - starts)
+    avg_y = np.add.reduceat(y[:n - 1], starts) / (ends - starts)
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        # Önceki seçili nokta, kova noktası ve sonraki kova ortalamasıyla üçgen alanı
+        area = np.abs(
+            (x[anchor] - avg_x[bucket]) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (avg_y[bucket] - y[anchor])
+        )
+        anchor = start + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+
+    return np.unique(selected)
+
+def minmax_indices(values, threshold):
+    """Her kovadaki en küçük ve en büyük değerin indeksleri (en fazla threshold nokta)."""
+    n = len(values)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    buckets = threshold // 2
+    size = int(np.ceil(n / buckets))
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = np.asarray(values, dtype=np.float64)
+    grid = padded.reshape(buckets, size)
+
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(grid), np.inf, grid), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(grid), -np.inf, grid), axis=1)
+
+    indices = np.unique(np.concatenate([[0, n - 1], lows, highs]))
+    return indices[indices < n]
+
+def bucket_ranges(n, threshold):
+    """Mum grafikleri için eşit büyüklükte kova sınırları: (başlangıç, bitiş) dizileri."""
+    buckets = min(n, max(threshold, 1))
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    edges = np.unique(edges)
+    return edges[:-1], edges[1:]
@@ -0,0 +1,125 @@
+"""
+MinHash ile yakın kopya metin tespiti.
+
+Metin, kelime ikililerine (shingle) bölünür; MinHash imzası iki metnin
+Jaccard benzerliğini tahmin eder. İmzalar LSH bantlarına ayrılarak
+indekslenir: sorgu yalnızca en az bir bandı birebir aynı olan adayları
+karşılaştırır. Kısa haber metinlerinde SimHash'e göre daha kararlıdır.
+"""
+
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+NUM_PERMUTATIONS = 64
+_MERSENNE_PRIME = np.uint64(4294967291)  # 2^32'den küçük en büyük asal
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+_WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Sabit tohumlu permütasyon katsayıları: imzalar süreçler arası karşılaştırılabilir
+_rng = np.random.default_rng(20240611)
+_PERM_A = _rng.integers(1, int(_MERSENNE_PRIME), size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_MERSENNE_PRIME), size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+def shingles(text, size=2):
+    """Küçük harfli kelime n'lileri (tekrarsız)."""
+    words = _WORD_PATTERN.findall(str(text).lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash_signature(text, size=2):
+    """Metnin MinHash imzası (NUM_PERMUTATIONS uzunluğunda uint64 dizi); boş metin için None."""
+    features = shingles(text, size)
+    if not features:
+        return None
+
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(f.encode('utf-8'), digest_size=4).digest(), 'big') for f in features],
+        dtype=np.uint64
+    ) % _MERSENNE_PRIME
+
+    # (a * x + b) mod p; a, x < 2^32 olduğundan çarpım uint64'e sığar
+    permuted = ((hashes[:, None] * _PERM_A) % _MERSENNE_PRIME + _PERM_B) % _MERSENNE_PRIME
+    return (permuted & _MAX_HASH).min(axis=0)
+
+def estimated_similarity(a, b):
+    """İki imzanın tahmini Jaccard benzerliği."""
+    return float(np.mean(a == b))
+
+class MinHashIndex:
+    """LSH bant indeksli, boyut sınırlı, iş parçacığı güvenli yakın kopya indeksi.
+
+    Her imza bir değerle (örneğin kümenin temsilci metni) saklanır; kapasite
+    aşılınca en eski kullanılan kayıt çıkarılır.
+    """
+
+    def __init__(self, threshold=0.7, bands=16, maxsize=10000):
+        if NUM_PERMUTATIONS % bands:
+            raise ValueError(f"bands {NUM_PERMUTATIONS} sayısını tam bölmeli")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERMUTATIONS // bands
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def find(self, signature):
+        """Eşiği geçen en benzer kaydın değerini döndür (yoksa None)."""
+        if signature is None:
+            return None
+
+        with self._lock:
+            candidates = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(self._buckets.get(band_key, ()))
+
+            best = None
+            for entry_id in candidates:
+                similarity = estimated_similarity(signature, self._entries[entry_id][0])
+                if similarity >= self.threshold and (best is None or similarity > best[0]):
+                    best = (similarity, entry_id)
+
+            if best is None:
+                return None
+            self._entries.move_to_end(best[1])
+            return self._entries[best[1]][1]
+
+    def add(self, signature, value):
+        """İmzayı indekse ekle."""
+        if signature is None:
+            return
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (signature, value)
+            for band_key in self._band_keys(signature):
+                self._buckets.setdefault(band_key, set()).add(entry_id)
+
+            while len(self._entries) > self.maxsize:
+                evicted_id, (evicted, _) = self._entries.popitem(last=False)
+                for band_key in self._band_keys(evicted):
+                    bucket = self._buckets.get(band_key)
+                    if bucket is not None:
+                        bucket.discard(evicted_id)
+                        if not bucket:
+                            del self._buckets[band_key]
+
+    def clear(self):
+        """İndeksi boşalt."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Grafik oluşturma mikro kıyaslaması
+
+create_stock_chart için figür kurma süresini (HTML serileştirme hariç),
+toplam oluşturma süresini ve HTML boyutunu farklı veri uzunluklarında ölçer.
+Seyreltme kapatılır, böylece izler tam uzunlukta kurulur.
+
+Kullanım: python benchmark_charts.py [--rows 1000 5000 20000] [--repeat 5] [--text-arrays]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app import create_app
+from app.services import chart_service
+from app.services.stock_service import calculate_technical_indicators
+
+def make_stock_data(rows):
+    """Rastgele yürüyüşle sentetik OHLCV verisi."""
+    index = pd.date_range('2000-01-03', periods=rows, freq='B')
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, rows))
+    return pd.DataFrame({
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000000.0
+    }, index=index)
+
+def best_time(func, repeat):
+    """En iyi çalışma süresi (saniye)."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description='Grafik oluşturma kıyaslaması')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--text-arrays', action='store_true', help='İkili dizi kodlamasını kapat')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    app.config['CHART_MAX_POINTS'] = max(args.rows) + 1
+    app.config['CHART_COMPACT_ENCODING'] = not args.text_arrays
+
+    to_html = chart_service.pio.to_html
+
+    with app.app_context():
+        print(f"{'satır':>8} {'tip':>12} {'figür (ms)':>12} {'toplam (ms)':>12} {'HTML (KB)':>10}")
+        for rows in args.rows:
+            stock_data = make_stock_data(rows)
+            indicators = calculate_technical_indicators(stock_data)
+
+            for chart_type in ('line', 'candlestick'):
+                render = lambda: chart_service.create_stock_chart(stock_data, indicators, None, chart_type, 'BENCH')
+
+                # Serileştirmeyi devre dışı bırakarak yalnızca figür kurulumunu ölç
+                chart_service.pio.to_html = lambda fig, **kwargs: fig
+                try:
+                    build = best_time(render, args.repeat)
+                finally:
+                    chart_service.pio.to_html = to_html
+                total = best_time(render, args.repeat)
+                size = len(render().encode('utf-8')) / 1024
+
+                print(f"{rows:>8} {chart_type:>12} {build * 1000:>12.1f} {total * 1000:>12.1f} {size:>10.0f}")
+
+if __name__ == '__main__':
+    main()
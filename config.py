@@ -32,19 +32,131 @@ class Config:
     # Model settings - güvenli konfigürasyon
     FINBERT_MODEL_NAME = os.environ.get('FINBERT_MODEL_NAME', 'ProsusAI/finbert')
     FINBERT_ENABLED = os.environ.get('FINBERT_ENABLED', 'false').lower() == 'true'
+    FINBERT_BATCH_SIZE = 16  # Toplu analizde mikro-batch boyutu
+    FINBERT_PRELOAD = os.environ.get('FINBERT_PRELOAD', 'true').lower() == 'true'  # wsgi.py: gunicorn master'da yükle
+    # Çıkarım arka ucu: 'pytorch' (fp32), 'quantized' (dinamik int8) veya 'onnx' (ONNX Runtime)
+    FINBERT_BACKEND = os.environ.get('FINBERT_BACKEND', 'pytorch')
+    FINBERT_ONNX_QUANTIZE = True  # ONNX grafiğini de int8 kuantize et
+    FINBERT_NUM_THREADS = None  # None: kütüphane varsayılanı (gunicorn'da çekirdek sayısı / worker sayısı)
+    FINBERT_PARITY_CHECK = True  # Alternatif arka ucu fp32 modelle karşılaştır
+    FINBERT_PARITY_MIN_AGREEMENT = 0.9  # Örnek cümlelerde etiket uyumu alt sınırı
+    FINBERT_PARITY_MAX_COMPOUND_DIFF = 0.1  # Compound skor farkı üst sınırı
+    SENTIMENT_CACHE_SIZE = 5000  # Bellekteki (LRU) duyarlılık sonucu sayısı
+    SENTIMENT_CACHE_PERSIST = True  # Sonuçları sentiment_cache tablosuna da yaz
+    SENTIMENT_CACHE_DB_MAX_ROWS = 100000  # Tablo bu sayıyı aşarsa en uzun süredir kullanılmayan kayıtlar silinir
+    SENTIMENT_CACHE_PRUNE_EVERY = 1000  # Tablo boyutu bu kadar yeni kayıtta bir kontrol edilir
+    SENTIMENT_CACHE_TOUCH_SECONDS = 3600  # Kullanım zamanı en fazla bu sıklıkla güncellenir
+    SENTIMENT_WORKER_ENABLED = os.environ.get('SENTIMENT_WORKER_ENABLED', 'false').lower() == 'true'  # Süreç dışı FinBERT worker'ı
+    SENTIMENT_WORKER_ADDRESS = os.environ.get('SENTIMENT_WORKER_ADDRESS', '/tmp/finans-sentiment.sock')  # Unix soketi
+    SENTIMENT_WORKER_AUTHKEY = os.environ.get('SENTIMENT_WORKER_AUTHKEY')  # Boşsa worker rastgele anahtar üretir
+    SENTIMENT_WORKER_AUTHKEY_FILE = os.environ.get('SENTIMENT_WORKER_AUTHKEY_FILE')  # Üretilen anahtarın dosyası (boşsa soket + .key)
+    SENTIMENT_WORKER_TIMEOUT_SECONDS = 5  # Aşılırsa VADER kullanılır
+    SENTIMENT_WORKER_RETRY_SECONDS = 30  # Bağlantı hatasından sonra worker bu süre denenmez
+    SENTIMENT_WORKER_BATCH_WINDOW_MS = 10  # Worker'ın istekleri biriktirdiği pencere
+    SENTIMENT_WORKER_MAX_BATCH = 64  # Mikro-batch başına en fazla metin
     MODEL_CACHE_DIR = './.model_cache'
     
     # Sentiment analiz ayarları
     USE_FINBERT = True  # FinBERT kullanmayı dene
     FALLBACK_TO_VADER = True  # Başarısız olursa VADER kullan
     
+    # Piyasa duyarlılığı anlık görüntüsü (ana sayfa NewsAPI'yi beklemez)
+    MARKET_SENTIMENT_REFRESH_ENABLED = True  # Arka plan yenileyicisini başlat
+    MARKET_SENTIMENT_REFRESH_SECONDS = 900  # 15 dakika
+    
     # API settings
     NEWS_API_URL = 'https://newsapi.org/v2/everything'
+    NEWS_API_TIMEOUT_SECONDS = 10  # Tek istek için zaman aşımı
+    NEWS_FETCH_MAX_WORKERS = 5  # Eş zamanlı NewsAPI sorgusu (ve bağlantı havuzu boyutu)
+    NEWS_FETCH_DEADLINE_SECONDS = 12  # Tüm sorgular için toplam süre; aşılırsa kısmi sonuç
+    NEWS_STORE_REFRESH_SECONDS = 300  # Bu süre içinde aynı sorgu için NewsAPI'ye gidilmez
+    NEWS_STORE_RETENTION_DAYS = 30  # Daha eski haberler depodan silinir
+    NEWS_DEDUP_ENABLED = True  # Yakın kopya haberleri (MinHash) tek kümede say
+    NEWS_DEDUP_THRESHOLD = 0.7  # Aynı küme için tahmini Jaccard benzerliği alt sınırı
+    NEWS_DEDUP_INDEX_SIZE = 10000  # Bellekte tutulan imza sayısı
+    SENTIMENT_DECAY_HALF_LIFE_HOURS = 24  # Hisse duyarlılığında haber etkisinin yarı ömrü
+    SENTIMENT_SOURCE_WEIGHTS = {  # Kaynak adı (küçük harf) -> ağırlık
+        'reuters': 1.5,
+        'bloomberg': 1.5,
+        'financial times': 1.3,
+        'the wall street journal': 1.3,
+        'cnbc': 1.2,
+    }
+    SENTIMENT_DEFAULT_SOURCE_WEIGHT = 1.0
+    SENTIMENT_DAILY_RETENTION_DAYS = 90  # Günlük duyarlılık kovalarının saklanma süresi
+    SENTIMENT_AGGREGATOR_MAX_SEEN = 2000  # Hisse başına hatırlanan haber URL'si
     
     # Prediction settings - gelişmiş model ayarları
     FUTURE_PERIODS = 7  # Varsayılan tahmin günü
     PREDICTION_MODELS = ['lightgbm', 'prophet', 'random_forest']  # Kullanılacak modeller
     
+    # Hızlı tahmin katmanı (fast-path) ayarları
+    # None: ensemble senkron çalışır; değer verilirse bütçe ağır modellerden küçükse
+    # önce hızlı modeller cevap verir, ensemble arka planda iyileştirir
+    PREDICTION_LATENCY_BUDGET_MS = int(os.environ['PREDICTION_LATENCY_BUDGET_MS']) if os.environ.get('PREDICTION_LATENCY_BUDGET_MS') else None
+    PREDICTION_HEAVY_BUDGET_MS = 5000  # Ağır ensemble için tahmini süre
+    PREDICTION_REFINE_WORKERS = 2  # Arka plan ensemble iş parçacığı sayısı
+    PREDICTION_REFINED_CACHE_SECONDS = 3600  # İyileştirilmiş tahminlerin önbellek süresi
+    FAST_PATH_WINDOW = 250  # Hızlı modellerin kullandığı son gözlem sayısı
+    FAST_PATH_AR_ORDER = 5
+    
+    # Tahmin deposu (forecasts tablosu): aynı veri sürümü için bu süre içinde
+    # kaydedilmiş tahmin yeniden hesaplanmadan kullanılır
+    FORECAST_MAX_AGE_SECONDS = 21600  # 6 saat
+    FORECAST_HISTORY_LIMIT = 30  # Geçmiş tahmin değerlendirmesinde kullanılacak kayıt sayısı
+    
+    # Grafik çıktısı: 'json' sıkıştırılmış diziler + istemcide doldurulan şablon,
+    # 'html' sunucuda oluşturulan Plotly HTML'i
+    CHART_RENDER_MODE = os.environ.get('CHART_RENDER_MODE', 'json')
+    CHART_TEMPLATE_MAX_AGE_SECONDS = 86400  # Şablon yanıtı için tarayıcı önbellek süresi
+    CHART_MAX_POINTS = 2000  # Seri başına gönderilecek en fazla nokta (uzun geçmiş seyreltilir)
+    CHART_DOWNSAMPLE_METHOD = 'lttb'  # 'lttb' ya da 'minmax' (mum grafikte kova toplamı)
+    CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Oluşturulmuş grafik önbelleğinin bayt bütçesi
+    CHART_CACHE_PRECOMPRESS = True  # gzip (ve brotli kuruluysa br) kopyalarını önceden hazırla
+    CHART_COMPACT_ENCODING = True  # HTML grafiklerde dizileri ikili (bdata) kodla
+    CHART_STREAM_ENABLED = True  # Açık grafik yeni barları /chart_delta yoklamasıyla alır
+    CHART_STREAM_POLL_SECONDS = 15  # İstemcinin yoklama aralığı
+    CHART_STREAM_CACHE_SIZE = 64  # Süreç başına tutulan hisse/dönem akışı sayısı
+
+    # /analyze aşamaları paralel çalışır; süresi dolan isteğe bağlı aşama varsayılan
+    # değerle atlanır (None: sınırsız). Zorunlu aşamalar: stock_data, indicators
+    ANALYSIS_PIPELINE_WORKERS = 8
+    ANALYSIS_STAGE_TIMEOUTS = {
+        'stock_data': 30,
+        'indicators': 10,
+        'stock_info': 10,
+        'news_analysis': 20,
+        'prediction_result': 60,
+        'chart': 15,
+        'sentiment_chart_html': 10,
+    }
+    
+    # İş modu: /analyze işi kuyruğa ekleyip hemen döner, bölümler tamamlandıkça
+    # gösterilir (durum veritabanında, işler süreç içi thread havuzunda)
+    ANALYSIS_JOBS_ENABLED = os.environ.get('ANALYSIS_JOBS_ENABLED', 'true').lower() == 'true'
+    ANALYSIS_JOB_WORKERS = 4  # Süreç başına eşzamanlı analiz işi
+    ANALYSIS_JOB_MAX_QUEUED = 32  # Süreç başına bekleyen + çalışan iş sınırı (aşılırsa eşzamanlı çalışır)
+    ANALYSIS_JOB_POLL_MS = 750  # Sayfanın iş durumunu yoklama aralığı
+    ANALYSIS_JOB_TIMEOUT_SECONDS = 300  # Bu sürede bitmeyen iş başarısız sayılır
+    ANALYSIS_JOB_TTL_SECONDS = 3600  # Biten işlerin saklanma süresi
+    
+    # Analiz sonuç önbelleği: aynı hisse/dönem/grafik tipi, fiyat verisi, haber deposu
+    # ve kayıtlı tahmin sürümleri değişmedikçe sayfa yeniden hesaplanmadan verilir
+    ANALYSIS_CACHE_ENABLED = True
+    ANALYSIS_CACHE_SIZE = 128  # Süreç başına saklanan analiz sayısı
+    ANALYSIS_CACHE_TTL_SECONDS = 600  # Sürümü izlenmeyen girdiler (şirket bilgisi, sönümlü duyarlılık) için üst sınır
+    
+    # Hisse karşılaştırma ayarları
+    COMPARISON_MAX_TICKERS = 12  # Karşılaştırmada seçilebilecek en fazla hisse
+    
+    # Walk-forward backtest ayarları (ensemble ağırlıklarını belirler)
+    BACKTEST_FOLDS = 5
+    BACKTEST_MIN_TRAIN_SIZE = 120  # İlk kat için minimum eğitim satırı
+    BACKTEST_MAX_WORKERS = None  # None: tüm çekirdekler, 1: sıralı
+    BACKTEST_CACHE_SECONDS = 86400
+    BACKTEST_AUTO_RUN = True  # Ağırlık yoksa arka planda backtest başlat
+    BACKTEST_MAX_QUEUED = 8  # Süreç başına kuyrukta bekleyen en fazla backtest
+    
     # ML Model ayarları
     LIGHTGBM_PARAMS = {
         'objective': 'regression',
@@ -59,6 +171,43 @@ class Config:
         'random_state': 42
     }
     
+    RANDOM_FOREST_PARAMS = {
+        'n_estimators': 100,
+        'max_depth': 10,
+        'random_state': 42,
+        'n_jobs': -1
+    }
+    
+    # Prophet ayarları
+    # 'trading': günlük barlarda anlamsız olan günlük sezonsallık kapalı, haftalık
+    # sezonsallık düşük dereceli, yıllık sezonsallık yalnızca yeterli veri varsa açık.
+    # 'full': eski davranış (günlük + haftalık + yıllık)
+    PROPHET_SEASONALITY_PROFILE = os.environ.get('PROPHET_SEASONALITY_PROFILE', 'trading')
+    PROPHET_USE_VOLUME_REGRESSOR = False  # Gelecek hacim bilinmediği için varsayılan kapalı
+    PROPHET_PARAMS = {
+        'changepoint_prior_scale': 0.05,
+        'seasonality_prior_scale': 10.0,
+        'holidays_prior_scale': 10.0,
+        'seasonality_mode': 'multiplicative'
+    }
+    PROPHET_MAX_ITER = 2000  # Stan optimizasyonu için maksimum iterasyon
+    PROPHET_UNCERTAINTY_SAMPLES = 200  # Belirsizlik aralığı için örnek sayısı (Prophet varsayılanı 1000)
+    PROPHET_FIT_TIMEOUT_SECONDS = 30  # Bu süreyi aşan fit beklenmez, ensemble Prophet'siz devam eder
+    PROPHET_WARM_START = True  # Önceki fit parametreleriyle Stan'i başlat
+    PROPHET_STATE_DIR = os.path.join(MODEL_CACHE_DIR, 'prophet')
+    
+    # Hiperparametre arama (successive halving) ayarları
+    TUNING_CANDIDATES = 27  # İlk turdaki aday sayısı
+    TUNING_ETA = 3  # Her turda adayların 1/ETA'sı kalır, kaynak ETA katına çıkar
+    TUNING_MAX_WORKERS = None  # None: tüm çekirdekler, 1: sıralı
+    TUNING_MAX_QUEUED = 4  # Süreç başına kuyrukta bekleyen en fazla arama
+    TUNING_LIGHTGBM_MIN_ROUNDS = 100
+    TUNING_LIGHTGBM_MAX_ROUNDS = 1000
+    TUNING_RF_MIN_TREES = 25
+    TUNING_RF_MAX_TREES = 200
+    TUNING_MARKET_MAX_TICKERS = 10  # Piyasa bazlı aramada kullanılacak hisse sayısı
+    TUNED_PARAMS_PATH = os.path.join(MODEL_CACHE_DIR, 'tuned_params.json')
+    
     # Rate limiting
     YFINANCE_RATE_LIMIT = 10  # Dakikada maksimum istek
     YFINANCE_MIN_DELAY = 1.0  # İstekler arası minimum bekleme (saniye)
@@ -90,6 +239,7 @@ class ProductionConfig(Config):
     # Production için güvenli ayarlar
     FINBERT_ENABLED = os.environ.get('FINBERT_ENABLED', 'true').lower() == 'true'
     USE_FINBERT = True
+    FINBERT_BACKEND = os.environ.get('FINBERT_BACKEND', 'quantized')  # CPU sunucular için int8
     YFINANCE_RATE_LIMIT = 5  # Production için düşük limit
     LOG_LEVEL = 'INFO'
     
@@ -107,6 +257,10 @@ class TestingConfig(Config):
     USE_FINBERT = False
     ENABLE_DEMO_DATA = True
     CACHE_MAX_AGE_SECONDS = 1  # Test için kısa cache
+    BACKTEST_AUTO_RUN = False
+    MARKET_SENTIMENT_REFRESH_ENABLED = False
+    ANALYSIS_JOBS_ENABLED = False  # Testlerde /analyze sayfayı doğrudan döndürür
+    ANALYSIS_CACHE_ENABLED = False
 
 config = {
     'development': DevelopmentConfig,
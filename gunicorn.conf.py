@@ -0,0 +1,63 @@
+"""
+Gunicorn yapılandırması.
+
+Kullanım: gunicorn -c gunicorn.conf.py
+"""
+
+import gc
+import fcntl
+import multiprocessing
+import os
+import tempfile
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Uygulama (ve FinBERT) master süreçte bir kez yüklenir, worker'lar fork ile paylaşır
+preload_app = True
+
+# Arka plan iş parçacıklarını (piyasa duyarlılığı yenileyicisi) çalıştıracak
+# worker'ı seçen kilit dosyası
+background_lock_path = os.environ.get(
+    'GUNICORN_BACKGROUND_LOCK', os.path.join(tempfile.gettempdir(), 'finans-analiz-background.lock'))
+
+def when_ready(server):
+    """Worker'lar fork edilmeden önce master'daki nesneleri dondur.
+
+    Dondurulan nesneler GC taramasına girmez; böylece worker'larda GC referans
+    sayaçlarına dokunup paylaşılan bellek sayfalarını kopyalamaz.
+    """
+    gc.freeze()
+
+def post_fork(server, worker):
+    """Worker'ı fork sonrası hazırla.
+
+    Master'dan kalan veritabanı bağlantıları kullanılmaz ve torch iş parçacığı
+    sayısı worker başına ayarlanır. Arka plan iş parçacıkları yalnızca kilit
+    dosyasını alan worker'da başlatılır; o worker ölürse kilit serbest kalır
+    ve yerine fork edilen worker alır.
+    """
+    from app import db, start_background_services
+    from app.services.news_service import set_inference_threads
+    from wsgi import app
+
+    with app.app_context():
+        db.engine.dispose()
+
+    set_inference_threads(app.config.get('FINBERT_NUM_THREADS')
+                          or max(1, multiprocessing.cpu_count() // server.cfg.workers))
+
+    lock_file = open(background_lock_path, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return
+
+    # Kilit worker süreci yaşadıkça tutulur
+    worker.background_lock = lock_file
+    server.log.info(f"Arka plan iş parçacıkları worker {worker.pid} içinde başlatılıyor")
+    start_background_services(app)
@@ -126,6 +126,28 @@ def sample_stock_data():
     return data
 
 
+@pytest.fixture
+def make_stock_data():
+    """Factory for deterministic random-walk OHLCV frames on business days.
+    
+    The calendar starts on 2024-01-01 unless `end` is given (e.g. 'today'
+    for models that check how fresh the data is).
+    """
+    import pandas as pd
+    import numpy as np
+    
+    def make(rows=120, seed=0, tz=None, end=None):
+        if end is None:
+            index = pd.date_range('2024-01-01', periods=rows, freq='B', tz=tz)
+        else:
+            index = pd.bdate_range(end=pd.Timestamp(end), periods=rows, tz=tz)
+        close = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1, rows))
+        return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                             'Volume': 1000000.0}, index=index)
+    
+    return make
+
+
 def create_test_data():
     """Create initial test data."""
     # Create test stocks
@@ -0,0 +1,88 @@
+"""
+Unit tests for the /analyze result cache and its dependency versions.
+"""
+
+from datetime import datetime, timedelta
+import pytest
+
+
+@pytest.mark.unit
+class TestAnalysisCache:
+    """Test cache hits, dependency invalidation and news store versions."""
+
+    def test_repeat_analyze_is_served_from_cache(self, app, client, monkeypatch, make_stock_data):
+        from app.services import stock_service, news_service, prediction_service
+
+        data = {'stock_data': make_stock_data(seed=5), 'news': 'v1'}
+        calls = {'pipeline': 0, 'saved': 0}
+
+        def get_stock_news_analysis(name, ticker, days_back=7):
+            calls['pipeline'] += 1
+            return news_service.analyze_news_sentiment([])
+
+        monkeypatch.setitem(app.config, 'ANALYSIS_CACHE_ENABLED', True)
+        monkeypatch.setattr(stock_service, 'get_stock_data', lambda ticker, period: data['stock_data'])
+        monkeypatch.setattr(stock_service, 'get_cached_stock_data', lambda ticker, period: data['stock_data'])
+        monkeypatch.setattr(stock_service, 'get_stock_info', lambda ticker: {'marketCap': 1e9})
+        monkeypatch.setattr(stock_service, 'save_analysis',
+                            lambda *args, **kwargs: calls.__setitem__('saved', calls['saved'] + 1))
+        monkeypatch.setattr(news_service, 'get_news_version', lambda name, ticker, days_back=7: data['news'])
+        monkeypatch.setattr(news_service, 'get_stock_news_analysis', get_stock_news_analysis)
+        monkeypatch.setattr(prediction_service, 'predict_stock_price', lambda *args, **kwargs: None)
+
+        form = {'ticker': 'CACHE1', 'period': '6mo', 'chart_type': 'line'}
+        first = client.post('/analyze', data=form).get_data(as_text=True)
+        second = client.post('/analyze', data=form).get_data(as_text=True)
+        assert calls == {'pipeline': 1, 'saved': 1}
+        assert 'id="stock-chart"' in second
+        assert second.count('indicator-card') == first.count('indicator-card')
+
+        # Another chart type is a separate entry
+        client.post('/analyze', data=dict(form, chart_type='candlestick'))
+        assert calls['pipeline'] == 2
+
+        # A new bar changes the data version
+        data['stock_data'] = make_stock_data(rows=121, seed=5)
+        client.post('/analyze', data=form)
+        assert calls == {'pipeline': 3, 'saved': 3}
+
+        # New articles in the news store change the news version
+        data['news'] = 'v2'
+        client.post('/analyze', data=form)
+        client.post('/analyze', data=form)
+        assert calls == {'pipeline': 4, 'saved': 4}
+
+    def test_news_version_follows_store_state(self, app, monkeypatch):
+        with app.app_context():
+            from app import db
+            from app.models import NewsQueryState
+            from app.services import news_service
+
+            monkeypatch.setitem(app.config, 'NEWS_API_KEY', 'test-key')
+            monkeypatch.setitem(app.config, 'NEWS_STORE_REFRESH_SECONDS', 300)
+            monkeypatch.setattr(news_service, 'get_active_sentiment_model', lambda: 'vader')
+
+            # Never fetched: the next analysis has to fetch news
+            assert news_service.get_news_version('Version Corp', 'VERS.IS') is None
+
+            now = datetime.utcnow()
+            states = [
+                NewsQueryState(search_query=query, covered_from=now - timedelta(days=10),
+                               newest_published_at=now - timedelta(hours=1), last_fetched_at=now)
+                for query in ('Version Corp', 'VERS')
+            ]
+            db.session.add_all(states)
+            db.session.commit()
+
+            version = news_service.get_news_version('Version Corp', 'VERS.IS')
+            assert version is not None
+            assert news_service.get_news_version('Version Corp', 'VERS.IS') == version
+
+            states[0].newest_published_at = now
+            db.session.commit()
+            assert news_service.get_news_version('Version Corp', 'VERS.IS') not in (None, version)
+
+            # Refresh due: the store may be behind NewsAPI
+            states[1].last_fetched_at = now - timedelta(seconds=301)
+            db.session.commit()
+            assert news_service.get_news_version('Version Corp', 'VERS.IS') is None
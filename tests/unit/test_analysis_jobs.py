@@ -0,0 +1,85 @@
+"""
+Unit tests for job-based analysis with progressive section delivery.
+"""
+
+import time
+import pandas as pd
+import pytest
+
+
+def wait_for_job(client, status_url, timeout=20):
+    """Poll the job like the page does and collect delivered sections."""
+    sections, since = [], 0
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state = client.get(f'{status_url}?since={since}').get_json()
+        sections.extend(state['sections'])
+        if state['sections']:
+            since = state['sections'][-1]['id']
+        if state['status'] in ('done', 'failed'):
+            return state, sections
+        time.sleep(0.05)
+    raise AssertionError('analysis job did not finish')
+
+
+@pytest.mark.unit
+class TestAnalysisJobs:
+    """Test job submission, section polling and failures."""
+
+    @pytest.fixture
+    def job_mode(self, app, monkeypatch, make_stock_data):
+        from app.services import stock_service, news_service, prediction_service
+
+        stock_data = make_stock_data(seed=4)
+        monkeypatch.setitem(app.config, 'ANALYSIS_JOBS_ENABLED', True)
+        monkeypatch.setattr(stock_service, 'get_stock_data', lambda ticker, period: stock_data)
+        monkeypatch.setattr(stock_service, 'get_stock_info', lambda ticker: {'marketCap': 1e9, 'beta': 1.2})
+        monkeypatch.setattr(news_service, 'get_stock_news_analysis',
+                            lambda name, ticker, days_back=7: news_service.analyze_news_sentiment([]))
+        monkeypatch.setattr(prediction_service, 'predict_stock_price', lambda *args, **kwargs: None)
+        return monkeypatch
+
+    def test_job_delivers_sections_progressively(self, client, job_mode):
+        response = client.post('/analyze', data={'ticker': 'AAPL', 'period': '6mo', 'chart_type': 'line'},
+                               headers={'Accept': 'application/json'})
+        assert response.status_code == 202
+        job = response.get_json()
+
+        page = client.get(job['page_url']).get_data(as_text=True)
+        assert 'data-analysis-section="chart"' in page
+        assert job['status_url'] in page
+
+        state, sections = wait_for_job(client, job['status_url'])
+        assert state['status'] == 'done'
+
+        delivered = {section['name']: section['html'] for section in sections}
+        assert {'chart', 'price', 'indicators', 'forecast', 'news', 'summary'} <= set(delivered)
+        assert 'id="stock-chart"' in delivered['chart']
+        assert 'Teknik Göstergeler' in delivered['indicators']
+        # Sections are sent once; a later poll only returns newer ones
+        assert client.get(f"{job['status_url']}?since={sections[-1]['id']}").get_json()['sections'] == []
+
+    def test_browser_post_redirects_to_job_page(self, client, job_mode):
+        response = client.post('/analyze', data={'ticker': 'AAPL', 'period': '6mo', 'chart_type': 'line'})
+        assert response.status_code == 302
+        job_id = response.headers['Location'].rsplit('/analysis/', 1)[1]
+        # Let the job finish while the services are still patched
+        state, _ = wait_for_job(client, f'/analysis_jobs/{job_id}')
+        assert state['status'] == 'done'
+
+    def test_required_stage_failure_marks_job_failed(self, client, job_mode):
+        from app.services import stock_service
+
+        job_mode.setattr(stock_service, 'get_stock_data', lambda ticker, period: pd.DataFrame())
+        response = client.post('/analyze', data={'ticker': 'AAPL', 'period': '6mo', 'chart_type': 'line'},
+                               headers={'Accept': 'application/json'})
+
+        state, sections = wait_for_job(client, response.get_json()['status_url'])
+        assert state['status'] == 'failed'
+        assert 'için yeterli veri bulunamadı' in state['error']
+        # Independent sections (news) may already be delivered; nothing built on price data is
+        assert not {'chart', 'price', 'indicators', 'summary'} & {section['name'] for section in sections}
+
+    def test_unknown_job(self, client):
+        assert client.get('/analysis_jobs/missing').status_code == 404
+        assert client.get('/analysis/missing').status_code == 302
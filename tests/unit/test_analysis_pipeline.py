@@ -0,0 +1,126 @@
+"""
+Unit tests for the parallel analysis stage pipeline.
+"""
+
+import time
+import threading
+import pandas as pd
+import pytest
+
+
+@pytest.mark.unit
+class TestAnalysisPipeline:
+    """Test dependency ordering, parallelism and stage failure handling."""
+
+    def test_independent_stages_run_concurrently(self, app):
+        with app.app_context():
+            from app.services.analysis_pipeline import Stage, run_stages
+
+            # Each stage waits for the other two; run one after another the barrier breaks
+            barrier = threading.Barrier(3, timeout=5)
+
+            def meet(value):
+                def run(**inputs):
+                    barrier.wait()
+                    return value + sum(inputs.values())
+                return run
+
+            stages = [
+                Stage('a', meet(1)),
+                Stage('b', meet(2)),
+                Stage('c', meet(3)),
+                Stage('total', lambda a, b, c: a + b + c, deps=['a', 'b', 'c'])
+            ]
+
+            pipeline = run_stages(stages)
+
+            assert pipeline['failed'] == set()
+            assert pipeline['results']['total'] == 6
+
+    def test_queued_stage_timeout_starts_when_it_runs(self, app, monkeypatch):
+        with app.app_context():
+            from concurrent.futures import ThreadPoolExecutor
+            from app.services import analysis_pipeline
+            from app.services.analysis_pipeline import Stage, run_stages
+
+            # One worker: 'quick' waits in the queue longer than its own timeout
+            executor = ThreadPoolExecutor(max_workers=1)
+            monkeypatch.setattr(analysis_pipeline, '_pipeline_executor', executor)
+            try:
+                pipeline = run_stages([
+                    Stage('busy', lambda: time.sleep(0.3) or 'busy'),
+                    Stage('quick', lambda: 'ok', timeout=0.2, default='fallback')
+                ])
+            finally:
+                executor.shutdown()
+
+            assert pipeline['failed'] == set()
+            assert pipeline['results'] == {'busy': 'busy', 'quick': 'ok'}
+            assert pipeline['timings']['quick'] < 0.2
+
+    def test_optional_stage_falls_back_to_default(self, app):
+        with app.app_context():
+            from app.services.analysis_pipeline import Stage, run_stages
+
+            def broken():
+                raise RuntimeError('upstream down')
+
+            done = []
+            stages = [
+                Stage('slow', lambda: time.sleep(1) or 'late', timeout=0.1, default='fallback'),
+                Stage('broken', broken, default={}),
+                Stage('uses_slow', lambda slow: slow.upper(), deps=['slow'])
+            ]
+
+            started = time.monotonic()
+            pipeline = run_stages(stages, on_stage_done=lambda name, result: done.append(name))
+
+            assert time.monotonic() - started < 0.9
+            assert pipeline['results'] == {'slow': 'fallback', 'broken': {}, 'uses_slow': 'FALLBACK'}
+            assert pipeline['failed'] == {'slow', 'broken'}
+            assert sorted(done) == ['broken', 'slow', 'uses_slow']
+
+    def test_required_stage_failure_raises(self, app):
+        with app.app_context():
+            from app.services.analysis_pipeline import Stage, AnalysisStageError, run_stages
+
+            calls = []
+            stages = [
+                Stage('data', lambda: None, required=True),
+                Stage('dependent', lambda data: calls.append(data), deps=['data'])
+            ]
+
+            with pytest.raises(AnalysisStageError) as exc_info:
+                run_stages(stages)
+            assert exc_info.value.stage == 'data'
+            assert calls == []
+
+    def test_invalid_graph_raises(self, app):
+        with app.app_context():
+            from app.services.analysis_pipeline import Stage, run_stages
+
+            with pytest.raises(ValueError):
+                run_stages([Stage('a', lambda b: b, deps=['b']), Stage('b', lambda a: a, deps=['a'])])
+            with pytest.raises(ValueError):
+                run_stages([Stage('a', lambda missing: missing, deps=['missing'])])
+
+    def test_analyze_renders_when_optional_stages_fail(self, app, client, monkeypatch, make_stock_data):
+        from app.services import stock_service, news_service, prediction_service
+
+        stock_data = make_stock_data(seed=3)
+
+        def failing(*args, **kwargs):
+            raise RuntimeError('service unavailable')
+
+        monkeypatch.setattr(stock_service, 'get_stock_data', lambda ticker, period: stock_data)
+        monkeypatch.setattr(stock_service, 'get_stock_info', failing)
+        monkeypatch.setattr(news_service, 'get_stock_news_analysis', failing)
+        monkeypatch.setattr(prediction_service, 'predict_stock_price', failing)
+
+        response = client.post('/analyze', data={'ticker': 'AAPL', 'period': '6mo', 'chart_type': 'line'})
+        assert response.status_code == 200
+        assert 'Fiyat Grafiği ve Teknik Göstergeler' in response.get_data(as_text=True)
+
+        monkeypatch.setattr(stock_service, 'get_stock_data', lambda ticker, period: pd.DataFrame())
+        response = client.post('/analyze', data={'ticker': 'AAPL', 'period': '6mo', 'chart_type': 'line'})
+        assert 'için yeterli veri bulunamadı' in response.get_data(as_text=True)
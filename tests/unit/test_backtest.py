@@ -0,0 +1,120 @@
+"""
+Unit tests for the walk-forward backtesting engine.
+"""
+
+import time
+import numpy as np
+import pytest
+
+
+@pytest.mark.unit
+@pytest.mark.ml
+class TestBacktest:
+    """Test walk-forward backtesting."""
+
+    def test_fold_cutoffs_expanding_window(self):
+        from app.services.backtest_service import _fold_cutoffs
+
+        cutoffs = _fold_cutoffs(260, horizon=7, n_folds=4, min_train_size=120)
+
+        assert len(cutoffs) == 4
+        assert cutoffs == sorted(cutoffs)
+        assert cutoffs[-1] == 260 - 7
+        assert cutoffs[0] >= 120
+
+    def test_fold_cutoffs_not_enough_data(self):
+        from app.services.backtest_service import _fold_cutoffs
+
+        assert _fold_cutoffs(100, horizon=7, n_folds=4, min_train_size=120) == []
+
+    def test_run_backtest_metrics_and_weights(self, app, make_stock_data):
+        with app.app_context():
+            from app.services import backtest_service
+            from app.services.prediction_service import SKLEARN_AVAILABLE
+
+            if not SKLEARN_AVAILABLE:
+                pytest.skip("scikit-learn yüklü değil")
+
+            result = backtest_service.run_backtest(
+                'BTEST', make_stock_data(rows=260, seed=1, end='today'), horizon=5, n_folds=3,
+                models=['random_forest'], max_workers=1
+            )
+
+            assert result is not None
+            metrics = result['models']['RandomForest']
+            assert metrics['folds'] == 3
+            assert metrics['mae'] > 0
+            assert metrics['rmse'] >= metrics['mae']
+            assert 0.0 <= metrics['directional_accuracy'] <= 1.0
+            assert [h['step'] for h in metrics['by_horizon']] == [1, 2, 3, 4, 5]
+
+            weights = backtest_service.get_ensemble_weights('BTEST', horizon=5)
+            assert weights == {'RandomForest': pytest.approx(1.0)}
+            # Results are kept per horizon
+            assert backtest_service.get_ensemble_weights('BTEST', horizon=7) is None
+
+    def test_ensemble_uses_backtest_weights(self, app, make_stock_data):
+        with app.app_context():
+            from app.services.prediction_service import predict_with_ensemble, SKLEARN_AVAILABLE
+
+            if not SKLEARN_AVAILABLE:
+                pytest.skip("scikit-learn yüklü değil")
+
+            result = predict_with_ensemble(make_stock_data(rows=260, seed=1, end='today'), 5, model_weights={'RandomForest': 1.0})
+
+            assert result['weight_source'] == 'backtest'
+
+    def test_random_forest_confidence_follows_validation_error(self, app, make_stock_data):
+        with app.app_context():
+            from app.services.prediction_service import (
+                predict_with_random_forest, build_training_set, create_features, SKLEARN_AVAILABLE
+            )
+
+            if not SKLEARN_AVAILABLE:
+                pytest.skip("scikit-learn yüklü değil")
+
+            stock_data = make_stock_data(rows=260, seed=1, end='today')
+            result = predict_with_random_forest(stock_data, 5)
+            _, y = build_training_set(create_features(stock_data))
+
+            # Same holdout rule as LightGBM, so the confidence fallback compares like with like
+            assert result['mae'] > 0
+            assert result['confidence'] == pytest.approx(max(0.1, min(0.9, 1 - result['mae'] / y.mean())))
+
+            # A noisier series validates worse and gets less weight
+            noisy = stock_data.copy()
+            noisy['Close'] += np.random.default_rng(7).normal(0, 8, len(noisy))
+            assert predict_with_random_forest(noisy, 5)['confidence'] < result['confidence']
+
+    def test_fold_models_are_single_threaded(self):
+        from app.services.backtest_service import _fold_params
+
+        assert _fold_params('random_forest')['n_jobs'] == 1
+        assert _fold_params('lightgbm')['num_threads'] == 1
+        assert _fold_params('prophet') is None
+
+    def test_schedule_backtest_runs_in_background(self, app, make_stock_data, monkeypatch):
+        with app.app_context():
+            from app.services import backtest_service
+            from app.services.prediction_service import SKLEARN_AVAILABLE
+
+            if not SKLEARN_AVAILABLE:
+                pytest.skip("scikit-learn yüklü değil")
+
+            run_backtest = backtest_service.run_backtest
+            monkeypatch.setattr(backtest_service, 'run_backtest', lambda ticker, stock_data, horizon: run_backtest(
+                ticker, stock_data, horizon=horizon, n_folds=2, models=['random_forest'], max_workers=1))
+
+            stock_data = make_stock_data(rows=260, seed=1, end='today')
+            assert backtest_service.has_enough_data(stock_data, horizon=3)
+            assert not backtest_service.has_enough_data(stock_data.tail(100), horizon=3)
+
+            assert backtest_service.schedule_backtest('BSCHED', stock_data, horizon=3) is True
+            deadline = time.time() + 60
+            while backtest_service.is_backtest_running('BSCHED', 3) and time.time() < deadline:
+                time.sleep(0.05)
+
+            assert backtest_service.get_backtest_result('BSCHED', 3)['horizon'] == 3
+
+            monkeypatch.setitem(app.config, 'BACKTEST_MAX_QUEUED', 0)
+            assert backtest_service.schedule_backtest('BFULL', stock_data, horizon=3) is False
@@ -0,0 +1,213 @@
+"""
+Unit tests for the compact chart payload and its cached layout template.
+"""
+
+import base64
+import gzip
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def decode(encoded, dtype):
+    return np.frombuffer(base64.b64decode(encoded), dtype=dtype)
+
+
+@pytest.mark.unit
+class TestChartPayload:
+    """Test typed-array encoding and template reuse."""
+
+    def test_payload_round_trips_typed_arrays(self, app, make_stock_data):
+        with app.app_context():
+            from app.services.chart_service import create_stock_chart_payload
+            from app.services.stock_service import calculate_technical_indicators
+
+            stock_data = make_stock_data()
+            indicators = calculate_technical_indicators(stock_data)
+            prediction = {
+                'predictions': pd.DataFrame({
+                    'date': pd.date_range('2030-01-01', periods=3),
+                    'predicted_price': [1.0, 2.0, 3.0]
+                }),
+                'confidence': 0.8
+            }
+
+            payload = create_stock_chart_payload(stock_data, indicators, prediction, 'candlestick', 'AAPL')
+            arrays = payload['arrays']
+
+            assert payload['length'] == len(stock_data)
+            times = decode(arrays['time'], '<f8')
+            assert times[0] == stock_data.index[0].timestamp()
+            np.testing.assert_allclose(decode(arrays['close'], '<f4'), stock_data['Close'], rtol=1e-6)
+            assert len(decode(arrays['rsi'], '<f4')) == len(stock_data)
+            assert {'open', 'high', 'low'} <= set(arrays)
+            assert decode(arrays['prediction'], '<f4').tolist() == [1.0, 2.0, 3.0]
+            assert payload['labels']['traces']['Tahmin'] == 'Tahmin (Güven: %80)'
+
+    def test_times_are_wall_clock_seconds(self, app, make_stock_data):
+        with app.app_context():
+            from app.services.chart_service import create_stock_chart_payload, encode_epoch
+
+            # BIST bars stay on their trading day instead of shifting to 21:00 UTC the day before
+            stock_data = make_stock_data(tz='Europe/Istanbul')
+            payload = create_stock_chart_payload(stock_data, None, None, 'line', 'AKBNK.IS')
+            times = decode(payload['arrays']['time'], '<f8')
+            assert times[0] == pd.Timestamp('2024-01-01').timestamp()
+
+            # Dates before 1970 do not wrap around
+            old = pd.to_datetime(['1965-06-01', '2040-01-01'])
+            assert decode(encode_epoch(old), '<f8').tolist() == [old[0].timestamp(), old[1].timestamp()]
+
+    def test_template_is_cached_and_served_conditionally(self, app, client):
+        with app.app_context():
+            from app.services.chart_service import get_stock_chart_template
+
+            template = get_stock_chart_template('line')
+            assert get_stock_chart_template('line') is template
+            assert template['traces'][0]['data'] == {'x': 'time', 'y': 'close'}
+            assert 'arrays' not in template
+
+        response = client.get('/chart_template/line')
+        assert response.status_code == 200
+        assert response.cache_control.max_age == app.config['CHART_TEMPLATE_MAX_AGE_SECONDS']
+
+        cached = client.get('/chart_template/line', headers={'If-None-Match': response.headers['ETag']})
+        assert cached.status_code == 304
+
+    def test_long_history_is_downsampled(self, app, monkeypatch, make_stock_data):
+        with app.app_context():
+            from app.services.chart_service import create_stock_chart_payload
+            from app.services.stock_service import calculate_technical_indicators
+
+            monkeypatch.setitem(app.config, 'CHART_MAX_POINTS', 300)
+            stock_data = make_stock_data(rows=3000)
+            indicators = calculate_technical_indicators(stock_data)
+
+            line = create_stock_chart_payload(stock_data, indicators, None, 'line', 'AAPL')
+            assert line['downsampled'] is True
+            assert line['length'] <= 300
+            assert len(decode(line['arrays']['rsi'], '<f4')) == line['length']
+
+            candles = create_stock_chart_payload(stock_data, indicators, None, 'candlestick', 'AAPL')
+            assert candles['length'] <= 300
+            assert decode(candles['arrays']['high'], '<f4').max() == pytest.approx(stock_data['High'].max())
+            assert decode(candles['arrays']['volume'], '<f4').sum() == pytest.approx(stock_data['Volume'].sum(), rel=1e-4)
+
+            # Zoomed range is re-sent at full resolution
+            start = int(stock_data.index[1000].timestamp())
+            end = int(stock_data.index[1099].timestamp())
+            zoomed = create_stock_chart_payload(stock_data, indicators, None, 'line', 'AAPL', x_range=(start, end))
+            assert zoomed['length'] == 100
+            assert zoomed['downsampled'] is False
+            assert decode(zoomed['arrays']['time'], '<f8')[0] == start
+
+    def test_rendered_chart_is_cached_by_data_and_forecast_version(self, app, monkeypatch, make_stock_data):
+        with app.app_context():
+            from app.services import chart_service
+            from app.services.stock_service import calculate_technical_indicators
+
+            calls = []
+            original = chart_service.create_stock_chart_payload
+
+            def counting(*args, **kwargs):
+                calls.append(args)
+                return original(*args, **kwargs)
+
+            monkeypatch.setattr(chart_service, 'create_stock_chart_payload', counting)
+            stock_data = make_stock_data()
+            indicators = lambda: calculate_technical_indicators(stock_data)
+
+            first = chart_service.render_stock_chart(stock_data, indicators, None, 'line', 'CACHE', '1y')
+            second = chart_service.render_stock_chart(stock_data, indicators, None, 'line', 'CACHE', '1y')
+            assert second is first
+            assert len(calls) == 1
+            assert json.loads(gzip.decompress(first['gzip'])) == json.loads(first['body'])
+
+            # New bar or new forecast produces a new entry
+            chart_service.render_stock_chart(make_stock_data(121), None, None, 'line', 'CACHE', '1y')
+            prediction = {
+                'predictions': pd.DataFrame({'date': pd.date_range('2030-01-01', periods=2),
+                                             'predicted_price': [1.0, 2.0]}),
+                'confidence': 0.5
+            }
+            chart_service.render_stock_chart(stock_data, indicators, prediction, 'line', 'CACHE', '1y')
+            assert len(calls) == 3
+
+    def test_chart_data_serves_precompressed_variant(self, app, client, monkeypatch, make_stock_data):
+        from app.services import stock_service
+
+        monkeypatch.setattr(stock_service, 'get_stock_data', lambda ticker, period: make_stock_data())
+
+        response = client.get('/chart_data/GZIP?period=1y', headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        payload = json.loads(gzip.decompress(response.data))
+        assert payload['ticker'] == 'GZIP'
+
+        plain = client.get('/chart_data/GZIP?period=1y')
+        assert 'Content-Encoding' not in plain.headers
+        assert json.loads(plain.data) == payload
+
+    def test_stock_chart_resolves_multiindex_columns(self, app, make_stock_data):
+        with app.app_context():
+            from app.services.chart_service import create_stock_chart, create_performance_chart, _resolve_columns
+            from app.services.stock_service import calculate_technical_indicators
+
+            stock_data = make_stock_data()
+            indicators = calculate_technical_indicators(stock_data)
+            multi = stock_data.copy()
+            multi.columns = pd.MultiIndex.from_product([multi.columns, ['AAPL']])
+
+            assert _resolve_columns(multi)['Close'] == ('Close', 'AAPL')
+            assert _resolve_columns(stock_data)['Close'] == 'Close'
+
+            html = create_stock_chart(multi, indicators, None, 'candlestick', 'AAPL')
+            assert html is not None
+            assert 'Mum Grafiği' in html and 'MACD Histogram' in html
+
+            assert create_performance_chart({'1A': 2.5, '3A': -1.0}) is not None
+
+    def test_html_forecast_trace_uses_prediction_dates(self, app, make_stock_data, monkeypatch):
+        with app.app_context():
+            from app.services import chart_service
+
+            figures = []
+            monkeypatch.setattr(chart_service, 'figure_to_html', lambda fig: figures.append(fig) or '')
+            monkeypatch.setitem(app.config, 'CHART_COMPACT_ENCODING', False)
+
+            dates = pd.date_range('2024-06-03', periods=3, freq='B')
+            prediction = {
+                'predictions': pd.DataFrame({'date': dates, 'predicted_price': [1.0, 2.0, 3.0]}),
+                'confidence': 0.5
+            }
+            chart_service.create_stock_chart(make_stock_data(), None, prediction, 'line', 'AAPL')
+
+            forecast = next(trace for trace in figures[0].data if trace.name.startswith('Tahmin'))
+            assert pd.DatetimeIndex(forecast.x).equals(dates)
+
+    def test_compact_figure_matches_text_arrays(self, app):
+        with app.app_context():
+            import plotly.graph_objs as go
+            from app.services.chart_service import compact_figure, html_safe_json
+
+            index = pd.date_range('2024-03-01 10:00', periods=4, freq='D', tz='Europe/Istanbul')
+            prices = np.array([101.25, np.nan, 99.5, 100.125])
+            volume = np.array([3e7, 2e7, 5e7, 1e7])
+
+            fig = go.Figure([go.Scatter(x=index.to_numpy(), y=prices), go.Bar(x=index.to_numpy(), y=volume)])
+            compact_figure(fig)
+            price_trace, volume_trace = fig.data
+
+            # Wall-clock milliseconds, i.e. where Plotly places the text dates
+            expected_ms = [pd.Timestamp(ts.strftime('%Y-%m-%d %H:%M')).value // 10 ** 6 for ts in index]
+            assert decode(price_trace.x['bdata'], '<f8').tolist() == expected_ms
+            assert fig.layout.xaxis.type == 'date'
+
+            assert price_trace.y['dtype'] == 'f4'
+            np.testing.assert_array_equal(decode(price_trace.y['bdata'], '<f4'), prices.astype(np.float32))
+            assert volume_trace.y['dtype'] == 'f8'  # large integers stay exact
+            assert decode(volume_trace.y['bdata'], '<f8').tolist() == volume.tolist()
+
+            assert html_safe_json({'title': '</script>'}) == '{"title":"\\u003c/script\\u003e"}'
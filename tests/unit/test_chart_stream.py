@@ -0,0 +1,110 @@
+"""
+Unit tests for incremental indicators and the chart update stream.
+"""
+
+import numpy as np
+import pytest
+
+INDICATOR_NAMES = {
+    'sma_20': 'SMA_20', 'sma_50': 'SMA_50', 'bb_high': 'BB_High', 'bb_low': 'BB_Low',
+    'rsi': 'RSI', 'macd': 'MACD', 'macd_signal': 'MACD_Signal', 'macd_hist': 'MACD_Hist'
+}
+
+
+def seconds(timestamp):
+    """Wall-clock epoch seconds, as on the chart time axis."""
+    return float(timestamp.tz_localize(None).timestamp())
+
+
+@pytest.mark.unit
+class TestChartStream:
+    """Test incremental indicator updates and stream deltas."""
+
+    def test_incremental_indicators_match_full_recompute(self, app, make_stock_data):
+        with app.app_context():
+            from app.services.chart_stream import IncrementalIndicators
+            from app.services.stock_service import calculate_technical_indicators
+
+            stock_data = make_stock_data()
+            expected = calculate_technical_indicators(stock_data)
+
+            state = IncrementalIndicators()
+            outputs = [state.update(close) for close in stock_data['Close']]
+
+            for field, name in INDICATOR_NAMES.items():
+                np.testing.assert_allclose([values[field] for values in outputs], expected[name].to_numpy(),
+                                           rtol=1e-9, equal_nan=True)
+
+    def test_advance_updates_only_new_and_revised_bars(self, app, make_stock_data):
+        with app.app_context():
+            from app.services.chart_stream import ChartStream
+            from app.services.stock_service import calculate_technical_indicators
+
+            full = make_stock_data(rows=122)
+            stream = ChartStream(full.iloc[:120])
+            assert stream.advance(full.iloc[:120]) is False
+
+            assert stream.advance(full.iloc[:121]) is True
+            expected = calculate_technical_indicators(full.iloc[:121])
+            delta = stream.delta(seconds(full.index[119]))
+            assert delta['replace_last'] is True
+            assert delta['time'] == [seconds(ts) for ts in full.index[119:121]]
+            assert delta['close'] == [pytest.approx(value) for value in full['Close'].iloc[119:121]]
+            assert delta['macd'][-1] == pytest.approx(expected['MACD'].iloc[-1])
+            assert delta['rsi'][-1] == pytest.approx(expected['RSI'].iloc[-1])
+
+            # Intraday revision of the last bar replaces the last point
+            revised = full.iloc[:121].copy()
+            revised.iloc[-1, revised.columns.get_loc('Close')] += 2.5
+            assert stream.advance(revised) is True
+            expected = calculate_technical_indicators(revised)
+            delta = stream.delta(seconds(revised.index[-1]))
+            assert delta['time'] == [seconds(revised.index[-1])]
+            assert delta['close'] == [pytest.approx(revised['Close'].iloc[-1])]
+            assert delta['sma_20'][0] == pytest.approx(expected['SMA_20'].iloc[-1])
+            assert len(stream.times) == len(stream.indicators['macd']) == 121
+
+            with pytest.raises(LookupError):
+                stream.advance(full.iloc[:100])
+            with pytest.raises(LookupError):
+                stream.delta(seconds(full.index[121]))
+
+    def test_times_use_wall_clock_seconds(self, app, make_stock_data):
+        with app.app_context():
+            from app.services.chart_stream import ChartStream
+            from app.services.chart_service import epoch_seconds
+
+            stock_data = make_stock_data(rows=60, tz='Europe/Istanbul')
+            stream = ChartStream(stock_data)
+            assert stream.times == epoch_seconds(stock_data.index).tolist()
+            # Midnight Istanbul bars stay on their own day, matching the chart payload
+            assert stream.times[0] == seconds(stock_data.index[0]) == 1704067200.0
+
+    def test_delta_route_polls_from_client_last_bar(self, app, client, monkeypatch, make_stock_data):
+        from app.services import stock_service
+
+        data = {'stock_data': make_stock_data()}
+        monkeypatch.setattr(stock_service, 'get_stock_data', lambda ticker, period: data['stock_data'])
+
+        since = seconds(data['stock_data'].index[-3])
+        response = client.get(f'/chart_delta/DELTA?period=1y&since={since}')
+        assert response.status_code == 200
+        result = response.get_json()
+        delta = result['delta']
+        assert delta['replace_last'] is True
+        assert delta['time'] == [seconds(ts) for ts in data['stock_data'].index[-3:]]
+        assert len(delta['macd_hist']) == 3
+
+        # Unchanged data: nothing to send
+        since = delta['time'][-1]
+        response = client.get(f"/chart_delta/DELTA?period=1y&since={since}&version={result['version']}")
+        assert response.status_code == 204
+
+        # A new bar is appended from the shared stream
+        data['stock_data'] = make_stock_data(rows=121)
+        result = client.get(f"/chart_delta/DELTA?period=1y&since={since}&version={result['version']}").get_json()
+        assert result['delta']['time'] == [seconds(ts) for ts in data['stock_data'].index[-2:]]
+
+        # The client's last bar left the history: reload
+        result = client.get('/chart_delta/DELTA?period=1y&since=1.0').get_json()
+        assert result == {'reset': True}
@@ -0,0 +1,84 @@
+"""
+Unit tests for the vectorized stock comparison engine.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_closes(values, start='2024-01-01', freq='B', tz=None):
+    index = pd.date_range(start, periods=len(values), freq=freq, tz=tz)
+    return pd.DataFrame({'Close': np.asarray(values, dtype=float), 'Volume': 1.0}, index=index)
+
+
+@pytest.mark.unit
+class TestComparisonService:
+    """Test alignment and metrics of the comparison matrix."""
+
+    def test_metrics_match_per_series_reference(self, app):
+        with app.app_context():
+            from app.services.comparison_service import build_comparison
+
+            rng = np.random.default_rng(1)
+            stocks = {
+                'AAA': make_closes(100 * np.cumprod(1 + rng.normal(0, 0.01, 300))),
+                'BBB': make_closes(50 * np.cumprod(1 + rng.normal(0, 0.02, 300)), tz='Europe/Istanbul'),
+                'CCC': make_closes(20 * np.cumprod(1 + rng.normal(0, 0.015, 250)), start='2024-03-01')
+            }
+
+            comparison = build_comparison(stocks)
+            assert comparison['tickers'] == ['AAA', 'BBB', 'CCC']
+            assert comparison['normalized'].shape == (len(comparison['dates']), 3)
+
+            for i, (ticker, data) in enumerate(stocks.items()):
+                close = data['Close']
+                result = comparison['performance'][ticker]
+                returns = close.pct_change().dropna()
+
+                assert result['start_price'] == pytest.approx(close.iloc[0])
+                assert result['current_price'] == pytest.approx(close.iloc[-1])
+                assert result['total_return'] == pytest.approx((close.iloc[-1] / close.iloc[0] - 1) * 100)
+                assert result['volatility'] == pytest.approx(returns.std() * np.sqrt(252) * 100)
+                assert result['max_drawdown'] == pytest.approx((close / close.cummax() - 1).min() * 100)
+
+                # Curve is undefined before the ticker's first trading day
+                curve = comparison['normalized'][:, i]
+                assert np.count_nonzero(~np.isnan(curve)) == len(close)
+
+            correlation = np.array(comparison['correlation'])
+            assert correlation.shape == (3, 3)
+            np.testing.assert_allclose(np.diag(correlation), 1.0)
+            np.testing.assert_allclose(correlation, correlation.T)
+
+    def test_gaps_use_last_observed_price(self, app):
+        with app.app_context():
+            from app.services.comparison_service import build_comparison
+
+            daily = make_closes([10, 11, 12, 13, 14], freq='D')
+            # Missing the third day: return spans from day 2 to day 4
+            sparse = daily.drop(daily.index[2]) * 2
+
+            comparison = build_comparison({'FULL': daily, 'GAPPY': sparse})
+            assert comparison['performance']['GAPPY']['total_return'] == pytest.approx(40.0)
+            assert np.isnan(comparison['normalized'][2, 1])
+
+            assert build_comparison({'ONE': make_closes([5.0])}) is None
+
+    def test_compare_stocks_accepts_more_than_six_tickers(self, app, client, monkeypatch):
+        from app.services import stock_service
+
+        rng = np.random.default_rng(2)
+        monkeypatch.setattr(stock_service, 'get_stock_data',
+                            lambda ticker, period: make_closes(100 + np.cumsum(rng.normal(0, 1, 60))))
+        monkeypatch.setitem(app.config, 'COMPARISON_MAX_TICKERS', 8)
+
+        tickers = [f'T{i}' for i in range(8)]
+        response = client.post('/compare_stocks', data={'tickers': tickers, 'period': '3mo'})
+        assert response.status_code == 200
+        page = response.get_data(as_text=True)
+        assert 'Günlük Getiri Korelasyonu' in page
+        assert 'T7' in page
+
+        too_many = client.post('/compare_stocks', data={'tickers': tickers + ['T8'], 'period': '3mo'})
+        assert too_many.status_code == 302
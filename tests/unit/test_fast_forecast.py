@@ -0,0 +1,69 @@
+"""
+Unit tests for the fast-path forecaster.
+"""
+
+import time
+import pytest
+import numpy as np
+
+
+@pytest.mark.unit
+@pytest.mark.ml
+class TestFastForecast:
+    """Test closed-form fast models."""
+
+    def test_individual_models_return_horizon(self, make_stock_data):
+        from app.services.fast_forecast_service import (
+            forecast_holt, forecast_ar, forecast_kalman_local_level
+        )
+
+        y = make_stock_data(rows=200, end='today')['Close'].to_numpy()
+        for model in (forecast_holt, forecast_ar, forecast_kalman_local_level):
+            result = model(y, prediction_days=5)
+            assert result is not None
+            assert len(result['predictions']) == 5
+            assert np.all(np.isfinite(result['predictions']))
+            assert result['mse'] > 0
+
+    def test_predict_fast_combines_models(self, make_stock_data):
+        from app.services.fast_forecast_service import predict_fast
+
+        df = make_stock_data(rows=200, end='today')
+        result = predict_fast(df, prediction_days=7)
+
+        assert result is not None
+        assert result['is_fast_path'] is True
+        assert len(result['predictions']) == 7
+        assert 0.1 <= result['confidence'] <= 0.9
+        assert abs(sum(result['weights'].values()) - 1.0) < 1e-9
+        # Tahminler son fiyatın makul bir aralığında olmalı
+        last_close = df['Close'].iloc[-1]
+        assert all(abs(p / last_close - 1) < 0.2 for p in result['predictions'])
+
+    def test_predict_fast_insufficient_data(self, make_stock_data):
+        from app.services.fast_forecast_service import predict_fast
+
+        assert predict_fast(make_stock_data(rows=10, end='today')) is None
+
+    def test_predict_stock_price_latency_budget(self, app, make_stock_data):
+        """Fast path answers first and schedules the ensemble refinement."""
+        with app.app_context():
+            from app.services import prediction_service
+
+            df = make_stock_data(rows=200, end='today')
+            result = prediction_service.predict_stock_price('FAST', df, prediction_days=7, latency_budget_ms=100)
+
+            assert result is not None
+            assert result['model_name'] == 'FastEnsemble'
+            assert result['refining'] is True
+            assert len(result['predictions']) == 7
+
+            # Arka plan ensemble tamamlandıktan sonra iyileştirilmiş sonuç dönmeli
+            deadline = time.time() + 60
+            while prediction_service._refine_in_progress and time.time() < deadline:
+                time.sleep(0.1)
+
+            refined = prediction_service.predict_stock_price('FAST', df, prediction_days=7, latency_budget_ms=100)
+            assert refined is not None
+            if prediction_service.SKLEARN_AVAILABLE:
+                assert refined['model_name'] != 'FastEnsemble'
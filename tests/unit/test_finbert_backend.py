@@ -0,0 +1,56 @@
+"""
+Unit tests for FinBERT inference backend selection.
+"""
+
+import pytest
+
+
+@pytest.mark.unit
+@pytest.mark.ml
+class TestFinbertBackend:
+    """Test backend resolution and fp32 fallbacks."""
+
+    def test_resolve_backend(self, monkeypatch):
+        from app.services import finbert_service
+
+        assert finbert_service.resolve_backend(None) == 'pytorch'
+        assert finbert_service.resolve_backend('QUANTIZED') == 'quantized'
+        assert finbert_service.resolve_backend('tensorrt') == 'pytorch'
+
+        monkeypatch.setattr(finbert_service, 'ONNXRUNTIME_AVAILABLE', False)
+        assert finbert_service.resolve_backend('onnx') == 'quantized'
+
+    def test_failed_backend_falls_back_to_fp32(self, monkeypatch):
+        from app.services import finbert_service
+
+        def broken_quantize(model):
+            raise RuntimeError("quantization unsupported")
+
+        monkeypatch.setattr(finbert_service, 'quantize_model', broken_quantize)
+        model = object()
+
+        result, backend, report = finbert_service.build_backend('quantized', model, None, {})
+
+        assert result is model
+        assert backend == 'pytorch'
+        assert report is None
+
+    def test_parity_failure_falls_back_to_fp32(self, monkeypatch):
+        from app.services import finbert_service
+
+        candidate = object()
+        monkeypatch.setattr(finbert_service, 'quantize_model', lambda model: candidate)
+        monkeypatch.setattr(finbert_service, 'check_parity', lambda *args: {
+            'label_agreement': 0.5, 'max_prob_diff': 0.4, 'max_compound_diff': 0.6
+        })
+        model = object()
+
+        result, backend, report = finbert_service.build_backend('quantized', model, None, {})
+        assert result is model and backend == 'pytorch'
+        assert report['label_agreement'] == 0.5
+
+        monkeypatch.setattr(finbert_service, 'check_parity', lambda *args: {
+            'label_agreement': 1.0, 'max_prob_diff': 0.01, 'max_compound_diff': 0.02
+        })
+        result, backend, _ = finbert_service.build_backend('quantized', model, None, {})
+        assert result is candidate and backend == 'quantized'
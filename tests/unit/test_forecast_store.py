@@ -0,0 +1,108 @@
+"""
+Unit tests for the forecast store.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+
+def make_result(dates, prices, last_price=100.0):
+    return {
+        'model_name': 'Ensemble',
+        'confidence': 0.7,
+        'weights': {'LightGBM': 0.6, 'RandomForest': 0.4},
+        'weight_source': 'backtest',
+        'model_predictions': {
+            'LightGBM': [p + 1 for p in prices],
+            'RandomForest': [p - 1 for p in prices]
+        },
+        'last_actual_price': last_price,
+        'last_data_date': '2024-01-05',
+        'prediction_horizon_days': len(prices),
+        'predictions': pd.DataFrame({'date': pd.DatetimeIndex(dates), 'predicted_price': prices})
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestForecastStore:
+    """Test saving, reusing and evaluating stored forecasts."""
+
+    def test_save_and_reuse(self, app):
+        with app.app_context():
+            from app.services import forecast_service
+
+            dates = pd.bdate_range('2024-01-08', periods=3)
+            forecast_service.save_forecast('STORE', 'v1', make_result(dates, [101.0, 102.0, 103.0]))
+
+            stored = forecast_service.get_stored_forecast('STORE', 'v1', 3)
+
+            assert stored is not None
+            assert stored['from_store'] is True
+            assert stored['predictions']['predicted_price'].tolist() == [101.0, 102.0, 103.0]
+            assert stored['predictions']['date'].iloc[0] == pd.Timestamp('2024-01-08')
+            assert stored['model_count'] == 2
+            assert forecast_service.get_stored_forecast('STORE', 'v2', 3) is None
+
+    def test_save_updates_existing_key(self, app):
+        with app.app_context():
+            from app.services import forecast_service
+            from app.models import Forecast
+
+            dates = pd.bdate_range('2024-01-08', periods=2)
+            forecast_service.save_forecast('UPSERT', 'v1', make_result(dates, [1.0, 2.0]))
+            forecast_service.save_forecast('UPSERT', 'v1', make_result(dates, [3.0, 4.0]))
+
+            rows = Forecast.query.filter_by(ticker='UPSERT').all()
+            assert len(rows) == 1
+            assert rows[0].predicted_prices == [3.0, 4.0]
+
+    def test_evaluate_against_realized_prices(self, app):
+        with app.app_context():
+            from app.services import forecast_service
+
+            dates = pd.bdate_range('2024-01-08', periods=3)
+            forecast_service.save_forecast('EVAL', 'v1', make_result(dates, [101.0, 102.0, 103.0]))
+
+            # Yalnızca ilk iki gün gerçekleşmiş
+            realized = pd.DataFrame({'Close': [100.0, 102.0, 101.0]},
+                                    index=pd.DatetimeIndex(['2024-01-05', '2024-01-08', '2024-01-09']))
+
+            evaluations = forecast_service.evaluate_forecasts('EVAL', realized)
+
+            assert len(evaluations) == 1
+            evaluation = evaluations[0]
+            assert evaluation['realized_steps'] == 2
+            assert evaluation['mae'] == pytest.approx(1.0)
+            assert evaluation['directional_accuracy'] == pytest.approx(1.0)
+            assert evaluation['model_mae']['LightGBM'] == pytest.approx(1.0)
+            assert evaluation['model_mae']['RandomForest'] == pytest.approx(np.mean([2.0, 0.0]))
+
+    def test_api_serves_stored_forecasts(self, app, client, monkeypatch):
+        with app.app_context():
+            from app.services import forecast_service, stock_service, prediction_service
+
+            stock_data = pd.DataFrame({'Close': np.linspace(90.0, 100.0, 40)},
+                                      index=pd.bdate_range('2023-11-27', periods=40))
+            version = stock_service.get_data_version(stock_data)
+            dates = pd.bdate_range(stock_data.index[-1] + pd.offsets.BDay(), periods=7)
+            forecast_service.save_forecast('APIFC', version, make_result(dates, [101.0 + i for i in range(7)]))
+
+            def no_training(*args, **kwargs):
+                raise AssertionError('a fresh stored forecast must not retrain')
+
+            monkeypatch.setattr(stock_service, 'get_stock_data', lambda ticker, period: stock_data)
+            monkeypatch.setattr(prediction_service, 'predict_with_ensemble', no_training)
+
+            response = client.get('/api/stocks/APIFC/forecasts')
+            assert response.status_code == 200
+            body = response.get_json()
+            assert [row['data_version'] for row in body['data']] == [version]
+            assert body['data'][0]['predicted_prices'][0] == 101.0
+
+            response = client.get('/api/stocks/APIFC/prediction?future_days=7')
+            assert response.status_code == 200
+            data = response.get_json()['data']
+            assert data['from_store'] is True
+            assert data['predictions']['prices'][:2] == [101.0, 102.0]
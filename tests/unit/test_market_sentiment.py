@@ -0,0 +1,88 @@
+"""
+Unit tests for the market sentiment snapshot.
+"""
+
+import pytest
+from datetime import datetime
+
+
+SAMPLE_SENTIMENT = {
+    'sentiment_score': 0.25,
+    'article_count': 12,
+    'distribution': {'positive': 6, 'neutral': 4, 'negative': 2}
+}
+
+
+@pytest.mark.unit
+class TestMarketSentimentSnapshot:
+    """Test snapshot refresh and reads."""
+
+    def test_refresh_persists_snapshot(self, app, monkeypatch):
+        with app.app_context():
+            from app.services import news_service
+
+            monkeypatch.setattr(news_service, 'get_market_sentiment', lambda: dict(SAMPLE_SENTIMENT))
+            news_service.refresh_market_sentiment()
+
+            # Bellek boşaltılsa bile veritabanından okunur
+            news_service._market_sentiment_snapshot.clear()
+            snapshot = news_service.get_market_sentiment_snapshot()
+
+            assert snapshot['article_count'] == 12
+            assert snapshot['distribution']['positive'] == 6
+            assert snapshot['updated_at'] is not None
+
+    def test_index_does_not_fetch_news(self, app, client, monkeypatch):
+        with app.app_context():
+            from app.services import news_service
+
+            def fail():
+                raise AssertionError("index NewsAPI çağırmamalı")
+
+            monkeypatch.setattr(news_service, 'get_market_sentiment', fail)
+            monkeypatch.setitem(news_service._market_sentiment_snapshot, 'data', dict(SAMPLE_SENTIMENT, updated_at=None))
+            monkeypatch.setitem(news_service._market_sentiment_snapshot, 'timestamp', datetime.utcnow())
+
+            response = client.get('/')
+
+            assert response.status_code == 200
+            assert 'Genel Piyasa Duyarlılığı' in response.get_data(as_text=True)
+
+    def test_refresher_not_started_when_background_is_deferred(self, monkeypatch):
+        from app import create_app
+        from app.services import news_service
+        from config import TestingConfig
+
+        started = []
+        monkeypatch.setattr(TestingConfig, 'MARKET_SENTIMENT_REFRESH_ENABLED', True)
+        monkeypatch.setattr(news_service, 'start_market_sentiment_refresher', lambda app: started.append(app))
+
+        # gunicorn (wsgi.py) starts it after fork in a single worker instead
+        create_app('testing', start_background=False)
+        assert started == []
+
+        app = create_app('testing')
+        assert started == [app]
+
+    def test_api_serves_snapshot(self, app, client, monkeypatch):
+        with app.app_context():
+            from app import db
+            from app.models import MarketSentimentSnapshot
+            from app.services import news_service
+
+            def fail():
+                raise AssertionError("API NewsAPI çağırmamalı")
+
+            monkeypatch.setattr(news_service, 'get_market_sentiment', fail)
+            news_service._market_sentiment_snapshot.clear()
+            db.session.add(MarketSentimentSnapshot(sentiment_score=-0.4, article_count=7,
+                                                   distribution={'positive': 1, 'neutral': 2, 'negative': 4},
+                                                   created_at=datetime.utcnow()))
+            db.session.commit()
+
+            response = client.get('/api/market/sentiment')
+
+            assert response.status_code == 200
+            data = response.get_json()['data']
+            assert data['article_count'] == 7
+            assert data['sentiment_score'] == -0.4
@@ -0,0 +1,108 @@
+"""
+Unit tests for concurrent NewsAPI fetching.
+"""
+
+import time
+import pytest
+
+
+@pytest.mark.unit
+class TestConcurrentNewsFetch:
+    """Test fan-out, ordering and deadline handling."""
+
+    def test_queries_run_concurrently_in_order(self, app, monkeypatch):
+        with app.app_context():
+            from app.services import news_service
+
+            def slow_fetch(query, days_back=7, page_size=10):
+                time.sleep(0.3)
+                return [{'url': f'http://{query}', 'title': query}]
+
+            monkeypatch.setattr(news_service, 'get_news_data', slow_fetch)
+
+            started = time.perf_counter()
+            articles = news_service.get_news_data_concurrent(['a', 'b', 'c', None], deadline_seconds=5)
+            elapsed = time.perf_counter() - started
+
+            assert [a['title'] for a in articles] == ['a', 'b', 'c']
+            assert elapsed < 0.8
+
+    def test_deadline_returns_partial_results(self, app, monkeypatch):
+        with app.app_context():
+            from app.services import news_service
+
+            def fetch(query, days_back=7, page_size=10):
+                if query == 'slow':
+                    time.sleep(1.0)
+                return [{'url': f'http://{query}', 'title': query}]
+
+            monkeypatch.setattr(news_service, 'get_news_data', fetch)
+
+            started = time.perf_counter()
+            articles = news_service.get_news_data_concurrent(['fast', 'slow'], deadline_seconds=0.3)
+            elapsed = time.perf_counter() - started
+
+            assert [a['title'] for a in articles] == ['fast']
+            assert elapsed < 0.8
+
+
+def make_article(url, hours_ago):
+    from datetime import datetime, timedelta
+    published = datetime.utcnow() - timedelta(hours=hours_ago)
+    return {
+        'title': url,
+        'description': f'About {url}',
+        'url': f'http://{url}',
+        'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'source': {'name': 'Test'}
+    }
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestNewsStore:
+    """Test the incremental local article store."""
+
+    def test_incremental_fetch_and_dedup(self, app, monkeypatch):
+        with app.app_context():
+            from app.services import news_service
+
+            calls = []
+            responses = [
+                [make_article('one', 30), make_article('two', 5)],
+                [make_article('two', 5), make_article('three', 1)],
+            ]
+
+            def fake_fetch(query, from_param, page_size):
+                calls.append(from_param)
+                return responses[len(calls) - 1]
+
+            monkeypatch.setattr(news_service, '_fetch_news_api', fake_fetch)
+            monkeypatch.setitem(app.config, 'NEWS_STORE_REFRESH_SECONDS', 0)
+
+            first = news_service.get_news_data('store-query', days_back=7)
+            second = news_service.get_news_data('store-query', days_back=7)
+
+            assert [a['title'] for a in first] == ['two', 'one']
+            assert [a['title'] for a in second] == ['three', 'two', 'one']
+            # İlk istek tüm pencere (gün), ikincisi en yeni haberden sonrası (saat)
+            assert len(calls[0]) == 10
+            assert 'T' in calls[1]
+
+    def test_window_served_locally_within_refresh_interval(self, app, monkeypatch):
+        with app.app_context():
+            from app.services import news_service
+
+            calls = []
+
+            def fake_fetch(query, from_param, page_size):
+                calls.append(from_param)
+                return [make_article('recent', 2), make_article('older', 60)]
+
+            monkeypatch.setattr(news_service, '_fetch_news_api', fake_fetch)
+
+            news_service.get_news_data('local-query', days_back=7)
+            narrow = news_service.get_news_data('local-query', days_back=1)
+
+            assert len(calls) == 1
+            assert [a['title'] for a in narrow] == ['recent']
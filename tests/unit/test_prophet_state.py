@@ -0,0 +1,107 @@
+"""
+Unit tests for Prophet seasonality profiles and warm-start state.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+
+class FittedModelStub:
+    """Minimal object exposing fitted Prophet params."""
+
+    def __init__(self):
+        self.params = {
+            'k': np.array([[0.1]]),
+            'm': np.array([[0.5]]),
+            'sigma_obs': np.array([[0.02]]),
+            'delta': np.array([[0.0, 0.01, -0.02]]),
+            'beta': np.array([[0.3, -0.1]])
+        }
+
+
+def make_frame(n):
+    dates = pd.bdate_range(end=pd.Timestamp('2024-06-28'), periods=n)
+    return pd.DataFrame({'Close': np.linspace(100, 120, n)}, index=dates)
+
+
+@pytest.mark.unit
+@pytest.mark.ml
+class TestProphetState:
+    """Test Prophet settings, signature and persisted fit state."""
+
+    def test_trading_profile_resolves_yearly_by_span(self):
+        from app.services.prediction_service import _prophet_model_kwargs
+        from config import Config
+
+        settings = {key: getattr(Config, key) for key in (
+            'PROPHET_SEASONALITY_PROFILE', 'PROPHET_PARAMS', 'PROPHET_UNCERTAINTY_SAMPLES')}
+        settings['PROPHET_SEASONALITY_PROFILE'] = 'trading'
+
+        short_kwargs = _prophet_model_kwargs(settings, make_frame(200))
+        long_kwargs = _prophet_model_kwargs(settings, make_frame(600))
+
+        assert short_kwargs['daily_seasonality'] is False
+        assert short_kwargs['yearly_seasonality'] is False
+        assert long_kwargs['yearly_seasonality'] is True
+        assert short_kwargs['uncertainty_samples'] == Config.PROPHET_UNCERTAINTY_SAMPLES
+
+    def test_signature_ignores_uncertainty_samples(self):
+        from app.services.prediction_service import _prophet_signature
+
+        base = {'daily_seasonality': False, 'uncertainty_samples': 200}
+        other = dict(base, uncertainty_samples=1000)
+
+        assert _prophet_signature(base, False) == _prophet_signature(other, False)
+        assert _prophet_signature(base, False) != _prophet_signature(base, True)
+
+    def test_state_persists_to_disk(self, tmp_path):
+        from app.services import prediction_service
+
+        prediction_service._save_prophet_state('TEST.IS', str(tmp_path), 'sig', 'v1', FittedModelStub())
+        prediction_service._prophet_state_cache.pop('TEST.IS', None)
+
+        state = prediction_service._load_prophet_state('TEST.IS', str(tmp_path))
+
+        assert state['signature'] == 'sig'
+        assert state['data_version'] == 'v1'
+        assert state['model'] is None
+        assert state['init']['k'] == pytest.approx(0.1)
+        assert state['init']['delta'] == pytest.approx([0.0, 0.01, -0.02])
+
+        prediction_service._prophet_state_cache.pop('TEST.IS', None)
+        assert prediction_service._load_prophet_state('OTHER', str(tmp_path)) is None
+
+    def test_fit_is_skipped_while_timed_out_fits_hold_the_pool(self):
+        import time
+        import threading
+        from concurrent.futures import TimeoutError as FuturesTimeoutError
+        from app.services import prediction_service
+
+        release = threading.Event()
+
+        class SlowModel:
+            def fit(self, df, **kwargs):
+                release.wait(5)
+                return self
+
+        try:
+            for _ in range(prediction_service.PROPHET_FIT_WORKERS):
+                with pytest.raises(FuturesTimeoutError):
+                    prediction_service._fit_prophet(SlowModel(), None, {}, timeout=0.05)
+
+            # Timed-out fits keep running, so a new fit is refused instead of queued
+            with pytest.raises(prediction_service.ProphetFitBusyError):
+                prediction_service._fit_prophet(SlowModel(), None, {}, timeout=0.05)
+        finally:
+            release.set()
+
+        # Once the timed-out fits finish, new fits run again
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                assert prediction_service._fit_prophet(SlowModel(), None, {}, timeout=1) is not None
+                break
+            except prediction_service.ProphetFitBusyError:
+                assert time.monotonic() < deadline
+                time.sleep(0.05)
@@ -0,0 +1,114 @@
+"""
+Unit tests for the time-decayed ticker sentiment aggregator.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+
+def observation(url, score, published_at, source=''):
+    from app.services.sentiment_aggregator import article_key
+    return {'key': article_key(url), 'score': score, 'source': source, 'published_at': published_at}
+
+
+@pytest.mark.unit
+class TestSentimentAggregator:
+    """Test decayed updates, daily series and persistence."""
+
+    def test_decay_and_source_weights(self, app, monkeypatch):
+        with app.app_context():
+            from app.services import sentiment_aggregator
+
+            monkeypatch.setitem(app.config, 'SENTIMENT_DECAY_HALF_LIFE_HOURS', 24)
+            monkeypatch.setitem(app.config, 'SENTIMENT_SOURCE_WEIGHTS', {'reuters': 2.0})
+            now = datetime.utcnow().replace(microsecond=0)
+
+            added = sentiment_aggregator.update_ticker_sentiment('DECAY', [
+                observation('http://a', 1.0, now - timedelta(hours=24)),
+                observation('http://b', -1.0, now, source='Reuters')
+            ])
+            assert added == 2
+
+            # Old positive news has half weight, Reuters counts double: (0.5 - 2) / 2.5
+            result = sentiment_aggregator.get_ticker_sentiment('DECAY', now=now)
+            assert result['score'] == pytest.approx(-0.6)
+            assert result['effective_weight'] == pytest.approx(2.5)
+
+            later = sentiment_aggregator.get_ticker_sentiment('DECAY', now=now + timedelta(hours=24))
+            assert later['score'] == pytest.approx(-0.6)
+            assert later['effective_weight'] == pytest.approx(1.25)
+
+            # Already seen articles are skipped
+            assert sentiment_aggregator.update_ticker_sentiment('DECAY', [observation('http://a', 1.0, now)]) == 0
+
+    def test_daily_series_and_persistence(self, app):
+        with app.app_context():
+            from app.services import sentiment_aggregator
+
+            today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+            yesterday = today - timedelta(days=1)
+
+            sentiment_aggregator.update_ticker_sentiment('DAILY', [
+                observation('http://d1', 0.4, yesterday),
+                observation('http://d2', 0.2, yesterday + timedelta(hours=1)),
+                observation('http://d3', -0.6, today)
+            ])
+
+            # Restart: state comes back from the database without re-scoring
+            sentiment_aggregator.reset_ticker_sentiment()
+            series = sentiment_aggregator.get_daily_sentiment('DAILY')
+
+            assert [day['date'] for day in series] == [yesterday.strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')]
+            assert series[0]['sentiment_score'] == pytest.approx(0.3)
+            assert series[0]['article_count'] == 2
+            assert series[1]['sentiment_score'] == pytest.approx(-0.6)
+            assert series[1]['decayed_score'] == pytest.approx((0.6 * 0.5 - 0.6) / (2 * 0.5 + 1))
+
+            state = sentiment_aggregator.get_ticker_sentiment('DAILY')
+            assert state['article_count'] == 3
+
+    def test_updates_merge_state_written_by_other_workers(self, app, monkeypatch):
+        with app.app_context():
+            from app.services import sentiment_aggregator
+
+            now = datetime.utcnow().replace(microsecond=0)
+            sentiment_aggregator.update_ticker_sentiment('SHARED', [observation('http://s1', 1.0, now)])
+            stale = dict(sentiment_aggregator._ticker_states)
+
+            # Another worker adds s2; this process still holds the older version in memory
+            sentiment_aggregator.update_ticker_sentiment('SHARED', [observation('http://s2', 1.0, now)])
+            sentiment_aggregator._ticker_states.update(stale)
+
+            added = sentiment_aggregator.update_ticker_sentiment('SHARED', [
+                observation('http://s2', 1.0, now), observation('http://s3', -1.0, now)
+            ])
+            assert added == 1
+            assert sentiment_aggregator.get_ticker_sentiment('SHARED')['article_count'] == 3
+
+            # A write based on an outdated read is rejected and retried on fresh state
+            read_state = sentiment_aggregator._read_state
+            reads = []
+
+            def outdated_first_read(ticker):
+                reads.append(ticker)
+                return stale['SHARED'] if len(reads) == 1 else read_state(ticker)
+
+            monkeypatch.setattr(sentiment_aggregator, '_read_state', outdated_first_read)
+            assert sentiment_aggregator.update_ticker_sentiment('SHARED', [observation('http://s4', 1.0, now)]) == 1
+            assert len(reads) == 2
+
+            sentiment_aggregator.reset_ticker_sentiment()
+            assert sentiment_aggregator.get_ticker_sentiment('SHARED')['article_count'] == 4
+
+    def test_sentiment_chart_accepts_daily_series(self, app):
+        with app.app_context():
+            from app.services.chart_service import create_sentiment_chart
+
+            series = [
+                {'date': '2024-01-01', 'sentiment_score': 0.2, 'decayed_score': 0.2, 'article_count': 1},
+                {'date': '2024-01-02', 'sentiment_score': -0.4, 'decayed_score': -0.1, 'article_count': 2}
+            ]
+
+            html = create_sentiment_chart(series)
+            assert html is not None
+            assert 'Sönümlü Duyarlılık' in html
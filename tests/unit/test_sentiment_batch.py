@@ -0,0 +1,163 @@
+"""
+Unit tests for batched sentiment analysis.
+"""
+
+import pytest
+
+
+class FailingTokenizer:
+    """Tokenizer stub whose batch padding always fails."""
+
+    def __call__(self, texts, **kwargs):
+        if isinstance(texts, list):
+            return {'input_ids': [[0] * len(text.split()) for text in texts]}
+        raise RuntimeError("tokenize failed")
+
+    def pad(self, features, **kwargs):
+        raise RuntimeError("pad failed")
+
+
+@pytest.mark.unit
+class TestSentimentBatch:
+    """Test batched sentiment API and its fallbacks."""
+
+    def test_batch_matches_single_without_finbert(self, app):
+        with app.app_context():
+            from app.services.news_service import get_sentiments_finbert, get_sentiment_vader
+
+            texts = ["Shares surge after record profits", "Company faces fraud lawsuit", "Board meets on Monday"]
+
+            assert get_sentiments_finbert(texts) == [get_sentiment_vader(t) for t in texts]
+
+    def test_failed_batch_falls_back_per_item(self, app, monkeypatch):
+        with app.app_context():
+            from app.services import news_service
+
+            monkeypatch.setattr(news_service, 'TRANSFORMERS_AVAILABLE', True)
+            monkeypatch.setattr(news_service, 'finbert_tokenizer', FailingTokenizer())
+            monkeypatch.setattr(news_service, 'finbert_model', object())
+
+            texts = ["Shares surge after record profits", "", "Company faces fraud lawsuit"]
+            results = news_service.get_sentiments_finbert(texts, batch_size=2)
+
+            assert results[0] == news_service.get_sentiment_vader(texts[0])
+            assert results[1] == ("neutral", 0.0)
+            assert results[2] == news_service.get_sentiment_vader(texts[2])
+
+    def test_analyze_news_sentiment_preserves_order(self, app):
+        with app.app_context():
+            from app.services.news_service import analyze_news_sentiment
+
+            articles = [
+                {'title': 'Stocks rally strongly', 'description': '', 'url': 'http://a'},
+                {'title': 'No url here', 'description': 'ignored'},
+                {'title': 'Markets crash on fears', 'description': 'Markets crash on recession fears', 'url': 'http://b'}
+            ]
+            result = analyze_news_sentiment(articles)
+
+            assert result['total_count'] == 2
+            assert [a['url'] for a in result['articles']] == ['http://a', 'http://b']
+            assert result['articles'][0]['sentiment_category'] == 'positive'
+            assert result['articles'][1]['sentiment_category'] == 'negative'
+
+    def test_repeat_texts_served_from_cache(self, app, monkeypatch):
+        with app.app_context():
+            from app.services import news_service
+            from app.models import SentimentCache
+
+            calls = []
+            original = news_service.get_sentiment_vader
+
+            def counting_vader(text):
+                calls.append(text)
+                return original(text)
+
+            monkeypatch.setattr(news_service, 'get_sentiment_vader', counting_vader)
+
+            texts = ["Cache me: profits jump", "Cache me: losses widen"]
+            first = news_service.get_sentiments_finbert(texts)
+            assert len(calls) == 2
+
+            # Bellek önbelleği boşaltılsa bile tablodan okunur
+            news_service._get_sentiment_cache().clear()
+            second = news_service.get_sentiments_finbert(texts + texts[:1])
+
+            assert len(calls) == 2
+            assert second == first + first[:1]
+
+            key = news_service.sentiment_cache_key(texts[0], 'vader')
+            assert SentimentCache.query.filter_by(key_hash=key).first() is not None
+
+    def test_db_cache_evicts_least_recently_used(self, app, monkeypatch):
+        with app.app_context():
+            from datetime import datetime, timedelta
+            from app import db
+            from app.models import SentimentCache
+            from app.services import news_service
+
+            SentimentCache.query.delete()
+            db.session.commit()
+            monkeypatch.setattr(news_service, '_sentiment_cache_writes', 0)
+            monkeypatch.setitem(app.config, 'SENTIMENT_CACHE_DB_MAX_ROWS', 2)
+            monkeypatch.setitem(app.config, 'SENTIMENT_CACHE_PRUNE_EVERY', 2)
+
+            news_service._store_cached_sentiments({'old': ('neutral', 0.0), 'used': ('positive', 0.5)}, 'vader')
+            SentimentCache.query.update({'last_used_at': datetime.utcnow() - timedelta(days=2)})
+            db.session.commit()
+
+            # The size check runs once per PRUNE_EVERY writes, not on every write
+            news_service._store_cached_sentiments({'new': ('negative', -0.5)}, 'vader')
+            assert SentimentCache.query.count() == 3
+
+            # A table hit refreshes last_used_at of an old row
+            news_service._get_sentiment_cache().clear()
+            assert news_service._load_cached_sentiments(['used']) == {'used': ('positive', 0.5)}
+
+            news_service._store_cached_sentiments({'newer': ('negative', -0.2)}, 'vader')
+            remaining = {row.key_hash for row in SentimentCache.query.all()}
+            assert remaining == {'used', 'newer'}
+
+    def test_finbert_not_loaded_when_disabled(self, app):
+        with app.app_context():
+            from app.services import news_service
+
+            assert app.config['FINBERT_ENABLED'] is False
+            news_service.get_active_sentiment_model()
+
+            assert news_service._finbert_load_thread is None
+            assert news_service.is_finbert_ready() is False
+
+    def test_near_duplicate_articles_scored_once(self, app, monkeypatch):
+        with app.app_context():
+            from app.services import news_service
+
+            scored = []
+            original = news_service.get_sentiments_finbert
+
+            def recording(texts, batch_size=None):
+                scored.extend(texts)
+                return original(texts, batch_size)
+
+            monkeypatch.setattr(news_service, 'get_sentiments_finbert', recording)
+
+            story = ("Tesla shares tumbled after the automaker missed delivery estimates for the quarter "
+                     "and cut its production outlook, citing supply chain disruptions")
+            articles = [
+                {'title': 'Tesla misses delivery estimates', 'description': story, 'url': 'http://wire/1'},
+                {'title': 'Tesla misses delivery estimates', 'description': story + ' (Reuters)', 'url': 'http://syndicated/2'},
+                {'title': 'Gold hits record high', 'description': 'Gold prices hit an all time high as investors sought safety',
+                 'url': 'http://other/3'}
+            ]
+            result = news_service.analyze_news_sentiment(articles)
+
+            assert result['total_count'] == 2
+            assert [a['duplicate_count'] for a in result['articles']] == [2, 1]
+            assert len(scored) == 2
+
+            # A later rewrite of the same story maps to the stored representative text
+            scored.clear()
+            later = news_service.analyze_news_sentiment([
+                {'title': 'Tesla misses delivery estimates', 'description': 'UPDATE: ' + story, 'url': 'http://late/4'}
+            ])
+            assert scored == [story]
+            assert later['articles'][0]['url'] == 'http://late/4'
@@ -0,0 +1,104 @@
+"""
+Tests for the out-of-process sentiment worker and its client.
+"""
+
+import os
+import tempfile
+import threading
+import pytest
+
+
+@pytest.fixture
+def worker_client(app, monkeypatch):
+    """Point the client at a fresh socket path and reset its state."""
+    from app.services import sentiment_worker
+
+    address = os.path.join(tempfile.mkdtemp(), 'sentiment.sock')
+    monkeypatch.setitem(app.config, 'SENTIMENT_WORKER_ENABLED', True)
+    monkeypatch.setitem(app.config, 'SENTIMENT_WORKER_ADDRESS', address)
+    monkeypatch.setitem(app.config, 'SENTIMENT_WORKER_TIMEOUT_SECONDS', 2)
+    monkeypatch.setitem(app.config, 'SENTIMENT_WORKER_BATCH_WINDOW_MS', 200)
+    monkeypatch.setitem(app.config, 'SENTIMENT_CACHE_PERSIST', False)
+    sentiment_worker._client_state.update({'down_until': 0.0, 'model': None, 'model_timestamp': 0.0})
+
+    yield address
+
+    sentiment_worker._close_connection()
+    sentiment_worker._client_state.update({'down_until': 0.0, 'model': None, 'model_timestamp': 0.0})
+
+
+@pytest.mark.unit
+class TestSentimentWorker:
+    """Test micro-batching in the worker and the client's VADER fallback."""
+
+    def test_requests_are_micro_batched(self, app, worker_client, monkeypatch):
+        from app.services import news_service, sentiment_worker
+
+        batches = []
+
+        def fake_batch(texts, batch_size=None):
+            batches.append(list(texts))
+            return [('positive', float(len(text))) for text in texts], [True] * len(texts)
+
+        monkeypatch.setattr(news_service, 'is_finbert_ready', lambda: True)
+        monkeypatch.setattr(news_service, '_score_finbert_batch', fake_batch)
+
+        stop_event = threading.Event()
+        server = threading.Thread(target=sentiment_worker.run_sentiment_worker, args=(app, stop_event), daemon=True)
+        server.start()
+        for _ in range(100):
+            if os.path.exists(worker_client):
+                break
+            threading.Event().wait(0.05)
+
+        requests = [['a', 'bb'], ['ccc'], ['dddd', 'eeeee', 'f']]
+        replies = [None] * len(requests)
+
+        def client(index):
+            with app.app_context():
+                replies[index] = sentiment_worker.score_texts(requests[index])
+                sentiment_worker._close_connection()
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(len(requests))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Generated key and socket are private to the owner
+        assert os.stat(worker_client).st_mode & 0o077 == 0
+        assert os.stat(f'{worker_client}.key').st_mode & 0o777 == 0o600
+
+        stop_event.set()
+
+        for texts, reply in zip(requests, replies):
+            results, cacheable = reply
+            assert results == [('positive', float(len(text))) for text in texts]
+            assert cacheable == [True] * len(texts)
+
+        # Three requests inside one batching window share a model call
+        assert len(batches) < len(requests)
+        assert sorted(text for batch in batches for text in batch) == sorted(t for texts in requests for t in texts)
+
+    def test_unreachable_worker_falls_back_to_vader(self, app, worker_client):
+        with app.app_context():
+            from app.services import news_service, sentiment_worker
+
+            texts = ["Shares surge after record profits", "Company faces fraud lawsuit"]
+
+            assert sentiment_worker.score_texts(texts) is None
+            assert news_service.get_active_sentiment_model() == 'vader'
+            assert news_service.get_sentiments_finbert(texts) == [news_service.get_sentiment_vader(t) for t in texts]
+
+    def test_client_rejects_shared_key_file(self, app, worker_client):
+        with app.app_context():
+            from app.services import sentiment_worker
+
+            key_path = f'{worker_client}.key'
+            with open(key_path, 'w') as key_file:
+                key_file.write('planted')
+            os.chmod(key_path, 0o644)
+
+            with pytest.raises(PermissionError):
+                sentiment_worker._authkey(app.config)
+            assert sentiment_worker.score_texts(['text']) is None
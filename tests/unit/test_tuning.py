@@ -0,0 +1,146 @@
+"""
+Unit tests for the hyperparameter search service.
+"""
+
+import json
+import time
+import pytest
+
+
+@pytest.mark.unit
+@pytest.mark.ml
+class TestTuning:
+    """Test successive halving search and parameter persistence."""
+
+    def test_successive_halving_keeps_best(self):
+        from app.services.tuning_service import _successive_halving
+
+        candidates = [{'x': x} for x in range(9)]
+        resources_seen = []
+
+        def run_trials(trials):
+            resources_seen.append(trials[0][2])
+            return [(abs(c['x'] - 4), resource) for _, c, resource in trials]
+
+        best, score, resource, history = _successive_halving('dummy', candidates, 10, 90, 3, run_trials)
+
+        assert best == {'x': 4}
+        assert score == 0
+        assert resources_seen == [10, 30, 90]
+        assert [h['candidates'] for h in history] == [9, 3, 1]
+
+    def test_sample_candidates_unique(self):
+        from app.services.tuning_service import _sample_candidates, RANDOM_FOREST_SEARCH_SPACE
+
+        candidates = _sample_candidates(RANDOM_FOREST_SEARCH_SPACE, 10, seed=0)
+        signatures = {tuple(sorted(c.items(), key=lambda kv: kv[0])) for c in candidates}
+
+        assert len(candidates) == 10
+        assert len(signatures) == 10
+
+    def test_tune_persists_and_serves_params(self, app, tmp_path, make_stock_data):
+        with app.app_context():
+            from app.services import tuning_service
+
+            if not tuning_service.SKLEARN_AVAILABLE:
+                pytest.skip("scikit-learn yüklü değil")
+
+            original_path = app.config.get('TUNED_PARAMS_PATH')
+            app.config['TUNED_PARAMS_PATH'] = str(tmp_path / 'tuned_params.json')
+            try:
+                entry = tuning_service.tune_hyperparameters(
+                    'TUNE', [make_stock_data(rows=220, seed=2, end='today')], models=['random_forest'],
+                    n_candidates=4, max_workers=1
+                )
+
+                assert entry is not None
+                assert entry['random_forest']['n_estimators'] <= app.config['TUNING_RF_MAX_TREES']
+
+                params = tuning_service.get_tuned_params('TUNE')
+                assert params['random_forest']['max_depth'] == entry['random_forest']['max_depth']
+                assert params['random_forest']['random_state'] == 42
+                assert tuning_service.get_tuned_params('OTHER') is None
+            finally:
+                app.config['TUNED_PARAMS_PATH'] = original_path
+
+    def test_schedule_tuning_runs_in_background(self, app, tmp_path, make_stock_data, monkeypatch):
+        with app.app_context():
+            from app.services import tuning_service, stock_service
+
+            if not tuning_service.SKLEARN_AVAILABLE:
+                pytest.skip("scikit-learn yüklü değil")
+
+            tune = tuning_service.tune_hyperparameters
+            monkeypatch.setitem(app.config, 'TUNED_PARAMS_PATH', str(tmp_path / 'tuned_params.json'))
+            monkeypatch.setattr(stock_service, 'get_stock_data', lambda symbol, period: make_stock_data(rows=220, seed=2, end='today'))
+            monkeypatch.setattr(tuning_service, 'tune_hyperparameters', lambda scope_key, frames, data_version=None: tune(
+                scope_key, frames, data_version=data_version, models=['random_forest'], n_candidates=4, max_workers=1))
+
+            assert tuning_service.schedule_tuning('BGTUNE', ['BGTUNE']) is True
+            deadline = time.time() + 60
+            while tuning_service.is_tuning_running('BGTUNE') and time.time() < deadline:
+                time.sleep(0.05)
+
+            entry = tuning_service.get_tuning_result('BGTUNE')
+            assert entry['data_version'] == stock_service.get_data_version(make_stock_data(rows=220, seed=2, end='today'))
+            assert 'random_forest' in entry
+
+            monkeypatch.setitem(app.config, 'TUNING_MAX_QUEUED', 0)
+            assert tuning_service.schedule_tuning('FULL', ['FULL']) is False
+
+    def test_dataset_cache_key_follows_data(self, app, tmp_path, make_stock_data):
+        with app.app_context():
+            from app.services import tuning_service
+
+            first = tuning_service._split_frames([make_stock_data(rows=220, seed=2), make_stock_data(rows=220, seed=3)])
+            changed = tuning_service._split_frames([make_stock_data(rows=220, seed=2), make_stock_data(rows=221, seed=3)])
+
+            key = tuning_service._dataset_cache_key('market:BIST', first)
+            assert key == tuning_service._dataset_cache_key('market:BIST', first)
+            # Any frame of a market scope changing gives new Dataset files
+            assert key != tuning_service._dataset_cache_key('market:BIST', changed)
+
+            # Files from the previous data of the same scope are dropped, other scopes are kept
+            new_key = tuning_service._dataset_cache_key('market:BIST', changed)
+            other_key = tuning_service._dataset_cache_key('market:NASDAQ', first)
+            for name in (key, new_key, other_key):
+                (tmp_path / f'{name}_train.bin').write_bytes(b'')
+            tuning_service._remove_stale_datasets(str(tmp_path), new_key)
+
+            assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+                [f'{new_key}_train.bin', f'{other_key}_train.bin'])
+
+    def test_api_trigger_accepts_post_without_csrf_token(self, app, client, monkeypatch):
+        from app.services import tuning_service
+
+        scheduled = []
+        monkeypatch.setitem(app.config, 'WTF_CSRF_ENABLED', True)
+        monkeypatch.setattr(tuning_service, 'schedule_tuning',
+                            lambda scope_key, tickers, period='2y': scheduled.append((scope_key, tickers)) or True)
+
+        response = client.post('/api/stocks/csrf/tune')
+        assert response.status_code == 202
+        assert response.get_json()['scope'] == 'CSRF'
+        assert scheduled == [('CSRF', ['CSRF'])]
+
+    def test_concurrent_stores_keep_every_scope(self, app, tmp_path, monkeypatch):
+        with app.app_context():
+            import threading
+            from app.services import tuning_service
+
+            monkeypatch.setitem(app.config, 'TUNED_PARAMS_PATH', str(tmp_path / 'tuned_params.json'))
+            scopes = [f'SCOPE{i}' for i in range(16)]
+
+            def store(scope, depth):
+                with app.app_context():
+                    tuning_service._store_tuned_params(scope, {'random_forest': {'max_depth': depth}})
+
+            threads = [threading.Thread(target=store, args=(scope, i)) for i, scope in enumerate(scopes)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            with open(tmp_path / 'tuned_params.json', encoding='utf-8') as f:
+                assert sorted(json.load(f)) == sorted(scopes)
+            assert [path.name for path in tmp_path.iterdir()] == ['tuned_params.json']
@@ -209,4 +209,80 @@ class TestCacheUtilities:
             
             import time
             current_time = time.time()
-            assert current_time == 1640995200
\ No newline at end of file
+            assert current_time == 1640995200
+
+    def test_lru_cache_evicts_least_recently_used(self):
+        """Test LRU eviction order."""
+        from app.utils.cache import LRUCache
+        
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1  # 'a' artık en son kullanılan
+        cache.set('c', 3)
+        
+        assert 'b' not in cache
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+        assert cache.stats()['hits'] == 3
+
+    def test_byte_budget_cache_evicts_by_size(self):
+        """Test byte-budgeted cache evicts least recently used entries by total size."""
+        from app.utils.cache import ByteBudgetCache
+        
+        cache = ByteBudgetCache(max_bytes=100)
+        assert cache.set('a', 'A', 40)
+        assert cache.set('b', 'B', 40)
+        assert cache.get('a') == 'A'  # 'b' artık en eski
+        assert cache.set('c', 'C', 40)
+        
+        assert 'b' not in cache
+        assert cache.total_bytes == 80
+        assert cache.set('huge', 'X', 101) is False
+        assert 'huge' not in cache
+        assert cache.stats()['evictions'] == 1
+
+    def test_minhash_index_finds_near_duplicates(self):
+        """Test MinHash index matches syndicated rewrites but not unrelated text."""
+        from app.utils.minhash import MinHashIndex, minhash_signature, estimated_similarity
+        
+        original = ("Apple shares rose sharply on Thursday after the company reported record iPhone sales "
+                    "and raised its dividend, beating Wall Street expectations for the quarter")
+        rewrite = original + " - Reuters"
+        unrelated = "Oil prices slipped as OPEC members weighed a production increase amid weak demand in Asia"
+        
+        assert estimated_similarity(minhash_signature(original), minhash_signature(original)) == 1.0
+        assert minhash_signature("") is None
+        
+        index = MinHashIndex(threshold=0.7, maxsize=2)
+        index.add(minhash_signature(original), 'original')
+        
+        assert index.find(minhash_signature(rewrite)) == 'original'
+        assert index.find(minhash_signature(unrelated)) is None
+        
+        index.add(minhash_signature(unrelated), 'unrelated')
+        index.add(minhash_signature("Completely different third headline about central bank rate decisions"), 'third')
+        assert len(index) == 2
+        assert index.find(minhash_signature(original)) is None
+
+    def test_downsampling_bounds_points_and_keeps_extremes(self):
+        """Test LTTB and min-max decimation output size and fidelity."""
+        import numpy as np
+        from app.utils.downsample import lttb_indices, minmax_indices
+        
+        values = np.sin(np.linspace(0, 20, 10000))
+        values[4321] = 5.0  # Tek noktalık sıçrama
+        
+        lttb = lttb_indices(values, 500)
+        assert len(lttb) <= 500
+        assert lttb[0] == 0 and lttb[-1] == len(values) - 1
+        assert np.all(np.diff(lttb) > 0)
+        assert 4321 in lttb
+        
+        minmax = minmax_indices(values, 500)
+        assert len(minmax) <= 502
+        assert 4321 in minmax
+        assert values[minmax].min() == values.min()
+        
+        assert len(lttb_indices(values[:100], 500)) == 100
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Finans Analiz Aracı - WSGI giriş noktası (gunicorn)
+"""
+
+import os
+from app import create_app
+from app.services.news_service import initialize_finbert
+
+# Flask uygulamasını oluştur. Arka plan iş parçacıkları burada başlatılmaz:
+# preload_app ile bu modül master süreçte yüklenir ve fork'tan önce başlayan
+# thread'ler worker'lara geçmez. gunicorn.conf.py bunları post_fork'ta tek bir
+# worker'da başlatır.
+app = create_app(os.getenv('FLASK_CONFIG', 'production'), start_background=False)
+
+# gunicorn preload_app ile bu modül master süreçte bir kez yüklenir; FinBERT
+# burada yüklenirse worker'lar ağırlıkları fork sonrası copy-on-write paylaşır.
+# Preload kapalıysa model ilk kullanımda arka planda yüklenir. Duyarlılık
+# worker'ı açıksa model yalnızca o süreçte yüklenir.
+if (app.config.get('FINBERT_ENABLED') and app.config.get('FINBERT_PRELOAD')
+        and not app.config.get('SENTIMENT_WORKER_ENABLED')):
+    with app.app_context():
+        initialize_finbert()